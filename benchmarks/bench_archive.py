@@ -0,0 +1,118 @@
+r"""Measures the disk used by, and the time to scan, months of listing stores.
+
+Run from the repository root with `python -m benchmarks.bench_archive`.
+Listings are reposted from day to day and descriptions share boilerplate, as on real
+job boards, so most description text repeats. The stores are written to a temporary
+directory, compacted into an archive there, and read back in full and by company.
+"""
+import logging
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.archive import DATE_FORMAT, ListingArchive, compact_listings
+
+DAYS = 90
+TERMS = ("Graphic Designer", "Python Developer")
+LISTINGS_PER_STORE = 300
+# How many listings are live at any time; each day replaces a few of them.
+LIVE_LISTINGS = 600
+NEW_PER_DAY = 40
+COMPANIES = [f"Company {i}" for i in range(400)]
+WORDS = """design brand python product user research figma team build ship data
+remote growth lead senior creative motion engineer customers platform scale""".split()
+BOILERPLATE = [
+    "We are an equal opportunity employer and do not discriminate on the basis of "
+    "race, religion, color, national origin, gender, sexual orientation, age, marital "
+    "status, veteran status, or disability status.",
+    "Benefits include medical, dental and vision insurance, a 401(k) plan with "
+    "company match, paid time off, parental leave and a learning stipend.",
+    "This role is eligible for hybrid work, two days a week in our New York office.",
+]
+
+
+def description(rng: np.random.Generator) -> str:
+    sentences = [
+        " ".join(rng.choice(WORDS, 12)).capitalize() + "."
+        for _ in range(rng.integers(25, 45))
+    ]
+    return " ".join([*sentences, *BOILERPLATE])
+
+
+def write_stores(directory: Path, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=DAYS)
+    next_id = 0
+
+    def listing() -> dict:
+        nonlocal next_id
+        next_id += 1
+        return {
+            "job_url": f"https://example.com/jobs/{next_id}",
+            "site": "indeed",
+            "title": str(rng.choice(["Graphic Designer", "Python Developer"])),
+            "company": str(rng.choice(COMPANIES)),
+            "location": "New York, NY",
+            "date_posted": str(start),
+            "min_amount": float(rng.integers(50, 120) * 1000),
+            "max_amount": float(rng.integers(120, 200) * 1000),
+            "currency": "USD",
+            "is_remote": bool(rng.integers(2)),
+            "description": description(rng),
+            "recruiter": None,
+        }
+
+    live = {term: [listing() for _ in range(LIVE_LISTINGS)] for term in TERMS}
+    for day in range(DAYS):
+        stamp = (start + timedelta(days=day)).strftime(DATE_FORMAT)
+        for term, listings in live.items():
+            listings[:NEW_PER_DAY] = [listing() for _ in range(NEW_PER_DAY)]
+            rng.shuffle(listings)
+            pd.DataFrame(listings[:LISTINGS_PER_STORE]).to_csv(
+                directory / f"{term}_{stamp}_joblistings.csv", index=False
+            )
+
+
+def timed(function) -> tuple[float, object]:
+    start = perf_counter()
+    result = function()
+    return perf_counter() - start, result
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        stores = Path(directory)
+        write_stores(stores)
+        paths = sorted(stores.glob("*_joblistings.csv"))
+        csv_bytes = sum(path.stat().st_size for path in paths)
+        csv_scan, jobs = timed(lambda: pd.concat(map(pd.read_csv, paths)))
+        company = jobs["company"].iloc[0]
+        csv_company, _ = timed(
+            lambda: pd.concat(
+                jobs[jobs["company"] == company] for jobs in map(pd.read_csv, paths)
+            )
+        )
+
+        archive_path = stores / "archive.sqlite"
+        with ListingArchive(archive_path) as archive:
+            compaction, _ = timed(lambda: compact_listings(stores, archive))
+            archive_scan, archived = timed(archive.query)
+            archive_company, _ = timed(lambda: archive.query(company=company))
+        archive_bytes = archive_path.stat().st_size
+
+    megabytes = 2**20
+    print(f"{len(paths)} stores, {len(jobs)} listings, compacted in {compaction:.1f} s")
+    print(f"  disk:       CSV {csv_bytes / megabytes:7.1f} MB, "
+          f"archive {archive_bytes / megabytes:7.1f} MB")
+    print(f"  full scan:  CSV {csv_scan:7.2f} s,  archive {archive_scan:7.2f} s")
+    print(f"  by company: CSV {csv_company:7.2f} s,  archive {archive_company:7.2f} s")
+    assert len(archived) == len(jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+r"""Compares exporting a large day of letters flat, as before, with the sharded layout.
+
+Run from the repository root with `python -m benchmarks.bench_exports`.
+Letters are small text files, so the timings are of the file system and lookups rather
+than rendering. Many listings share a company, as on real job boards, which flat,
+company-named files silently overwrite.
+"""
+import logging
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from src.configs import CONFIG, DATE
+from src.exportindex import ExportIndex
+from src.jobspicker import JobListing
+from src.letter import CoverLetterContents, RenderedLetter
+
+LETTERS = 20_000
+COMPANIES = 3_000
+BATCH = 500
+
+
+def listings() -> list[JobListing]:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    return [
+        JobListing(
+            **{
+                **fields,
+                "job_url": f"https://example.com/jobs/{i}",
+                "company": f"Company {i % COMPANIES}",
+                "recruiter": f"Recruiter {i % 500}",
+            }
+        )
+        for i in range(LETTERS)
+    ]
+
+
+def flat_letter(job: JobListing) -> RenderedLetter:
+    name = f"{DATE}_{job.company}_Alex"
+    return RenderedLetter(f"{name}.pdf", f"{name}.txt", None, f"Dear {job.recruiter},")
+
+
+def sharded_letter(job: JobListing) -> RenderedLetter:
+    contents = CoverLetterContents(job, CONFIG)
+    return RenderedLetter(
+        contents.pdf_name, contents.txt_name, None, f"Dear {job.recruiter},"
+    )
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    jobs = listings()
+    company = jobs[7].company
+    with tempfile.TemporaryDirectory() as directory:
+        flat, sharded = Path(directory) / "flat", Path(directory) / "sharded"
+
+        start = perf_counter()
+        for job in jobs:
+            flat_letter(job).export(flat)
+        flat_export = perf_counter() - start
+        start = perf_counter()
+        flat_found = [path for path in flat.iterdir() if f"_{company}_" in path.name]
+        flat_lookup = perf_counter() - start
+        flat_files = sum(1 for _ in flat.iterdir())
+
+        start = perf_counter()
+        with ExportIndex(Path(directory) / "index.sqlite") as index:
+            for first in range(0, LETTERS, BATCH):
+                exported = []
+                for job in jobs[first : first + BATCH]:
+                    letter = sharded_letter(job)
+                    letter.export(sharded)
+                    exported.append((job, letter.exported_paths(sharded)))
+                index.add(exported)
+            sharded_export = perf_counter() - start
+            start = perf_counter()
+            sharded_found = index.find(company=company)
+            sharded_lookup = perf_counter() - start
+        shards = list(sharded.iterdir())
+        sharded_files = sum(1 for shard in shards for _ in shard.iterdir())
+        largest = max(sum(1 for _ in shard.iterdir()) for shard in shards)
+
+    print(f"{LETTERS} letters to {COMPANIES} companies")
+    print(f"  flat:    exported in {flat_export:5.2f} s, {flat_files} files kept, "
+          f"{flat_files} in one directory, "
+          f"{len(flat_found)} found for {company} in {flat_lookup * 1000:6.2f} ms")
+    print(f"  sharded: exported in {sharded_export:5.2f} s, {sharded_files} files kept, "
+          f"at most {largest} in a directory, "
+          f"{len(sharded_found)} found for {company} in {sharded_lookup * 1000:6.2f} ms")
+    assert sharded_files == LETTERS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+r"""Measures what key phrase extraction adds to each listing of a batch run.
+
+Run from the repository root with `python -m benchmarks.bench_keyphrases`.
+A batch is first extracted with an empty cache, then again with every description
+cached, as when a run sees the listings reposted from the day before.
+"""
+import logging
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_archive import description
+from src.keyphrases import KeyPhraseCache, add_key_phrases
+
+LISTINGS = 2_000
+KEY_PHRASES = 3
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    jobs = pd.DataFrame(
+        {
+            "title": rng.choice(["Graphic Designer", "Python Developer"], LISTINGS),
+            "description": [description(rng) for _ in range(LISTINGS)],
+        }
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "key_phrases.jsonl"
+        for label in ("cold cache", "warm cache"):
+            start = perf_counter()
+            add_key_phrases(jobs, KeyPhraseCache(path), KEY_PHRASES)
+            elapsed = perf_counter() - start
+            print(f"{label}: {elapsed / LISTINGS * 1e3:.2f} ms/listing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+r"""Measures the logging overhead per letter.
+
+Run from the repository root with `python -m benchmarks.bench_logging`.
+Each simulated letter emits the records the pipeline emits per letter,
+through the queue-based setup in `src.log` and through the same handlers
+attached synchronously, for comparison. Output goes to a temporary
+directory and to in-memory streams rather than the console.
+"""
+import logging
+import logging.config
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from src.log import load_logging_config, logger, setup_logging, stop_logging
+
+LETTERS = 20_000
+
+
+def simulate_letters(letters: int) -> float:
+    """Returns the seconds spent logging for `letters` letters."""
+    start = perf_counter()
+    for i in range(letters):
+        logger.debug("Exported %s.", f"letter_{i}.pdf")
+        logger.info("Rendered letter %d.", i)
+    return perf_counter() - start
+
+
+def benchmark_config(directory: Path) -> dict:
+    """The configured handlers, with the log file and console streams redirected."""
+    log_config = load_logging_config()
+    for handler in log_config["handlers"].values():
+        if "stream" in handler:
+            handler["stream"] = StringIO()
+        if "filename" in handler:
+            handler["filename"] = str(directory / Path(handler["filename"]).name)
+    return log_config
+
+
+def main() -> None:
+    with TemporaryDirectory() as directory:
+        stop_logging()
+        setup_logging(benchmark_config(Path(directory)))
+        queued = simulate_letters(LETTERS)
+        stop_logging()
+
+        logging.config.dictConfig(benchmark_config(Path(directory)))
+        synchronous = simulate_letters(LETTERS)
+        logging.shutdown()
+
+    for name, elapsed in (("queued", queued), ("synchronous", synchronous)):
+        print(f"{name:>12}: {elapsed / LETTERS * 1e6:8.2f} µs per letter")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+r"""Compares the size and render time of PDF letters under each `pdf_profile`.
+
+Run from the repository root with `python -m benchmarks.bench_pdf`.
+Letters are rendered in memory, without the .txt, after a warm-up, so the time is that
+of laying out and writing the PDF. The bytes are those a run would export and sync; the
+breakdown shows where they go, from the lengths of each kind of stream in the file.
+"""
+import re
+from dataclasses import replace
+from time import perf_counter
+
+from src.configs import CONFIG, persona
+from src.coverletterwriter import PDF_PROFILES, CoverLetterPrinter, embedded_fonts
+from src.letter import CoverLetterContents, warm_up
+
+from benchmarks.bench_render import listings
+
+LETTERS = 200
+STREAM = re.compile(rb"<<(.*?)>>\s*stream", re.S)
+LENGTH = re.compile(rb"/Length (\d+)")
+
+
+def stream_bytes(pdf: bytes) -> dict[str, int]:
+    """The bytes of the fonts, images and page contents of `pdf`."""
+    kinds = {"fonts": 0, "images": 0, "pages": 0}
+    for match in STREAM.finditer(pdf):
+        header = match.group(1)
+        length = int(LENGTH.search(header).group(1))
+        if b"/Length1" in header:
+            kinds["fonts"] += length
+        elif b"/Image" in header:
+            kinds["images"] += length
+        else:
+            kinds["pages"] += length
+    return kinds
+
+
+def main() -> None:
+    persona.signature_path = persona.signature_path or "signature.example.png"
+    jobs = listings(LETTERS)
+    print(f"{LETTERS} letters")
+    for profile in PDF_PROFILES:
+        config = replace(CONFIG, pdf_profile=profile)
+        warm_up(config)
+        start = perf_counter()
+        pdfs = [
+            CoverLetterPrinter(config, CoverLetterContents(job, config), with_txt=False)
+            .render()
+            .pdf
+            for job in jobs
+        ]
+        elapsed = (perf_counter() - start) / LETTERS * 1e3
+        size = sum(map(len, pdfs)) / LETTERS
+        kinds = stream_bytes(pdfs[0])
+        other = len(pdfs[0]) - sum(kinds.values())
+        print(
+            f"  {profile:8} {size:8.0f} bytes/letter, {elapsed:5.2f} ms/letter "
+            f"(fonts {kinds['fonts']}, images {kinds['images']}, "
+            f"pages {kinds['pages']}, other {other}; "
+            f"embedded {', '.join(embedded_fonts(pdfs[0]))})"
+        )
+
+
+if __name__ == "__main__":
+    main()
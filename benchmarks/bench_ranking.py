@@ -0,0 +1,47 @@
+r"""Measures how long ranking takes on a large batch of job listings.
+
+Run from the repository root with `python -m benchmarks.bench_ranking`.
+Descriptions are drawn at random from a fixed vocabulary, so that the number
+of distinct terms stays realistic while the number of tokens grows.
+"""
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.ranking import rank_listings
+
+LISTINGS = 100_000
+WORDS_PER_DESCRIPTION = 300
+VOCABULARY = [
+    *"""python design figma engineer product user experience growth data team lead
+    senior manage build ship creative brand motion illustrator research remote the
+    and with for our you will""".split(),
+    *(f"term{i}" for i in range(3000)),
+]
+
+
+def listings(count: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    words = np.array(VOCABULARY)
+    return pd.DataFrame(
+        {
+            "title": rng.choice(["Graphic Designer", "Python Engineer"], count),
+            "description": [
+                " ".join(rng.choice(words, WORDS_PER_DESCRIPTION)) for _ in range(count)
+            ],
+        }
+    )
+
+
+def main() -> None:
+    jobs = listings(LISTINGS)
+    start = perf_counter()
+    rank_listings(jobs, "Graphic Designer figma brand", top_n=100)
+    elapsed = perf_counter() - start
+    tokens = LISTINGS * WORDS_PER_DESCRIPTION
+    print(f"{LISTINGS} listings: {elapsed:.2f} s, {tokens / elapsed / 1e6:.2f} M tokens/s")
+
+
+if __name__ == "__main__":
+    main()
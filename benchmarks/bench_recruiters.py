@@ -0,0 +1,63 @@
+r"""Measures recruiter lookup throughput offline, against a replayed cassette.
+
+Run from the repository root with `python -m benchmarks.bench_recruiters`.
+A cassette is recorded from a local stub, then replayed with simulated latency
+and injected 429s while `find_recruiters` runs on different thread counts.
+The rate limiter starts fast, so the numbers reflect concurrency and backoff
+rather than the configured request rate.
+"""
+import logging
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import httpx
+
+from src import jobspicker, syncgoogle
+from src.cassette import RECORD, REPLAY, Cassette, CassetteTransport
+from src.ratelimit import AdaptiveRateLimiter
+
+QUERIES = 200
+LATENCY = 0.05
+THROTTLE_RATE = 0.05
+THREAD_COUNTS = (1, 4, 8)
+SERP = b"<html><body><h3>Jane Smith - Recruiter - Example Company</h3></body></html>"
+
+
+def record(path: Path, queries: list[str]) -> None:
+    stub = httpx.MockTransport(lambda request: httpx.Response(200, content=SERP))
+    syncgoogle.client = httpx.Client(
+        transport=CassetteTransport(Cassette(path), mode=RECORD, transport=stub)
+    )
+    jobspicker.find_recruiters(queries)
+    syncgoogle.client.close()
+
+
+def replay(path: Path, queries: list[str], threads: int) -> float:
+    """Returns the seconds taken to find a recruiter for every query."""
+    transport = CassetteTransport(
+        Cassette(path), mode=REPLAY, latency=LATENCY, throttle_rate=THROTTLE_RATE
+    )
+    syncgoogle.client = httpx.Client(transport=transport)
+    syncgoogle.limiter = AdaptiveRateLimiter(rate=1000.0, min_rate=50.0, max_rate=1000.0)
+    jobspicker.CONFIG.recruiter_threads = threads
+    start = perf_counter()
+    jobspicker.find_recruiters(queries)
+    return perf_counter() - start
+
+
+def main() -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("jobscraper").setLevel(logging.ERROR)
+    queries = [f"Recruiter at Example Company {i}" for i in range(QUERIES)]
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "cassette.jsonl.gz"
+        syncgoogle.limiter = AdaptiveRateLimiter(rate=1000.0, max_rate=1000.0)
+        record(path, queries)
+        for threads in THREAD_COUNTS:
+            elapsed = replay(path, queries, threads)
+            print(f"{threads:>3} threads: {QUERIES / elapsed:8.1f} lookups/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+r"""Measures how long laying out a PDF letter takes, and what reusing static paragraphs saves.
+
+Run from the repository root with `python -m benchmarks.bench_render`.
+Letters are laid out as one paragraph, as they used to be, and as a paragraph per
+template section, reusing those without per-listing fields. Layout alone, parsing the
+markup and breaking the lines, should fall by about the static share of the template;
+a full render also writes the PDF, which costs the same either way.
+"""
+from time import perf_counter
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+
+from src.configs import CONFIG, FONT_STYLE, persona
+from src.coverletterwriter import CoverLetterPrinter, Paragraph, signature_image
+from src.jobspicker import JobListing
+from src.letter import CoverLetterContents, letter_template, static_sections, warm_up
+
+LETTERS = 200
+FRAME_WIDTH = letter[0] - 2 * inch
+FRAME_HEIGHT = letter[1] - 2 * inch
+
+
+class WholeLetterPrinter(CoverLetterPrinter):
+    """Lays the letter out as one paragraph, re-parsed and re-wrapped for every letter."""
+
+    def format_letter(self):
+        return [
+            Paragraph(
+                self.cover_letter.whole_letter, style=self.stylesheet[FONT_STYLE]
+            ),
+            signature_image(),
+        ]
+
+
+def listings(count: int) -> list[JobListing]:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    return [
+        JobListing(
+            **{
+                **fields,
+                "job_url": f"https://example.com/jobs/{i}",
+                "site": "indeed",
+                "title": f"Graphic Designer {i}",
+                "company": f"Company {i}",
+                "recruiter": f"Recruiter {i}",
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def layout(printer: CoverLetterPrinter) -> None:
+    """Build and wrap the flowables of a letter, as the document does before drawing."""
+    printer.add_styles()
+    printer.cover_letter()
+    for flowable in printer.format_letter():
+        flowable.wrap(FRAME_WIDTH, FRAME_HEIGHT)
+
+
+def per_letter(
+    printer: type[CoverLetterPrinter], jobs: list[JobListing], layout_only: bool
+) -> float:
+    start = perf_counter()
+    for job in jobs:
+        letter_printer = printer(CONFIG, CoverLetterContents(job, CONFIG), with_txt=False)
+        if layout_only:
+            layout(letter_printer)
+        else:
+            letter_printer.render()
+    return (perf_counter() - start) / len(jobs) * 1e3
+
+
+def main() -> None:
+    persona.signature_path = persona.signature_path or "signature.example.png"
+    warm_up(CONFIG)
+    jobs = listings(LETTERS)
+    template = letter_template()
+    static_share = sum(len(template[section]) for section in static_sections()) / sum(
+        map(len, template.values())
+    )
+
+    print(f"{LETTERS} letters, {static_share:.0%} of the template static")
+    for layout_only, label in ((True, "layout"), (False, "full render")):
+        whole = per_letter(WholeLetterPrinter, jobs, layout_only)
+        sectioned = per_letter(CoverLetterPrinter, jobs, layout_only)
+        print(
+            f"  {label}: one paragraph {whole:.2f} ms/letter, per section "
+            f"{sectioned:.2f} ms/letter ({sectioned / whole - 1:+.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
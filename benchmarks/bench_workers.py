@@ -0,0 +1,75 @@
+r"""Measures how long render workers take to start, and how much memory they hold.
+
+Run from the repository root with `python -m benchmarks.bench_workers`.
+Workers that load fonts and styles themselves and workers forked from a preloaded
+parent are each measured in a fresh interpreter, so that one cannot warm up the other.
+Spin-up is the time from creating the pool until every worker can take a letter.
+Memory is read from /proc, so this runs on Linux only: RSS counts pages shared with the
+parent once per worker, PSS splits them between the processes sharing them.
+"""
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import wait
+from dataclasses import replace
+from pathlib import Path
+from time import perf_counter
+
+from src.configs import CONFIG, persona
+from src.letter import PDF
+
+WORKERS = 4
+MODES = {"warm": "warm up in each worker", "preload": "preload in the parent"}
+# Long enough that each worker takes one of the tasks sent to wake the pool.
+SETTLE_SECONDS = 0.2
+
+
+def memory_kb(pid: int) -> dict[str, int]:
+    """The Rss and Pss lines of a process's smaps_rollup, in kB."""
+    lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+    fields = dict(line.split(":", 1) for line in lines if ":" in line)
+    return {name: int(fields[name].split()[0]) for name in ("Rss", "Pss")}
+
+
+def measure(preload: bool) -> dict[str, float]:
+    from src.scheduler import render_process_pool
+
+    persona.signature_path = persona.signature_path or "signature.example.png"
+    config = replace(
+        CONFIG, render_processes=WORKERS, preload_render_workers=preload, output_format=PDF
+    )
+    start = perf_counter()
+    pool = render_process_pool(config)
+    wait([pool.submit(time.sleep, SETTLE_SECONDS) for _ in range(WORKERS)])
+    spin_up = perf_counter() - start - SETTLE_SECONDS
+    workers = [memory_kb(pid) for pid in pool._processes]
+    pool.shutdown()
+    return {
+        "spin_up": spin_up,
+        "rss": sum(worker["Rss"] for worker in workers) / 1024,
+        "pss": sum(worker["Pss"] for worker in workers) / 1024,
+    }
+
+
+def main() -> None:
+    print(f"{WORKERS} workers")
+    for mode, label in MODES.items():
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_workers", mode],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        stats = json.loads(result.stdout.splitlines()[-1])
+        print(
+            f"  {label}: spin-up {stats['spin_up'] * 1e3:6.0f} ms, "
+            f"RSS {stats['rss']:6.1f} MB, PSS {stats['pss']:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(measure(sys.argv[1] == "preload")))
+    else:
+        main()
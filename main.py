@@ -1,27 +1,138 @@
+from argparse import ArgumentParser, Namespace
+from dataclasses import replace
+from pathlib import Path
 from time import perf_counter
+from typing import Iterator
 
-from src.configs import CONFIG
-from src.coverletterwriter import CoverLetterContents, CoverLetterPrinter
-from src.jobspicker import find_jobs
+from src.archive import ListingArchive, compact_listings
+from src.configs import CONFIG, OUTPUT_FORMATS, JobScrapeConfig
+from src.exportindex import ExportIndex
+from src.jobspicker import (
+    JobListing,
+    find_jobs,
+    find_jobs_chunked,
+    find_jobs_within_budget,
+)
+from src.journal import RunJournal
 from src.log import logger
-from tqdm import tqdm
+from src.planner import plan_run
+from src.renderservice import serve
+from src.scheduler import LetterScheduler
+from src.workqueue import SQLiteWorkQueue, publish_batches, run_worker
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last run where it stopped, using its run journal.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run the render service, keeping warm render workers for ad-hoc letters.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Render letters from the work queue at work_queue_path until none are left.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Move the listing stores of past days into the archive at archive_path.",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Estimate the requests, cache hits and time a run would take, from the "
+        "listing store and caches alone, without running it.",
+    )
+    parser.add_argument(
+        "--lookup",
+        metavar="VALUE",
+        help="List the exported letters whose job_url, company or recruiter is VALUE.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="MINUTES",
+        help="Look up and render the listings of highest priority for this many minutes, "
+        "deferring the rest to the next run. Defaults to time_budget_minutes in "
+        "config.json; 0 means no limit.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        help="Which letter files to write. txt skips ReportLab entirely. "
+        "Defaults to output_format in config.json.",
+    )
+    return parser.parse_args()
+
+
+def find_batches(
+    search_term: str, journal: RunJournal, config: JobScrapeConfig
+) -> Iterator[list[JobListing]]:
+    """Yields the job listings by priority within the time budget if there is one,
+    in chunks if chunked mode is on, and otherwise all at once."""
+    if config.time_budget_minutes:
+        yield from find_jobs_within_budget(
+            search_term, journal, config.time_budget_minutes * 60
+        )
+    elif config.chunk_size:
+        yield from find_jobs_chunked(search_term, journal)
+    else:
+        yield find_jobs(search_term, journal)
 
 
 def main() -> None:
     """jobscraper takes the provided querystring, searches for job results,
     and for each of those job results generates a cover letter.
     """
+    args = parse_args()
+    config = CONFIG if args.format is None else replace(CONFIG, output_format=args.format)
+    if args.budget is not None:
+        config = replace(config, time_budget_minutes=args.budget)
+    if args.serve:
+        serve(config)
+        return
+    if args.worker:
+        with SQLiteWorkQueue(config.work_queue_path, config.max_attempts) as queue:
+            run_worker(queue, config)
+        return
+    if args.compact:
+        with ListingArchive(config.archive_path) as archive:
+            compact_listings(Path.cwd() / "joblistings", archive)
+        return
+    if args.lookup:
+        with ExportIndex(config.export_index_path) as index:
+            for letter in index.lookup(args.lookup):
+                files = ", ".join(path for path in (letter["pdf"], letter["txt"]) if path)
+                print(f"{letter['date']}  {letter['company']}  {files}")
+        return
+    if args.plan:
+        search_term = input(
+            "Enter desired search term, e.g. Python, Graphic Designer, Engineer..."
+        )
+        print(plan_run(search_term, config, resume=args.resume))
+        return
     start = perf_counter()
 
     logger.info("Initializing Jobscraper Program...")
-    search_term = input(
-        "Enter desired search term, e.g. Python, Graphic Designer, Engineer..."
-    )
-    all_jobs = find_jobs(search_term)
-    for job in tqdm(all_jobs):
-        letter_contents: CoverLetterContents = CoverLetterContents(job, CONFIG)
-        letter_printer: CoverLetterPrinter = CoverLetterPrinter(CONFIG, letter_contents)
-        letter_printer()
+    with RunJournal(Path(config.journal_path), resume=args.resume) as journal:
+        search_term = journal.search_term or input(
+            "Enter desired search term, e.g. Python, Graphic Designer, Engineer..."
+        )
+        journal.start(search_term)
+        if config.work_queue_path:
+            with SQLiteWorkQueue(config.work_queue_path, config.max_attempts) as queue:
+                publish_batches(
+                    queue, find_batches(search_term, journal, config), journal
+                )
+        else:
+            with LetterScheduler(config) as scheduler:
+                scheduler.run(find_batches(search_term, journal, config), journal)
 
     elapsed = perf_counter() - start
     logger.info("Job search finished in %.3f seconds.", elapsed)
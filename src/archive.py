@@ -0,0 +1,323 @@
+r"Compacts past days' listing stores into one compressed, indexed archive."
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+import pandas as pd
+
+from src.configs import NOW
+from src.diskcache import text_hash
+from src.log import logger
+
+LISTINGS_SUFFIX = "_joblistings.csv"
+DATE_FORMAT = "%B %d, %Y"
+# zlib looks back at most 32 KiB, so a longer dictionary is never used.
+DICTIONARY_SIZE = 32 * 1024
+# How many listings the dictionary is trained on.
+TRAINING_SAMPLE = 2_000
+# The columns stored as indexed table columns; every other column goes in the record.
+INDEXED_COLUMNS = ("job_url", "company")
+SENTENCE_BREAKS = str.maketrans({"\n": ". ", "!": ".", "?": "."})
+
+
+def listing_file_key(path: Path) -> tuple[str, date]:
+    """
+    The search term and date of a listing store, from its file name.
+
+    Raises:
+    - ValueError: If `path` is not named like a listing store.
+    """
+    stem = path.name.removesuffix(LISTINGS_SUFFIX)
+    if stem == path.name or "_" not in stem:
+        raise ValueError(f"{path.name} is not a listing store")
+    term, day = stem.rsplit("_", 1)
+    return term, datetime.strptime(day, DATE_FORMAT).date()
+
+
+def train_dictionary(samples: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Build a zlib preset dictionary from sample texts.
+
+    Sentences shared by several samples, such as benefits and equal-opportunity
+    boilerplate, are what a dictionary saves the most on, so the sentences that recur
+    most, weighted by length, fill the dictionary. zlib encodes nearer matches more
+    cheaply, so the most valuable sentences go last, next to the text being compressed.
+
+    Parameters:
+    - samples (Iterable[str]): Texts like those to be compressed.
+    - size (int): The most bytes the dictionary may hold.
+
+    Returns:
+    - bytes: The dictionary, empty if no sentence recurs.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        sentences = sample.translate(SENTENCE_BREAKS).split(". ")
+        counts.update(
+            {sentence.strip() for sentence in sentences if len(sentence) > 20}
+        )
+    recurring = sorted(
+        (sentence for sentence, count in counts.items() if count > 1),
+        key=lambda sentence: counts[sentence] * len(sentence),
+        reverse=True,
+    )
+    chosen: list[bytes] = []
+    used = 0
+    for sentence in recurring:
+        encoded = sentence.encode() + b". "
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def compress(data: str, dictionary: bytes) -> bytes:
+    compressor = zlib.compressobj(9, zdict=dictionary)
+    return compressor.compress(data.encode()) + compressor.flush()
+
+
+def decompress(data: bytes, dictionary: bytes) -> str:
+    decompressor = zlib.decompressobj(zdict=dictionary)
+    return (decompressor.decompress(data) + decompressor.flush()).decode()
+
+
+class ListingArchive:
+    """
+    Past listing stores, merged into one SQLite file.
+
+    Descriptions and the remaining columns of each listing are stored as texts keyed by
+    their hash, so a description shared by several listings, or a listing reposted day
+    after day, is stored once. Texts are compressed against a dictionary trained on the
+    first listings archived. Listings are indexed by date, search term and company, so
+    a query reads and decompresses only the texts of the listings it matches.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(
+            """CREATE TABLE IF NOT EXISTS dictionary (data BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS texts (
+                hash INTEGER PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS listings (
+                date TEXT NOT NULL,
+                term TEXT NOT NULL,
+                job_url TEXT NOT NULL,
+                company TEXT,
+                description_hash INTEGER,
+                record_hash INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS listings_by_date ON listings (date);
+            CREATE INDEX IF NOT EXISTS listings_by_term ON listings (term, date);
+            CREATE INDEX IF NOT EXISTS listings_by_company
+                ON listings (company, date);"""
+        )
+        row = self.connection.execute("SELECT data FROM dictionary").fetchone()
+        self.dictionary: bytes | None = row[0] if row else None
+
+    def add(self, jobs: pd.DataFrame, term: str, day: date) -> int:
+        """Archive the listings of one listing store, replacing any archived before for
+        the same date and term. Returns how many listings were archived."""
+        jobs = jobs.astype(object).where(jobs.notna(), None)
+        descriptions = (
+            jobs.pop("description")
+            if "description" in jobs
+            else pd.Series(None, index=jobs.index, dtype=object)
+        )
+        records = [
+            json.dumps(
+                {
+                    name: value
+                    for name, value in record.items()
+                    if name not in INDEXED_COLUMNS
+                },
+                default=str,
+            )
+            for record in jobs.to_dict("records")
+        ]
+        if not records:
+            return 0
+        if self.dictionary is None:
+            self.dictionary = train_dictionary(
+                [*descriptions.dropna()[:TRAINING_SAMPLE], *records[:TRAINING_SAMPLE]]
+            )
+            self.connection.execute(
+                "INSERT INTO dictionary VALUES (?)", (self.dictionary,)
+            )
+
+        texts = {text_hash(text): text for text in descriptions if text is not None}
+        description_hashes = [
+            text_hash(text) if text is not None else None for text in descriptions
+        ]
+        record_hashes = [text_hash(record) for record in records]
+        texts.update(zip(record_hashes, records))
+        known = self.known_texts(texts)
+        new_texts = [
+            (h, compress(text, self.dictionary))
+            for h, text in texts.items()
+            if h not in known
+        ]
+
+        urls = jobs.get("job_url", pd.Series("", index=jobs.index))
+        companies = jobs.get("company", pd.Series(None, index=jobs.index))
+        rows = [
+            (day.isoformat(), term, *listing)
+            for listing in zip(urls, companies, description_hashes, record_hashes)
+        ]
+        with self.connection:
+            self.connection.executemany("INSERT INTO texts VALUES (?, ?)", new_texts)
+            self.connection.execute(
+                "DELETE FROM listings WHERE term = ? AND date = ?",
+                (term, day.isoformat()),
+            )
+            self.connection.executemany(
+                "INSERT INTO listings VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        logger.debug(
+            "Archived %d %s listings of %s, %d new texts.",
+            len(records),
+            term,
+            day,
+            len(new_texts),
+        )
+        return len(records)
+
+    def known_texts(self, hashes: Iterable[int]) -> set[int]:
+        """Which of `hashes` already have their text archived."""
+        known: set[int] = set()
+        pending = list(hashes)
+        # SQLite limits how many parameters a statement can take.
+        for start in range(0, len(pending), 500):
+            batch = pending[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                f"SELECT hash FROM texts WHERE hash IN ({placeholders})", batch
+            )
+            known.update(h for (h,) in rows)
+        return known
+
+    def query(
+        self,
+        term: str | None = None,
+        company: str | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        descriptions: bool = True,
+    ) -> pd.DataFrame:
+        """
+        The archived listings matching every criterion given.
+
+        Parameters:
+        - term (str | None): Only listings found searching for this term.
+        - company (str | None): Only listings from this company.
+        - since (date | None): Only listings archived on or after this date.
+        - until (date | None): Only listings archived on or before this date.
+        - descriptions (bool): Whether to read and decompress the descriptions.
+
+        Returns:
+        - pd.DataFrame: One row per listing, with its date and term alongside the
+          columns of the listing store it came from.
+        """
+        conditions, parameters = [], []
+        for clause, value in (
+            ("term = ?", term),
+            ("company = ?", company),
+            ("date >= ?", since and since.isoformat()),
+            ("date <= ?", until and until.isoformat()),
+        ):
+            if value is not None:
+                conditions.append(clause)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS matched AS SELECT * FROM listings LIMIT 0"
+        )
+        with self.connection:
+            self.connection.execute("DELETE FROM matched")
+            self.connection.execute(
+                f"INSERT INTO matched SELECT * FROM listings {where}", parameters
+            )
+        wanted = "SELECT record_hash FROM matched"
+        if descriptions:
+            wanted += " UNION SELECT description_hash FROM matched"
+        dictionary = self.dictionary or b""
+        texts = {
+            h: decompress(data, dictionary)
+            for h, data in self.connection.execute(
+                f"SELECT hash, data FROM texts WHERE hash IN ({wanted})"
+            )
+        }
+        records = {}
+        listings: list[dict[str, Any]] = []
+        for day, listing_term, job_url, listing_company, description, record in (
+            self.connection.execute("SELECT * FROM matched ORDER BY date, term")
+        ):
+            if record not in records:
+                records[record] = json.loads(texts[record])
+            listing = {
+                "date": day,
+                "term": listing_term,
+                "job_url": job_url,
+                "company": listing_company,
+                **records[record],
+            }
+            if descriptions:
+                listing["description"] = texts.get(description)
+            listings.append(listing)
+        return pd.DataFrame(listings)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> ListingArchive:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def compact_listings(
+    directory: str | Path, archive: ListingArchive, remove: bool = True
+) -> list[Path]:
+    """
+    Move the listing stores of past days in `directory` into `archive`.
+
+    Today's stores are left alone, since the current run may still be writing them.
+
+    Parameters:
+    - directory (str | Path): Where the listing stores are.
+    - archive (ListingArchive): The archive to move them into.
+    - remove (bool): Whether to delete each store once it is archived.
+
+    Returns:
+    - list[Path]: The listing stores archived.
+    """
+    compacted = []
+    for path in sorted(Path(directory).glob(f"*{LISTINGS_SUFFIX}")):
+        try:
+            term, day = listing_file_key(path)
+        except ValueError:
+            logger.warning("Skipping %s, not named like a listing store.", path)
+            continue
+        if day >= NOW.date():
+            continue
+        try:
+            jobs = pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            jobs = pd.DataFrame()
+        archive.add(jobs, term, day)
+        if remove:
+            path.unlink()
+        compacted.append(path)
+    logger.info("Compacted %d listing stores into %s.", len(compacted), archive.path)
+    return compacted
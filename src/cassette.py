@@ -0,0 +1,278 @@
+r"Records HTTP traffic to a compressed cassette and replays it, for runs without a network."
+from __future__ import annotations
+
+import atexit
+import base64
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+
+from src.configs import CONFIG, UTF, JobScrapeConfig
+from src.log import logger
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+# Response headers that describe the original transfer rather than the content.
+TRANSFER_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection"}
+)
+
+
+class CassetteMiss(LookupError):
+    """Raised when replaying a request that was never recorded."""
+
+
+def request_key(method: str, url: str | httpx.URL) -> str:
+    """Identify a request by method and URL, with the query parameters in sorted order."""
+    parts = urlsplit(str(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit(parts._replace(query=query, fragment=''))}"
+
+
+class Cassette:
+    """
+    The responses recorded for each request, kept in a gzip-compressed JSON lines file.
+
+    A request recorded several times replays its responses in order, then repeats
+    the last one, so that a run may replay more often than it was recorded.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.responses: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.played: defaultdict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+        self.changed = False
+        if self.path.exists():
+            with gzip.open(self.path, mode="rt", encoding=UTF) as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.responses[entry["key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(map(len, self.responses.values()))
+
+    def add(self, request: httpx.Request, response: httpx.Response) -> None:
+        key = request_key(request.method, request.url)
+        entry = {
+            "key": key,
+            "status": response.status_code,
+            "headers": [
+                [name, value]
+                for name, value in response.headers.items()
+                if name.lower() not in TRANSFER_HEADERS
+            ],
+            "content": base64.b64encode(response.content).decode("ascii"),
+        }
+        with self.lock:
+            self.responses[key].append(entry)
+            self.changed = True
+
+    def play(self, request: httpx.Request) -> httpx.Response:
+        """
+        The next recorded response to `request`.
+
+        :raises CassetteMiss: If `request` was never recorded.
+        """
+        key = request_key(request.method, request.url)
+        with self.lock:
+            entries = self.responses.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for {key}")
+            entry = entries[min(self.played[key], len(entries) - 1)]
+            self.played[key] += 1
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            content=base64.b64decode(entry["content"]),
+            request=request,
+        )
+
+    def save(self) -> None:
+        """Write the cassette atomically, if anything was recorded since the last save."""
+        with self.lock:
+            if not self.changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.path.with_suffix(".tmp")
+            with gzip.open(temporary_path, mode="wt", encoding=UTF) as file:
+                for entries in self.responses.values():
+                    for entry in entries:
+                        file.write(json.dumps(entry) + "\n")
+            os.replace(temporary_path, self.path)
+            self.changed = False
+        logger.debug("Saved %d responses to %s.", len(self), self.path)
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    An httpx transport that records live responses to a cassette, or replays them.
+
+    When replaying, each response can be delayed by `latency` seconds, and a fraction
+    `throttle_rate` of requests answered with a 429 instead, chosen by a seeded generator
+    so that runs are repeatable. Recording goes through `transport`, the live transport.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = REPLAY,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: str | None = None,
+        seed: int = 0,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.transport = transport or (httpx.HTTPTransport() if mode == RECORD else None)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == RECORD:
+            response = self.transport.handle_request(request)
+            response.read()
+            self.cassette.add(request, response)
+            return response
+
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            throttled = self.random.random() < self.throttle_rate
+        if throttled:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return httpx.Response(429, headers=headers, request=request)
+        return self.cassette.play(request)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+        self.cassette.save()
+
+
+def transport_from_config(config: JobScrapeConfig) -> CassetteTransport | None:
+    """
+    The cassette transport configured by `http_cassette_mode`, or None to go live.
+
+    A recording cassette is saved when the interpreter exits.
+    """
+    if config.http_cassette_mode in ("", "off"):
+        return None
+    transport = CassetteTransport(
+        Cassette(config.http_cassette_path),
+        mode=config.http_cassette_mode,
+        latency=config.replay_latency,
+        throttle_rate=config.replay_throttle_rate,
+    )
+    logger.info(
+        "HTTP %s mode, cassette %s.", config.http_cassette_mode, config.http_cassette_path
+    )
+    atexit.register(transport.close)
+    return transport
+
+
+@cache
+def shared_transport() -> CassetteTransport | None:
+    """The transport configured in `CONFIG`, shared by every client so they share a cassette."""
+    return transport_from_config(CONFIG)
+
+
+class SessionResponse:
+    """An httpx response with the `raise_for_status` of a `requests` response."""
+
+    def __init__(self, response: httpx.Response) -> None:
+        self.response = response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.response, name)
+
+    def raise_for_status(self) -> None:
+        if self.response.is_error:
+            raise requests.HTTPError(
+                f"{self.response.status_code} for {self.response.url}", response=self
+            )
+
+
+class CassetteSession:
+    """
+    Stands in for the HTTP sessions jobspy creates, sending through a cassette transport.
+
+    Accepts the keyword arguments jobspy passes to both `tls_client` sessions and
+    `requests.get`; proxies are ignored.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.client = httpx.Client(transport=transport)
+
+    def get(
+        self,
+        url: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        allow_redirects: bool = True,
+        timeout: float | None = None,
+        timeout_seconds: float | None = None,
+        **_: Any,
+    ) -> SessionResponse:
+        response = self.client.get(
+            url,
+            params=params,
+            headers=headers,
+            follow_redirects=allow_redirects,
+            timeout=timeout or timeout_seconds or httpx.USE_CLIENT_DEFAULT,
+        )
+        return SessionResponse(response)
+
+
+@contextmanager
+def jobspy_cassette(transport: httpx.BaseTransport | None) -> Iterator[None]:
+    """
+    Route jobspy's requests through `transport` while the context is active.
+
+    jobspy has no transport option, so the session factories of its Indeed and
+    ZipRecruiter scrapers and the `requests` module of its LinkedIn scraper are
+    swapped for the duration. Does nothing if `transport` is None.
+    """
+    if transport is None:
+        yield
+        return
+    from jobspy.scrapers import indeed, linkedin, ziprecruiter
+
+    session = CassetteSession(transport)
+    patches = [
+        (indeed, "create_session", lambda proxy=None: session),
+        (ziprecruiter, "create_session", lambda proxy=None: session),
+        (
+            linkedin,
+            "requests",
+            SimpleNamespace(get=session.get, HTTPError=requests.HTTPError),
+        ),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, replacement in patches:
+        setattr(module, name, replacement)
+    try:
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
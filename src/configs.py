@@ -1,9 +1,12 @@
 import json
 from dataclasses import dataclass, field
 from datetime import datetime
+from os import environ
 from pathlib import Path
 from typing import Any
 
+from dotenv import load_dotenv
+
 UTF = "utf-8"
 
 NOW = datetime.now()
@@ -16,6 +19,43 @@ FONT_NAMES = [
     "IBMPlexBI",
 ]
 FONT_STYLE = "Main"
+# Which letter files a run writes.
+TXT = "txt"
+PDF = "pdf"
+BOTH = "both"
+OUTPUT_FORMATS = (TXT, PDF, BOTH)
+# How PDFs are written: as ReportLab does by default, or as small as they can be made.
+DEFAULT_PROFILE = "default"
+COMPACT_PROFILE = "compact"
+PDF_PROFILE_NAMES = (DEFAULT_PROFILE, COMPACT_PROFILE)
+ALL_ENVIRON_KEYS = [
+    "NAME",
+    "EMAIL",
+    "PORTFOLIO",
+    "LOCATION",
+    "DESIRED_ROLE",
+    "PHONE",
+    "SIGNATURE_PATH",
+    "CALENDLY",
+]
+
+
+@dataclass
+class ListingFilters:
+    """Declarative criteria a job listing must meet before any recruiter search or letter.
+
+    Listings whose salary, date or remote status is unknown are kept, since
+    many boards leave those fields empty.
+    """
+
+    min_salary: float | None = None
+    max_salary: float | None = None
+    is_remote: bool | None = None
+    locations: list[str] = field(default_factory=list)
+    max_age_days: int | None = None
+    company_blocklist: list[str] = field(default_factory=list)
+    title_patterns: list[str] = field(default_factory=list)
+    title_exclude_patterns: list[str] = field(default_factory=list)
 
 
 @dataclass
@@ -34,6 +74,54 @@ class JobScrapeConfig:
     persona_path: str
     linkedin_credentials_path: str
     job_boards: list[str] = field(default_factory=list)
+    requests_per_second: float = 0.5
+    max_requests_per_second: float = 2.0
+    max_retries: int = 5
+    results_per_page: int = 25
+    journal_path: str = "joblistings/journal.jsonl"
+    chunk_size: int = 0
+    peak_memory_mb: float = 0
+    recruiter_threads: int = 4
+    export_threads: int = 4
+    render_processes: int = 2
+    preload_render_workers: bool = True
+    top_n_listings: int = 0
+    duplicate_threshold: float = 0.8
+    http_cassette_mode: str = "off"
+    http_cassette_path: str = "joblistings/http_cassette.jsonl.gz"
+    replay_latency: float = 0.0
+    replay_throttle_rate: float = 0.0
+    render_service_host: str = "127.0.0.1"
+    render_service_port: int = 8765
+    work_queue_path: str = ""
+    lease_seconds: float = 300
+    max_attempts: int = 3
+    output_format: str = "both"
+    pdf_profile: str = "default"
+    archive_path: str = "joblistings/archive.sqlite"
+    key_phrases: int = 3
+    key_phrase_cache_path: str = "joblistings/key_phrases.jsonl"
+    export_index_path: str = "exports/index.sqlite"
+    recruiter_cache_path: str = "joblistings/recruiters.jsonl"
+    time_budget_minutes: float = 0
+    recency_weight: float = 0.5
+    salary_weight: float = 0.25
+    relevance_weight: float = 0.25
+    filters: ListingFilters = field(default_factory=ListingFilters)
+
+    def __post_init__(self) -> None:
+        if isinstance(self.filters, dict):
+            self.filters = ListingFilters(**self.filters)
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output_format {self.output_format!r}; "
+                f"expected one of {', '.join(OUTPUT_FORMATS)}."
+            )
+        if self.pdf_profile not in PDF_PROFILE_NAMES:
+            raise ValueError(
+                f"Unknown pdf_profile {self.pdf_profile!r}; "
+                f"expected one of {', '.join(PDF_PROFILE_NAMES)}."
+            )
 
 
 def read_config(
@@ -53,4 +141,19 @@ def read_config(
         return JobScrapeConfig(**data)
 
 
+@dataclass(slots=True, repr=False)
+class PersonaConfig:
+    name: str | None
+    email: str | None
+    portfolio: str | None
+    location: str | None
+    desired_role: str | None
+    phone: str | None
+    signature_path: str | None
+    calendly: str | None
+
+
 CONFIG = read_config(Path("src/config.json").resolve())
+
+load_dotenv(Path(CONFIG.persona_path).resolve())
+persona = PersonaConfig(**{key.lower(): environ.get(key) for key in ALL_ENVIRON_KEYS})
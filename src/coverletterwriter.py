@@ -1,130 +1,364 @@
-r"Generates a cover letter"
+r"Generates a cover letter as PDF, using the ReportLab PDF Library."
+import re
+from copy import copy
 from dataclasses import dataclass
-from json import load as json_load
-from os import rename as move_file, environ
+from functools import cache
+from io import BytesIO
 from pathlib import Path
-from dotenv import load_dotenv
+from time import perf_counter
+from typing import BinaryIO
 
 import reportlab.rl_config
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader, _digester
+from reportlab.pdfbase.pdfdoc import (
+    PDFDate,
+    PDFDictionary,
+    PDFImageXObject,
+    PDFInfo,
+    PDFString,
+)
 from reportlab.pdfbase.pdfmetrics import registerFont, registerFontFamily
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Image, Paragraph, SimpleDocTemplate
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
+from PIL import Image as PILImage
 from src.configs import (
-    DATE,
+    COMPACT_PROFILE,
+    DEFAULT_PROFILE,
     FONT_NAMES,
     FONT_STYLE,
     CONFIG,
     JobScrapeConfig,
+    persona,
 )
 from src.jobspicker import JobListing
-from src.striptags import strip_tags
+from src.letter import (
+    CoverLetterContents,
+    RenderedLetter,
+    export_directory,
+    letter_as_txt,
+    static_sections,
+)
+from src.log import logger
 
 reportlab.rl_config.warnOnMissingFontGlyphs = 0  # type: ignore
 
 
-load_dotenv(Path(CONFIG.persona_path).resolve())
-
 CWD = Path.cwd()
-LETTER_FORMAT_PATH = Path(CONFIG.letter_format_path).resolve()
-EOL = "<br />"
-ALL_ENVIRON_KEYS = [
-    "NAME",
-    "EMAIL",
-    "PORTFOLIO",
-    "LOCATION",
-    "DESIRED_ROLE",
-    "PHONE",
-    "SIGNATURE_PATH",
-    "CALENDLY",
-]
-
-
-@dataclass(slots=True, repr=False)
-class PersonaConfig:
-    name: str | None
-    email: str | None
-    portfolio: str | None
-    location: str | None
-    desired_role: str | None
-    phone: str | None
-    signature_path: str | None
-    calendly: str | None
-
-
-persona = PersonaConfig(**{key.lower(): environ.get(key) for key in ALL_ENVIRON_KEYS})
+SECTION_STYLE = "Section"
+# The size the signature is drawn at, in points.
+SIGNATURE_WIDTH, SIGNATURE_HEIGHT = 80, 40
+# The name of an embedded font subset: six capital letters, a plus, the font's name.
+SUBSET_FONT_NAME = re.compile(rb"^[A-Z]{6}\+")
+EMBEDDED_FONT_NAME = re.compile(rb"/FontName\s*/([^\s/<>\[\]()]+)")
 
 
-@dataclass
-class CoverLetterContents:
-    """Generates a cover letter."""
+@dataclass(frozen=True)
+class PdfProfile:
+    """
+    How a letter's PDF is written. The defaults are ReportLab's.
 
-    listing: JobListing
-    config: JobScrapeConfig
+    Attributes:
+    - page_compression (bool | None): Whether to Flate-compress page streams, or None
+      for `reportlab.rl_config.pageCompression`, which compresses them.
+    - ascii85 (bool): Whether to also encode binary streams as ASCII85, which keeps the
+      file printable text at a quarter more bytes per stream.
+    - signature_dpi (int): The resolution to downsample the signature to at the size it
+      is drawn, dropping an alpha channel every pixel of which is opaque and colour
+      channels that are all grey. 0 keeps the image as it is.
+    - letter_font_only (bool): Whether to start pages in the letter's font, rather than
+      Helvetica, which would otherwise be declared in every letter without being used.
+    - trim_metadata (bool): Whether to keep only the title, author and creation date in
+      the document information, rather than also the producer, creator, subject,
+      keywords, modification date and trapping.
+    - verify_subsets (bool): Whether to warn of any font embedded whole rather than as
+      the subset of glyphs the letter uses.
+    """
 
-    @property
-    def signature(self):
-        return Image(
-            filename=CWD / persona.signature_path,
-            width=80,
-            height=40,
-            hAlign="LEFT",
+    page_compression: bool | None = None
+    ascii85: bool = True
+    signature_dpi: int = 0
+    letter_font_only: bool = False
+    trim_metadata: bool = False
+    verify_subsets: bool = False
+
+
+PDF_PROFILES = {
+    DEFAULT_PROFILE: PdfProfile(),
+    COMPACT_PROFILE: PdfProfile(
+        page_compression=True,
+        ascii85=False,
+        signature_dpi=150,
+        letter_font_only=True,
+        trim_metadata=True,
+        verify_subsets=True,
+    ),
+}
+
+
+def compact_image(data: bytes, width: float, height: float, dpi: int) -> bytes:
+    """
+    Re-encode the image in `data` as a PNG of no more pixels than `dpi` calls for at
+    `width` by `height` points, with only the channels it uses.
+
+    Pixels are averaged over the area they shrink from, which keeps the few levels of
+    grey in line art few, where smoother filters add more than the resolution saves.
+    """
+    image = PILImage.open(BytesIO(data)).convert("RGBA")
+    size = (round(width * dpi / 72), round(height * dpi / 72))
+    if image.width > size[0] or image.height > size[1]:
+        image = image.resize(size, PILImage.Resampling.BOX)
+    if image.getchannel("A").getextrema() == (255, 255):
+        image = image.convert("RGB")
+    red, green, blue = (image.getchannel(band).tobytes() for band in "RGB")
+    if red == green == blue:
+        image = image.convert("LA" if image.mode == "RGBA" else "L")
+    output = BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+@cache
+def signature_data(dpi: int = 0) -> bytes:
+    """The signature image, read, and downsampled to `dpi` if given, once per process."""
+    data = (CWD / persona.signature_path).read_bytes()
+    if dpi:
+        data = compact_image(data, SIGNATURE_WIDTH, SIGNATURE_HEIGHT, dpi)
+    return data
+
+
+@cache
+def encoded_signature(dpi: int, ascii85: bool) -> tuple[str, PDFImageXObject]:
+    """
+    The signature as a PDF image, compressed and encoded once per process, and the
+    name `Canvas.drawImage` files it under. Encoding it, in pure Python for ASCII85,
+    costs a fifth of a letter's render.
+    """
+    key = f"signature-{dpi}-{int(ascii85)}"
+    name = _digester(f"{key}auto".encode())
+    use_a85 = reportlab.rl_config.useA85
+    reportlab.rl_config.useA85 = int(ascii85)  # type: ignore
+    try:
+        image = PDFImageXObject(
+            name, ImageReader(BytesIO(signature_data(dpi))), mask="auto"
         )
+    finally:
+        reportlab.rl_config.useA85 = use_a85  # type: ignore
+    image.name = name
+    return key, image
 
-    @property
-    def link_color(self) -> str:
-        return "color='blue'"
 
-    @property
-    def letter_title(self) -> str:
-        return f"{DATE}_{self.listing.company}_{persona.name}.pdf"
+class SignatureImage(Flowable):
+    """
+    The signature, drawn from `encoded_signature` rather than encoded again for every
+    letter. A copy of the encoded image is filed in each document before it is drawn,
+    as `Canvas.drawImage` files an image the first time it sees it, so the canvas finds
+    it there and only draws it. Filing it takes ReportLab internals; should they change,
+    the signature is drawn, and encoded, the usual way instead.
+    """
 
-    @property
-    def subject(self) -> str:
-        return f"{persona.name}'s Cover Letter for {self.listing.company}"
+    def __init__(self, dpi: int = 0) -> None:
+        super().__init__()
+        self.dpi = dpi
+        self.hAlign = "LEFT"
 
-    @property
-    def portfolio(self) -> str:
-        return (
-            f"My portfolio is at <a href={persona.portfolio} {self.link_color}>{persona.portfolio}</a>."
-            if persona.portfolio != ""
-            else "My portfolio is available upon request."
+    def wrap(self, availWidth, availHeight):
+        return SIGNATURE_WIDTH, SIGNATURE_HEIGHT
+
+    def draw(self) -> None:
+        try:
+            image: str | ImageReader = self.file_encoded()
+        except (AttributeError, KeyError, TypeError) as exception:
+            warn_unfiled_signature(repr(exception))
+            image = ImageReader(BytesIO(signature_data(self.dpi)))
+        self.canv.drawImage(
+            image, 0, 0, SIGNATURE_WIDTH, SIGNATURE_HEIGHT, mask="auto"
         )
 
-    def __call__(self) -> None:
-        """The collection of strings and variables that make up the copy of the cover letter."""
-        with open(LETTER_FORMAT_PATH) as letter_format:
-            letter_template: dict[str, str] = json_load(letter_format)
-        letter_as_string: str = EOL.join(
-            f"{value}{EOL}" for value in letter_template.values()
+    def file_encoded(self) -> str:
+        """
+        File a copy of the encoded signature in the canvas's document, unless it's there
+        already, and return the name `Canvas.drawImage` finds it under.
+
+        Every internal is looked up before the document is changed, so a missing one
+        leaves it as it was.
+        """
+        key, encoded = encoded_signature(self.dpi, bool(reportlab.rl_config.useA85))
+        document = self.canv._doc
+        filed = document.idToObject
+        set_xobjects = self.canv._setXObjects
+        reference = document.getXObjectName(encoded.name)
+        if reference in filed:
+            return key
+        mask = getattr(encoded, "_smask", None)
+        mask_reference = None if mask is None else document.getXObjectName(mask.name)
+        image = copy(encoded)
+        set_xobjects(image)
+        document.Reference(image, reference)
+        document.addForm(encoded.name, image)
+        if mask is not None:
+            mask = copy(mask)
+            set_xobjects(mask)
+            image.smask = document.Reference(mask, mask_reference)
+            del image._smask
+        return key
+
+
+@cache
+def warn_unfiled_signature(reason: str) -> None:
+    """Warn, once per process, that the signature is encoded again for every letter."""
+    logger.warning(
+        "The signature can't be reused across letters (%s); encoding it for each.",
+        reason,
+    )
+
+
+def signature_image(dpi: int = 0) -> SignatureImage:
+    return SignatureImage(dpi)
+
+
+def embedded_fonts(pdf: bytes) -> list[str]:
+    """The names of the fonts embedded in `pdf`."""
+    return [name.decode() for name in EMBEDDED_FONT_NAME.findall(pdf)]
+
+
+def whole_fonts(pdf: bytes) -> list[str]:
+    """The fonts embedded in `pdf` whole, rather than as a subset of their glyphs."""
+    return [
+        name for name in embedded_fonts(pdf) if not SUBSET_FONT_NAME.match(name.encode())
+    ]
+
+
+@cache
+def warn_whole_font(name: str) -> None:
+    """Warn, once per process, that `name` is embedded whole in every letter."""
+    logger.warning(
+        "The font %s is embedded whole rather than subset, in every letter.", name
+    )
+
+
+class TrimmedInfo(PDFInfo):
+    """Document information with only the title, author and creation date."""
+
+    def format(self, document):
+        return PDFDictionary(
+            {
+                "Title": PDFString(self.title),
+                "Author": PDFString(self.author),
+                "CreationDate": PDFDate(
+                    ts=document._timeStamp, dateFormatter=self._dateFormatter
+                ),
+            }
+        ).format(document)
+
+
+class TrimmedCanvas(Canvas):
+    """A canvas writing `TrimmedInfo` as its document information."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._doc.info = TrimmedInfo()
+
+
+@cache
+def register_font_family(regular: str, bold: str, italic: str, bolditalic: str) -> None:
+    """Parses the TrueType fonts and registers them as a family, once per process."""
+    registerFont(TTFont(FONT_NAMES[0], CWD / regular))
+    registerFont(TTFont(FONT_NAMES[1], CWD / bold))
+    registerFont(TTFont(FONT_NAMES[2], CWD / italic))
+    registerFont(TTFont(FONT_NAMES[3], CWD / bolditalic))
+    registerFontFamily(
+        FONT_NAMES[0],
+        normal=FONT_NAMES[0],
+        bold=FONT_NAMES[1],
+        italic=FONT_NAMES[2],
+        boldItalic=FONT_NAMES[3],
+    )
+
+
+@cache
+def letter_stylesheet() -> StyleSheet1:
+    """The paragraph styles of the letter, built once per process."""
+    stylesheet = getSampleStyleSheet()
+    stylesheet.add(
+        ParagraphStyle(
+            "Main",
+            parent=stylesheet["Normal"],
+            fontName=FONT_NAMES[0],
+            spaceBefore=16,
+            fontSize=12,
+            leading=20,
+            firstLineIndent=0,
         )
-        self.whole_letter = letter_as_string.format(
-            name=persona.name,
-            date=DATE,
-            recruiter=self.listing.recruiter,
-            company=self.listing.company,
-            job=self.listing.title,
-            job_url=self.listing.job_url,
-            listing_site=self.listing.site,
-            calendly=persona.calendly,
-            link_color=self.link_color,
-            email=persona.email,
-            phone=persona.phone,
-            portfolio=self.portfolio,
+    )
+
+    stylesheet.add(
+        ParagraphStyle(
+            "ListItem",
+            parent=stylesheet[FONT_STYLE],
+            spaceBefore=8,
+            firstLineIndent=16,
+            bulletText="•",
         )
+    )
+
+    stylesheet.add(
+        ParagraphStyle(SECTION_STYLE, parent=stylesheet[FONT_STYLE], spaceBefore=0)
+    )
+    return stylesheet
+
+
+class StaticParagraph(Paragraph):
+    """A Paragraph that keeps its line breaks for each width it was wrapped to, so that
+    copy appearing in every letter is parsed and laid out once and then reused."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.layouts: dict[float, tuple] = {}
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth not in self.layouts:
+            super().wrap(availWidth, availHeight)
+            self.layouts[availWidth] = (self.height, self.blPara, self._wrapWidths)
+        self.width = availWidth
+        self.height, self.blPara, self._wrapWidths = self.layouts[availWidth]
+        return self.width, self.height
+
+
+@cache
+def static_paragraph(copy: str) -> StaticParagraph:
+    """The paragraph of a section with no per-listing fields, built once per process."""
+    return StaticParagraph(copy, style=letter_stylesheet()[SECTION_STYLE])
+
+
+def warm_up_pdf(config: JobScrapeConfig) -> None:
+    """Register the fonts, build the styles and read the signature ahead of the first PDF."""
+    register_font_family(
+        config.font_regular, config.font_bold, config.font_italic, config.font_bolditalic
+    )
+    letter_stylesheet()
+    if persona.signature_path:
+        profile = PDF_PROFILES[config.pdf_profile]
+        encoded_signature(profile.signature_dpi, profile.ascii85)
 
 
 @dataclass
 class CoverLetterPrinter:
     config: JobScrapeConfig
     cover_letter: CoverLetterContents
+    with_txt: bool = True
 
     @property
-    def formatted_letter(self):
+    def profile(self) -> PdfProfile:
+        return PDF_PROFILES[self.config.pdf_profile]
+
+    def formatted_letter(self, output: BinaryIO) -> SimpleDocTemplate:
+        profile = self.profile
         return SimpleDocTemplate(
-            self.cover_letter.letter_title,
+            output,
             pagesize=letter,
             rightMargin=inch,
             leftMargin=inch,
@@ -134,89 +368,91 @@ class CoverLetterPrinter:
             author=persona.name,
             creator=persona.name,
             description=self.cover_letter.subject,
+            pageCompression=profile.page_compression,
+            initialFontName=FONT_NAMES[0] if profile.letter_font_only else None,
         )
 
     @property
     def coverletter_as_txt(self) -> str:
         """This creates the cover letter as a .txt file."""
-        stripped_letter = strip_tags(self.cover_letter.whole_letter)
-        return (
-            stripped_letter.replace(" " * 28, "\n")
-            .replace(" " * 12, "\n\n")
-            .replace(" " * 4, "\n")
-        )
+        return letter_as_txt(self.cover_letter.whole_letter)
 
     def __call__(self):
+        self.render().export(export_directory(self.config))
+
+    def render(self) -> RenderedLetter:
+        """This renders the cover letter in memory, without writing any files."""
+        start = perf_counter()
         self.register_fonts()
         self.add_styles()
-        output_directory = Path(f"exports/{DATE}_exports")
-        output_directory.mkdir(exist_ok=True)
-        letter_txt_path = (
-            output_directory / f"{DATE}_{self.cover_letter.subject}_CoverLetter.txt"
+        pdf = BytesIO()
+        self.write_cover_letter(pdf)
+        return RenderedLetter(
+            pdf_name=self.cover_letter.pdf_name,
+            txt_name=self.cover_letter.txt_name,
+            pdf=pdf.getvalue(),
+            txt=self.coverletter_as_txt if self.with_txt else None,
+            elapsed=perf_counter() - start,
         )
-        self.write_cover_letter()
-        move_file(
-            self.cover_letter.letter_title,
-            output_directory / self.cover_letter.letter_title,
-        )
-        with open(letter_txt_path, "w") as txt_file:
-            txt_file.write(self.coverletter_as_txt)
 
     def register_fonts(self):
         """This registers the fonts for use in the PDF, querying them from the config.json file."""
-        registerFont(TTFont(FONT_NAMES[0], CWD / self.config.font_regular))
-        registerFont(TTFont(FONT_NAMES[1], CWD / self.config.font_bold))
-        registerFont(TTFont(FONT_NAMES[2], CWD / self.config.font_italic))
-        registerFont(TTFont(FONT_NAMES[3], CWD / self.config.font_bolditalic))
-        registerFontFamily(
-            FONT_NAMES[0],
-            normal=FONT_NAMES[0],
-            bold=FONT_NAMES[1],
-            italic=FONT_NAMES[2],
-            boldItalic=FONT_NAMES[3],
+        register_font_family(
+            self.config.font_regular,
+            self.config.font_bold,
+            self.config.font_italic,
+            self.config.font_bolditalic,
         )
 
     def add_styles(self):
         """This registers the styles for use in the PDF."""
-        self.stylesheet = getSampleStyleSheet()
-        self.stylesheet.add(
-            ParagraphStyle(
-                "Main",
-                parent=self.stylesheet["Normal"],
-                fontName=FONT_NAMES[0],
-                spaceBefore=16,
-                fontSize=12,
-                leading=20,
-                firstLineIndent=0,
-            )
-        )
-
-        self.stylesheet.add(
-            ParagraphStyle(
-                "ListItem",
-                parent=self.stylesheet[FONT_STYLE],
-                spaceBefore=8,
-                firstLineIndent=16,
-                bulletText="•",
-            )
-        )
+        self.stylesheet = letter_stylesheet()
 
-    def format_letter(self) -> list[Paragraph | Image]:
-        """format_letter builds the cover letter.
+    def format_letter(self) -> list[Paragraph | Spacer | SignatureImage]:
+        """format_letter builds the cover letter, a paragraph per template section, each
+        a blank line apart. Sections without per-listing fields reuse the paragraph laid
+        out for the first letter.
 
         Returns:
-            list[Paragraph | Image | Any ]: A formatted letter with signature.
+            list[Paragraph | Spacer | SignatureImage]: A formatted letter with signature.
         """
-        main_style = self.stylesheet[FONT_STYLE]
-        return [
-            Paragraph(self.cover_letter.whole_letter, style=main_style),
-            self.cover_letter.signature,
-        ]
+        section_style = self.stylesheet[SECTION_STYLE]
+        static = static_sections()
+        flowables: list[Paragraph | Spacer | SignatureImage] = []
+        for section, copy in self.cover_letter.paragraphs.items():
+            if flowables:
+                flowables.append(Spacer(0, section_style.leading))
+            flowables.append(
+                static_paragraph(copy)
+                if section in static
+                else Paragraph(copy, style=section_style)
+            )
+        flowables.append(signature_image(self.profile.signature_dpi))
+        return flowables
 
-    def write_cover_letter(self) -> None:
+    def write_cover_letter(self, output: BinaryIO) -> None:
         """
         This creates the cover letter as .pdf using the ReportLab PDF Library.
         """
+        profile = self.profile
         self.cover_letter()
         paragraphs = self.format_letter()
-        self.formatted_letter.build(paragraphs)
+        # ReportLab only reads this setting globally, so it is set for this build alone.
+        use_a85 = reportlab.rl_config.useA85
+        reportlab.rl_config.useA85 = int(profile.ascii85)  # type: ignore
+        try:
+            self.formatted_letter(output).build(
+                paragraphs, canvasmaker=TrimmedCanvas if profile.trim_metadata else Canvas
+            )
+        finally:
+            reportlab.rl_config.useA85 = use_a85  # type: ignore
+        if profile.verify_subsets:
+            for name in whole_fonts(output.getvalue()):
+                warn_whole_font(name)
+
+
+def render_pdf(listing: JobListing, with_txt: bool = True) -> RenderedLetter:
+    """Renders the cover letter for `listing` as .pdf, and as .txt if `with_txt`."""
+    return CoverLetterPrinter(
+        CONFIG, CoverLetterContents(listing, CONFIG), with_txt=with_txt
+    ).render()
@@ -0,0 +1,223 @@
+r"Finds job listings cross-posted on several boards, with MinHash and locality-sensitive hashing."
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from src.filters import column
+from src.log import logger
+from src.ranking import BLOCK_SIZE, tokenize
+
+# Listings are compared as sets of overlapping runs of this many words.
+SHINGLE_SIZE = 3
+# Signature length, split into bands of rows. Two listings become candidates if all rows
+# of any band agree, which is likely above a Jaccard similarity of (1 / BANDS) ** (1 / ROWS),
+# about 0.5; candidates are then checked against the configured threshold.
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+# Each shingle hash picks its signature entry with the top bits, and competes on the rest.
+BIN_BITS = 6
+VALUE_BITS = 64 - BIN_BITS
+EMPTY = np.iinfo(np.uint64).max
+MIX = np.uint64(0x9E3779B97F4A7C15)
+SALT = np.uint64(0x2545F4914F6CDD1D)
+
+
+def shingles(
+    document_ids: np.ndarray, token_hashes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Hash every run of `SHINGLE_SIZE` consecutive tokens within a document.
+
+    Parameters:
+    - document_ids (np.ndarray): The document of each token, in order.
+    - token_hashes (np.ndarray): The hash of each token.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: The document and hash of each shingle, by document.
+      Documents shorter than a shingle use their single tokens instead.
+    """
+    runs = len(token_hashes) - SHINGLE_SIZE + 1
+    documents = np.empty(0, dtype=document_ids.dtype)
+    hashes = np.empty(0, dtype=np.uint64)
+    if runs > 0:
+        within = document_ids[:runs] == document_ids[SHINGLE_SIZE - 1 :]
+        combined = token_hashes[:runs].copy()
+        for offset in range(1, SHINGLE_SIZE):
+            combined = combined * MIX + token_hashes[offset : offset + runs]
+        documents, hashes = document_ids[:runs][within], combined[within]
+    short = ~np.isin(document_ids, documents)
+    if short.any():
+        documents = np.concatenate([documents, document_ids[short]])
+        hashes = np.concatenate([hashes, token_hashes[short]])
+        order = np.argsort(documents, kind="stable")
+        documents, hashes = documents[order], hashes[order]
+    return documents, hashes
+
+
+def minhash_signatures(texts: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the MinHash signature of every text.
+
+    Parameters:
+    - texts (pd.Series): The documents, NaN allowed.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: The signatures, one row of `SIGNATURE_SIZE` per
+      text, and whether each text had any words to hash.
+
+    Rather than hashing every shingle once per signature entry, shingles are hashed once
+    and split into `SIGNATURE_SIZE` bins, keeping the least hash of each bin (one
+    permutation hashing). A bin left empty borrows the next filled bin's value, offset by
+    the distance, so that short texts still get comparable signatures (densification).
+    """
+    signatures = np.full((len(texts), SIGNATURE_SIZE), EMPTY, dtype=np.uint64)
+    for start in range(0, len(texts), BLOCK_SIZE):
+        document_ids, codes, uniques = tokenize(texts.iloc[start : start + BLOCK_SIZE])
+        token_hashes = np.fromiter(
+            (zlib.crc32(token.encode()) for token in uniques),
+            dtype=np.uint64,
+            count=len(uniques),
+        )
+        documents, hashes = shingles(document_ids, token_hashes[codes])
+        hashes = hashes * MIX + SALT
+        hashes ^= hashes >> np.uint64(29)
+        block = signatures[start : start + BLOCK_SIZE].reshape(-1)
+        np.minimum.at(
+            block,
+            documents * SIGNATURE_SIZE + (hashes >> np.uint64(VALUE_BITS)).astype(np.intp),
+            hashes & np.uint64((1 << VALUE_BITS) - 1),
+        )
+    return densify(signatures)
+
+
+def densify(signatures: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fill the empty bins of `signatures` from the next filled bin, circularly."""
+    filled = signatures != EMPTY
+    hashed = filled.any(axis=1)
+    if filled[hashed].all():
+        return signatures, hashed
+    bins = np.arange(2 * SIGNATURE_SIZE)
+    positions = np.where(np.tile(filled, 2), bins, 2 * SIGNATURE_SIZE)
+    following = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1]
+    following = following[:, :SIGNATURE_SIZE]
+    borrowed = np.take_along_axis(signatures, following % SIGNATURE_SIZE, axis=1)
+    distance = (following - bins[:SIGNATURE_SIZE]).astype(np.uint64)
+    borrowed += distance << np.uint64(VALUE_BITS)
+    empty = ~filled & hashed[:, np.newaxis]
+    signatures[empty] = borrowed[empty]
+    return signatures, hashed
+
+
+def candidate_pairs(signatures: np.ndarray) -> np.ndarray:
+    """
+    Pair up the signatures agreeing on every row of at least one band.
+
+    Returns:
+    - np.ndarray: Distinct pairs of row positions, one pair per line. Each row is paired
+      with the first row sharing its band, so a bucket of k rows gives k - 1 pairs.
+    """
+    pairs = []
+    for band in range(BANDS):
+        rows = signatures[:, band * ROWS : (band + 1) * ROWS]
+        keys = rows[:, 0].copy()
+        for row in range(1, ROWS):
+            keys = keys * MIX + rows[:, row]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        leaders = order[np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+        members = leaders != order
+        pairs.append(np.column_stack([leaders[members], order[members]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def connected_components(size: int, pairs: np.ndarray) -> np.ndarray:
+    """Label each of `size` nodes with the smallest node it is connected to by `pairs`."""
+    labels = np.arange(size)
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, lowest)
+        np.minimum.at(updated, right, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def near_duplicate_clusters(texts: pd.Series, threshold: float) -> np.ndarray:
+    """
+    Cluster texts whose estimated Jaccard similarity is at least `threshold`.
+
+    Parameters:
+    - texts (pd.Series): The documents to cluster.
+    - threshold (float): The least similarity, in [0, 1], linking two documents.
+
+    Returns:
+    - np.ndarray: The cluster of each text, as the position of its first member.
+
+    Only pairs colliding in some LSH band are compared, so the work grows with the number
+    of texts and of near-duplicates, not with the number of pairs of texts.
+    Texts without any words are never clustered.
+    """
+    signatures, hashed = minhash_signatures(texts)
+    pairs = candidate_pairs(signatures)
+    pairs = pairs[hashed[pairs[:, 0]] & hashed[pairs[:, 1]]]
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    return connected_components(len(texts), pairs[similarity >= threshold])
+
+
+def drop_near_duplicates(jobs: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Keep one job listing of each cluster of near-duplicate postings.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings with `title`, `company` and `description` columns.
+    - threshold (float): The least similarity, in [0, 1], for two listings to be duplicates.
+
+    Returns:
+    - pd.DataFrame: The representative listings, in their original order and index.
+      A representative whose recruiter is already known is preferred, then the first.
+    """
+    if len(jobs) < 2:
+        return jobs
+    texts = (
+        column(jobs, "title").fillna("").astype(str)
+        + " "
+        + column(jobs, "company").fillna("").astype(str)
+        + " "
+        + column(jobs, "description").fillna("").astype(str)
+    )
+    clusters = near_duplicate_clusters(texts, threshold)
+    known = column(jobs, "recruiter").notna().to_numpy()
+    order = np.lexsort((np.arange(len(jobs)), ~known, clusters))
+    sorted_clusters = clusters[order]
+    representatives = np.sort(
+        order[np.r_[True, sorted_clusters[1:] != sorted_clusters[:-1]]]
+    )
+    if len(representatives) == len(jobs):
+        return jobs
+
+    sizes = np.bincount(clusters, minlength=len(jobs))
+    dropped = np.ones(len(jobs), dtype=bool)
+    dropped[representatives] = False
+    searches = int((dropped & ~known).sum())
+    letters = int(dropped.sum())
+    logger.info(
+        "Found %d clusters of near-duplicate listings; keeping %d of %d listings.",
+        int((sizes > 1).sum()),
+        len(representatives),
+        len(jobs),
+    )
+    logger.info(
+        "Skipping %d stages: %d recruiter searches and %d letters.",
+        searches + letters,
+        searches,
+        letters,
+    )
+    return jobs.iloc[representatives]
@@ -0,0 +1,62 @@
+r"A dictionary kept in a JSON lines file across runs, for results costly to redo."
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from src.configs import UTF
+
+
+def text_hash(text: str) -> int:
+    """A 64-bit hash of `text`, which SQLite stores as a plain integer."""
+    return int.from_bytes(
+        hashlib.blake2b(text.encode(), digest_size=8).digest(), "big", signed=True
+    )
+
+
+class JsonLinesCache:
+    """
+    Values by string key, loaded from a JSON lines file and appended to it as they are
+    added, so a key computed in an earlier run is not computed again.
+
+    A line torn by a crash mid-write is skipped on loading; a key added twice keeps its
+    latest value. Updates are thread-safe.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.values: dict[str, Any] = {}
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, encoding=UTF) as file:
+                for line in file:
+                    try:
+                        self.values.update(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write.
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    def update(self, values: dict[str, Any]) -> None:
+        """Add `values` and append them to the file."""
+        if not values:
+            return
+        lines = "".join(json.dumps({key: value}) + "\n" for key, value in values.items())
+        with self.lock:
+            self.values.update(values)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, mode="a", encoding=UTF) as file:
+                file.write(lines)
@@ -0,0 +1,111 @@
+r"An index of exported cover letters, to find them by listing, company or recruiter."
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from src.configs import NOW
+from src.jobspicker import JobListing
+from src.log import logger
+
+INDEXED_FIELDS = ("job_url", "company", "recruiter")
+
+
+class ExportIndex:
+    """
+    The paths of exported letters, by the job_url, company and recruiter of their
+    listing, in a SQLite file.
+
+    Letters are added a batch at a time, in one transaction, so keeping the index costs a
+    write per batch rather than per letter. A listing exported again keeps only its
+    latest paths. Several processes on one host may share the file, and several
+    threads one instance.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            """CREATE TABLE IF NOT EXISTS letters (
+                job_url TEXT PRIMARY KEY,
+                company TEXT,
+                recruiter TEXT,
+                date TEXT NOT NULL,
+                pdf TEXT,
+                txt TEXT
+            );
+            CREATE INDEX IF NOT EXISTS letters_by_company ON letters (company);
+            CREATE INDEX IF NOT EXISTS letters_by_recruiter ON letters (recruiter);"""
+        )
+
+    def add(self, letters: Iterable[tuple[JobListing, dict[str, Any]]]) -> int:
+        """
+        Index exported letters, replacing any indexed before for the same listings.
+
+        Parameters:
+        - letters (Iterable[tuple[JobListing, dict[str, Any]]]): Each letter's listing,
+          and the paths it was exported to, as `RenderedLetter.exported_paths` gives them.
+
+        Returns:
+        - int: How many letters were indexed.
+        """
+        day = NOW.date().isoformat()
+        rows = [
+            (
+                *(getattr(listing, name) for name in INDEXED_FIELDS),
+                day,
+                paths["pdf"],
+                paths["txt"],
+            )
+            for listing, paths in letters
+        ]
+        if not rows:
+            return 0
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO letters VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        logger.debug("Indexed %d exported letters.", len(rows))
+        return len(rows)
+
+    def find(
+        self,
+        job_url: str | None = None,
+        company: str | None = None,
+        recruiter: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """The indexed letters matching every criterion given, newest first."""
+        criteria = {"job_url": job_url, "company": company, "recruiter": recruiter}
+        given = {name: value for name, value in criteria.items() if value is not None}
+        where = " AND ".join(f"{name} = ?" for name in given) or "1"
+        with self.lock:
+            cursor = self.connection.execute(
+                f"SELECT * FROM letters WHERE {where} ORDER BY date DESC, rowid DESC",
+                tuple(given.values()),
+            )
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor]
+
+    def lookup(self, value: str) -> list[dict[str, Any]]:
+        """The indexed letters whose job_url, company or recruiter is `value`."""
+        letters = {}
+        for name in INDEXED_FIELDS:
+            for letter in self.find(**{name: value}):
+                letters.setdefault(letter["job_url"], letter)
+        return list(letters.values())
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> ExportIndex:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
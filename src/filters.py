@@ -0,0 +1,121 @@
+r"Drops job listings we would never apply to, before any network or render work."
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.configs import NOW, ListingFilters
+from src.log import logger
+
+# How many of each jobspy compensation interval make up a year.
+ANNUAL_MULTIPLIERS = {
+    "yearly": 1,
+    "monthly": 12,
+    "weekly": 52,
+    "daily": 260,
+    "hourly": 2080,
+}
+
+
+def column(jobs: pd.DataFrame, name: str) -> pd.Series:
+    """The column `name` of `jobs`, or an empty column if the board did not provide it."""
+    if name in jobs:
+        return jobs[name]
+    return pd.Series(np.nan, index=jobs.index, dtype=object)
+
+
+def annual_salaries(jobs: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Annualize the salary range of every listing.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings with `min_amount`, `max_amount` and `interval` columns.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: The yearly minimum and maximum of each listing,
+      NaN where unknown. A listing with only one bound uses it for both.
+    """
+    multipliers = (
+        column(jobs, "interval").map(ANNUAL_MULTIPLIERS).to_numpy(dtype=float)
+    )
+    low = pd.to_numeric(column(jobs, "min_amount"), errors="coerce").to_numpy(float)
+    high = pd.to_numeric(column(jobs, "max_amount"), errors="coerce").to_numpy(float)
+    low, high = np.where(np.isnan(low), high, low), np.where(np.isnan(high), low, high)
+    return low * multipliers, high * multipliers
+
+
+def matches_any(values: pd.Series, patterns: list[str]) -> np.ndarray:
+    """Whether each of `values` matches any of the case-insensitive regexes in `patterns`."""
+    pattern = "(?i)" + "|".join(f"(?:{pattern})" for pattern in patterns)
+    with warnings.catch_warnings():
+        # Patterns with groups are fine here; we only test for a match.
+        warnings.simplefilter("ignore", UserWarning)
+        found = values.astype("string").str.contains(pattern, regex=True)
+    return found.fillna(False).to_numpy(dtype=bool)
+
+
+def filter_listings(jobs: pd.DataFrame, filters: ListingFilters) -> pd.DataFrame:
+    """
+    Keep only the job listings meeting every criterion in `filters`.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings, as scraped.
+    - filters (ListingFilters): The criteria, from `JobScrapeConfig.filters`.
+
+    Returns:
+    - pd.DataFrame: The listings meeting every criterion, with their original index.
+
+    Every criterion is evaluated on whole columns at once, and combined into one mask,
+    so the cost does not depend on how many criteria are configured per row.
+    """
+    if jobs.empty:
+        return jobs
+    masks: dict[str, np.ndarray] = {}
+
+    if filters.min_salary is not None or filters.max_salary is not None:
+        low, high = annual_salaries(jobs)
+        known = ~np.isnan(low)
+        in_range = np.ones(len(jobs), dtype=bool)
+        if filters.min_salary is not None:
+            in_range &= high >= filters.min_salary
+        if filters.max_salary is not None:
+            in_range &= low <= filters.max_salary
+        masks["salary"] = ~known | in_range
+
+    if filters.is_remote is not None:
+        remote = column(jobs, "is_remote").map(
+            {True: True, False: False, "True": True, "False": False}
+        )
+        masks["remote"] = (remote.isna() | (remote == filters.is_remote)).to_numpy(
+            dtype=bool
+        )
+
+    if filters.locations:
+        masks["location"] = matches_any(column(jobs, "location"), filters.locations)
+
+    if filters.max_age_days is not None:
+        posted = pd.to_datetime(column(jobs, "date_posted"), errors="coerce")
+        age = (pd.Timestamp(NOW) - posted).dt.days
+        masks["date_posted"] = (age.isna() | (age <= filters.max_age_days)).to_numpy(
+            dtype=bool
+        )
+
+    if filters.company_blocklist:
+        blocklist = {company.casefold() for company in filters.company_blocklist}
+        companies = column(jobs, "company").astype("string").str.strip().str.casefold()
+        masks["company"] = ~companies.isin(blocklist).to_numpy(dtype=bool)
+
+    if filters.title_patterns:
+        masks["title"] = matches_any(column(jobs, "title"), filters.title_patterns)
+    if filters.title_exclude_patterns:
+        masks["title_exclude"] = ~matches_any(
+            column(jobs, "title"), filters.title_exclude_patterns
+        )
+
+    if not masks:
+        return jobs
+    keep = np.logical_and.reduce(list(masks.values()))
+    for name, mask in masks.items():
+        logger.debug("Filter %s drops %d listings.", name, int((~mask).sum()))
+    logger.info("Filters kept %d of %d listings.", int(keep.sum()), len(jobs))
+    return jobs[keep]
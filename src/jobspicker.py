@@ -1,21 +1,39 @@
 from __future__ import annotations
-from os import environ
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import environ, replace as replace_file
 from pathlib import Path
 from dotenv import load_dotenv
 
-from dataclasses import dataclass, fields
-from typing import Any
+import json
+from dataclasses import asdict, dataclass, fields
+from functools import cache, partial
+from time import monotonic
+from typing import Any, Iterator
 import pandas as pd
-from jobspy import scrape_jobs
-from src.syncgoogle import lucky
-from src.configs import DATE, CONFIG
+from src.syncgoogle import NO_RECRUITER, lucky
+from src.configs import DATE, CONFIG, persona
+from src.dedupe import drop_near_duplicates
+from src.diskcache import JsonLinesCache
+from src.filters import filter_listings
+from src.journal import RECRUITER, SCRAPED, RunJournal
+from src.keyphrases import KeyPhraseCache, add_key_phrases
 from src.log import logger
+from src.priority import ListingQueue, priority_scores
+from src.ranking import rank_listings
+from src.scrapedriver import clear_checkpoints, has_pending_scrape, scrape_all_boards
 
 
 load_dotenv(Path(CONFIG.linkedin_credentials_path).resolve())
 HOME_URL = "https://www.linkedin.com/"
 KEY = environ.get("SESSION_KEY")
 PASSWORD = environ.get("SESSION_PASSWORD")
+# How many times over a listing is held in memory while it is processed.
+MEMORY_OVERHEAD = 4
+# The columns added to the listing store by recruiter searches.
+RECRUITER_COLUMNS = ("queries_in_use", "recruiter")
+# How many listings a time-budgeted run looks up and renders at a time. Small batches
+# keep the most urgent listings first and the overrun past the budget short.
+PRIORITY_BATCH_SIZE = 50
 
 
 @dataclass
@@ -40,40 +58,308 @@ class JobListing:
     description: Any
     vanity_urls: str
     recruiter: str
+    key_phrases: list[str] | None = None
 
+    def to_json(self) -> str:
+        """The listing as JSON, for sending to render workers on other processes or hosts."""
+        return json.dumps(asdict(self), default=str)
 
-def find_jobs(search_term: str) -> list[JobListing]:
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> JobListing:
+        """
+        Build a JobListing from a decoded JSON payload. Missing fields are None.
+
+        Raises:
+        - TypeError: If the payload has fields a JobListing does not.
+        """
+        names = [field.name for field in fields(cls)]
+        unknown = payload.keys() - set(names)
+        if unknown:
+            raise TypeError(f"Unknown JobListing fields: {', '.join(sorted(unknown))}")
+        return cls(**{name: payload.get(name) for name in names})
+
+
+def listings_path(search_term: str) -> Path:
+    """The listing store for `search_term` on today's date."""
+    return Path.cwd() / "joblistings" / f"{search_term}_{DATE}_joblistings.csv"
+
+
+def deferred_path(search_term: str) -> Path:
+    """The listings for `search_term` that an earlier run ran out of time for."""
+    return Path.cwd() / "joblistings" / f"{search_term}_deferred.csv"
+
+
+def find_jobs(search_term: str, journal: RunJournal | None = None) -> list[JobListing]:
     """
     Find job listings, search for recruiters, and compile job listings with hiring manager information.
 
+    Parameters:
+    - search_term (str): The search term passed to the job boards.
+    - journal (RunJournal | None): If given, completed stages are recorded to it,
+      and recruiters it already holds are reused instead of searched again.
+
     Returns:
     - List[JobListing]: A list of JobListing instances with hiring manager information.
 
-    This function retrieves job listings using the 'pick_jobs' function. If the job listings
-    already contain hiring manager information, it proceeds to compile the JobListing instances.
-    Otherwise, it searches for recruiters using the 'get_recruiter_queries' and
-    'find_vanity_urls' functions, adds hiring manager information to the job listings DataFrame,
-    and then compiles the JobListing instances.
+    This function retrieves job listings using the 'pick_jobs' function, and keeps only those
+    chosen by 'select_listings', in order of 'prioritize'. If the selected job listings already contain hiring manager
+    information, it proceeds to compile the JobListing instances. Otherwise, it searches for the
+    missing recruiters using the 'add_recruiters' function, saves the job listings DataFrame with
+    hiring manager information, and then compiles the JobListing instances.
     """
-    output_path: Path = (
-        Path.cwd() / "joblistings" / f"{search_term}_{DATE}_joblistings.csv"
-    )
+    output_path = listings_path(search_term)
+    jobs = pick_jobs(search_term, output_path)
+    if journal is not None and not jobs.empty:
+        journal.record_many(jobs["job_url"].to_list(), SCRAPED)
+    selected = prioritize(select_listings(jobs, search_term), search_term)
+    resolved = add_recruiters(selected, search_term, journal)
+    if resolved is not selected:
+        update_recruiters(jobs, resolved).to_csv(output_path, index=False)
+    logger.info("Writing letters...")
+    return compile_jobs(personalize(resolved))
+
+
+def find_jobs_chunked(
+    search_term: str, journal: RunJournal | None = None
+) -> Iterator[list[JobListing]]:
+    """
+    Like 'find_jobs', but yields the job listings one chunk at a time.
+
+    Parameters:
+    - search_term (str): The search term passed to the job boards.
+    - journal (RunJournal | None): As in 'find_jobs'.
+
+    Yields:
+    - List[JobListing]: The JobListing instances of one chunk of the listing store.
+
+    Each chunk goes through recruiter lookup and compilation, in order of 'prioritize',
+    and is handed to the caller for rendering, before the next chunk is read, so memory use is bounded by the chunk
+    size rather than the size of the listing store. Chunks are copied to a partial file,
+    which replaces the listing store once every chunk is done if any recruiters were found.
+    """
+    output_path = listings_path(search_term)
+    partial_path = output_path.with_suffix(".partial.csv")
+    partial_path.unlink(missing_ok=True)
+    searched = False
+    for jobs in pick_job_chunks(search_term, output_path):
+        if journal is not None:
+            journal.record_many(jobs["job_url"].to_list(), SCRAPED)
+        selected = prioritize(select_listings(jobs, search_term), search_term)
+        resolved = add_recruiters(selected, search_term, journal)
+        if resolved is not selected:
+            jobs = update_recruiters(jobs, resolved)
+            searched = True
+        jobs.to_csv(
+            partial_path, mode="a", header=not partial_path.exists(), index=False
+        )
+        yield compile_jobs(personalize(resolved))
+    if searched:
+        replace_file(partial_path, output_path)
+    else:
+        partial_path.unlink(missing_ok=True)
+
+
+def find_jobs_within_budget(
+    search_term: str, journal: RunJournal | None, budget_seconds: float
+) -> Iterator[list[JobListing]]:
+    """
+    Like 'find_jobs', but yields the job listings of highest priority first, in batches,
+    for as long as `budget_seconds` allows, and defers the rest to the next run.
+
+    Parameters:
+    - search_term (str): The search term passed to the job boards.
+    - journal (RunJournal | None): As in 'find_jobs'.
+    - budget_seconds (float): How long batches may be started for, counted from when
+      the listings are selected, so scraping the job boards never uses it up.
+
+    Yields:
+    - List[JobListing]: Up to `PRIORITY_BATCH_SIZE` listings, with recruiters.
+
+    The selected listings, and those deferred for `search_term` by the last run, go into
+    a 'ListingQueue'. Batches are popped from it, looked up and handed to the caller for
+    rendering until the budget runs out; a batch started in time is always finished.
+    The listings left in the queue are saved to 'deferred_path' for the next run, where
+    their priority is computed afresh.
+    """
+    output_path = listings_path(search_term)
     jobs = pick_jobs(search_term, output_path)
-    if "recruiter" in jobs:
-        logger.info("Writing letters...")
-        return compile_jobs(jobs)
+    if journal is not None and not jobs.empty:
+        journal.record_many(jobs["job_url"].to_list(), SCRAPED)
+    candidates = select_listings(jobs, search_term)
+    try:
+        deferred = pd.read_csv(deferred_path(search_term))
+    except FileNotFoundError:
+        deferred = pd.DataFrame()
+    if not deferred.empty:
+        deferred = deferred[~deferred["job_url"].isin(column_or_empty(jobs, "job_url"))]
+        # Labels past the listing store's, so deferred listings are never saved into it.
+        deferred.index = pd.RangeIndex(len(jobs), len(jobs) + len(deferred))
+        candidates = pd.concat([candidates, select_listings(deferred, search_term)])
+
+    queue = ListingQueue()
+    queue.push(prioritize(candidates, search_term))
+    deadline = monotonic() + budget_seconds
+    resolved_batches = []
+    while queue and monotonic() < deadline:
+        batch = queue.pop(PRIORITY_BATCH_SIZE)
+        resolved = add_recruiters(batch, search_term, journal)
+        if resolved is not batch:
+            resolved_batches.append(resolved)
+        yield compile_jobs(personalize(resolved))
+
+    if resolved_batches:
+        resolved = pd.concat(resolved_batches)
+        resolved = resolved.loc[resolved.index.intersection(jobs.index)]
+        update_recruiters(jobs, resolved).to_csv(output_path, index=False)
+    remaining = queue.drain().drop(columns=["priority", "relevance"], errors="ignore")
+    if remaining.empty:
+        deferred_path(search_term).unlink(missing_ok=True)
+    else:
+        logger.info(
+            "Out of time; deferring %d listings to the next run.", len(remaining)
+        )
+        remaining.to_csv(deferred_path(search_term), index=False)
+
+
+def select_listings(jobs: pd.DataFrame, search_term: str) -> pd.DataFrame:
+    """
+    Select the job listings worth a recruiter search and a letter.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings, as read from the listing store.
+    - search_term (str): The search term passed to the job boards.
+
+    Returns:
+    - pd.DataFrame: The listings passing `CONFIG.filters`, with their original index.
+      Of postings whose title, company and description are at least
+      `CONFIG.duplicate_threshold` similar, only one is kept; 0 keeps them all.
+      If `CONFIG.top_n_listings` is set, only that many are kept, the most relevant
+      to the desired role and search term first. In chunked mode, both apply per chunk.
+    """
+    selected = filter_listings(jobs, CONFIG.filters)
+    if CONFIG.duplicate_threshold > 0:
+        selected = drop_near_duplicates(selected, CONFIG.duplicate_threshold)
+    if CONFIG.top_n_listings > 0:
+        selected = rank_listings(
+            selected, search_profile(search_term), CONFIG.top_n_listings
+        )
+    return selected
+
+
+def search_profile(search_term: str) -> str:
+    """What the applicant is looking for, to score listings' relevance against."""
+    return f"{persona.desired_role or ''} {search_term}"
+
+
+def prioritize(jobs: pd.DataFrame, search_term: str) -> pd.DataFrame:
+    """
+    Order job listings by 'priority_scores', so that recruiter lookups and letters go
+    to the freshest, best paid and most relevant listings first.
+
+    Returns:
+    - pd.DataFrame: `jobs`, highest priority first, with a `priority` column.
+    """
+    if jobs.empty:
+        return jobs
+    scores = priority_scores(jobs, search_profile(search_term), CONFIG)
+    return jobs.assign(priority=scores).sort_values(
+        "priority", ascending=False, kind="stable"
+    )
+
+
+def personalize(jobs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add what the letters say about each listing in particular.
+
+    Parameters:
+    - jobs (pd.DataFrame): The selected job listings.
+
+    Returns:
+    - pd.DataFrame: The listings with up to `CONFIG.key_phrases` key phrases of their
+      description each, or `jobs` itself if key phrases are turned off.
+    """
+    if not CONFIG.key_phrases or jobs.empty:
+        return jobs
+    return add_key_phrases(jobs, key_phrase_cache(), CONFIG.key_phrases)
+
+
+@cache
+def key_phrase_cache() -> KeyPhraseCache:
+    """The key phrase cache, read once per process."""
+    return KeyPhraseCache(CONFIG.key_phrase_cache_path)
+
+
+class RecruiterCache(JsonLinesCache):
+    """
+    The recruiter found by each recruiter search query, kept in a JSON lines file
+    across runs.
+
+    A query names the company and the search term, so every listing of a company
+    shares one search, in this run and the next. Searches that found no one are not
+    kept, so that later runs try them again.
+    """
+
+
+@cache
+def recruiter_cache() -> RecruiterCache:
+    """The recruiter cache, read once per process."""
+    return RecruiterCache(CONFIG.recruiter_cache_path)
+
+
+def add_recruiters(
+    jobs: pd.DataFrame, search_term: str, journal: RunJournal | None = None
+) -> pd.DataFrame:
+    """
+    Search for the recruiter of every job listing missing one and add them to the DataFrame.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings, with or without hiring manager information.
+    - search_term (str): The search term, used to phrase the recruiter searches.
+    - journal (RunJournal | None): As in 'find_jobs'.
+
+    Returns:
+    - pd.DataFrame: The job listings, with the queries used and the recruiters found.
+      If no listing was missing a recruiter, `jobs` itself is returned.
+    """
+    missing = jobs["recruiter"].isna() if "recruiter" in jobs else None
+    if jobs.empty or (missing is not None and not missing.any()):
+        return jobs
+    if missing is None:
+        missing = pd.Series(True, index=jobs.index)
     logger.info("No recruiters found. Searching for recruiters...")
-    companies: list[str] = jobs["company"].to_list()
+    companies: list[str] = jobs.loc[missing, "company"].to_list()
     search_queries: list[str] = get_recruiter_queries(companies, search_term)
-    jobs: pd.DataFrame = jobs.assign(queries_in_use=search_queries)
-    recruiters_names = find_recruiters(search_queries)
-    try:
-        jobs: pd.DataFrame = jobs.assign(recruiter=recruiters_names)
-    except ValueError as warning:
-        logger.warning(f"{warning} | Recruiters will be excluded from this .csv file.")
+    recruiters_names = find_recruiters(
+        search_queries, jobs.loc[missing, "job_url"].to_list(), journal
+    )
+    jobs = jobs.assign(
+        **{column: column_or_empty(jobs, column) for column in RECRUITER_COLUMNS}
+    )
+    jobs.loc[missing, "queries_in_use"] = search_queries
+    jobs.loc[missing, "recruiter"] = recruiters_names
+    return jobs
 
-    jobs.to_csv(output_path, index=False)
-    return compile_jobs(jobs)
+
+def column_or_empty(jobs: pd.DataFrame, column: str) -> pd.Series:
+    """The column of `jobs` as text, or an empty one if it is missing."""
+    if column in jobs:
+        return jobs[column].astype(object)
+    return pd.Series(None, index=jobs.index, dtype=object)
+
+
+def update_recruiters(jobs: pd.DataFrame, resolved: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy the recruiters found for the selected listings back into the whole listing store.
+
+    Listings left out by 'select_listings' keep whatever they had, so changing the filters
+    later never loses a recruiter that was already found.
+    """
+    return jobs.assign(
+        **{
+            column: resolved[column].combine_first(column_or_empty(jobs, column))
+            for column in RECRUITER_COLUMNS
+        }
+    )
 
 
 def pick_jobs(search_term: str, output_path: Path) -> pd.DataFrame:
@@ -84,29 +370,69 @@ def pick_jobs(search_term: str, output_path: Path) -> pd.DataFrame:
     - pd.DataFrame: A DataFrame containing job-related data, such as job postings.
 
     This function attempts to read job listings from a CSV file. If the file is not found,
-    it creates a new CSV file by scraping job listings using the 'scrape_jobs' function.
+    or an earlier scrape stopped partway, it scrapes the job boards page by page with
+    'scrape_all_boards', resuming from the saved checkpoints, and saves the CSV.
     """
-    results_cap = 5
-    results_wanted = CONFIG.number_results_wanted
-    if results_wanted > results_cap:
-        logger.warning(
-            f"Capping results count at {results_cap} to prevent 429 Error Codes."
-        )
-        results_wanted = results_cap
     try:
         logger.info("Picking jobs from csv...")
         jobs = pd.read_csv(output_path)
     except FileNotFoundError:
         logger.info("No csv found, creating csv...")
-        jobs: pd.DataFrame = scrape_jobs(
-            results_wanted=results_wanted,
-            site_name=CONFIG.job_boards,
-            search_term=search_term,
-            location="New York, NY",  # only needed for indeed / glassdoor
-        )
+        jobs = pd.DataFrame()
+    else:
+        if not has_pending_scrape(output_path):
+            return jobs
+        logger.info("Resuming an unfinished scrape...")
+
+    scraped, failed_boards = scrape_all_boards(search_term, output_path)
+    if not jobs.empty and not scraped.empty:
+        scraped = scraped[~scraped["job_url"].isin(jobs["job_url"])]
+    jobs = pd.concat([jobs, scraped], ignore_index=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    jobs.to_csv(output_path, index=False)
+    if not failed_boards:
+        clear_checkpoints(output_path)
     return jobs
 
 
+def pick_job_chunks(search_term: str, output_path: Path) -> Iterator[pd.DataFrame]:
+    """
+    Pick job listings from the CSV file in chunks, scraping it first if it is not found.
+
+    Returns:
+    - Iterator[pd.DataFrame]: Consecutive chunks of the listing store.
+
+    Chunks hold `CONFIG.chunk_size` rows at most. If `CONFIG.peak_memory_mb` is set,
+    the size of the following chunks is derived from the memory used by the first,
+    so that a chunk and everything built from it stay within the target.
+    """
+    if not output_path.exists() or has_pending_scrape(output_path):
+        pick_jobs(search_term, output_path)
+    logger.info("Picking jobs from csv in chunks...")
+    chunk_size = CONFIG.chunk_size
+    with pd.read_csv(output_path, iterator=True) as reader:
+        while True:
+            try:
+                chunk: pd.DataFrame = reader.get_chunk(chunk_size)
+            except StopIteration:
+                return
+            if CONFIG.peak_memory_mb:
+                chunk_size = chunk_size_for(chunk, CONFIG.peak_memory_mb)
+            yield chunk
+
+
+def chunk_size_for(chunk: pd.DataFrame, peak_memory_mb: float) -> int:
+    """
+    Estimate how many rows fit in `peak_memory_mb` from the memory used by `chunk`.
+
+    Each row is held several times over while it is processed: as a DataFrame row,
+    with its recruiter query, and as a JobListing. `MEMORY_OVERHEAD` accounts for that.
+    """
+    bytes_per_row = chunk.memory_usage(deep=True).sum() / max(1, len(chunk))
+    rows = int(peak_memory_mb * 2**20 / (bytes_per_row * MEMORY_OVERHEAD))
+    return max(1, min(CONFIG.chunk_size, rows))
+
+
 def get_recruiter_queries(companies: list[str], search_term: str) -> list[str]:
     """
     Generate LinkedIn search queries for finding recruiters based on company names.
@@ -129,7 +455,7 @@ def get_recruiter_queries(companies: list[str], search_term: str) -> list[str]:
      'site:linkedin.com/in/ Data Corp "Director of (Design | Product | Marketing | User Experience)" @gmail.com New York -posts']
 
     """
-    logger.info(companies)
+    logger.debug("Generating recruiter queries for %d companies.", len(companies))
     return [
         CONFIG.google_search_query.format(
             company.strip().replace(" ", "+"),
@@ -139,18 +465,25 @@ def get_recruiter_queries(companies: list[str], search_term: str) -> list[str]:
     ]
 
 
-def find_recruiters(search_queries) -> list[str]:
+def find_recruiters(
+    search_queries: list[str],
+    job_urls: list[str] | None = None,
+    journal: RunJournal | None = None,
+) -> list[str]:
     """
     Search for LinkedIn profiles based on provided search queries and return names
 
     Parameters:
     - search_queries (List[str]): A list of search queries for finding LinkedIn profiles.
+    - job_urls (List[str] | None): The listing each query belongs to, used as journal keys.
+    - journal (RunJournal | None): If given, each recruiter found is recorded as soon as
+      it is found, and recruiters already recorded are reused without searching.
 
     Returns:
     - List[str]: A list of vanity URLs corresponding to the LinkedIn profiles found.
 
-    This function performs LinkedIn searches using the provided search queries and extracts
-    vanity URLs from the search results. It uses the 'lucky' function from the 'googlesearch'
+    This function performs LinkedIn searches using the provided search queries, on
+    `CONFIG.recruiter_threads` threads, once per query not already in the recruiter cache, and extracts vanity URLs from the search results. It uses the 'lucky' function from the 'googlesearch'
     module with specified headers to simulate a web browser user-agent.
 
     Note: The 'lucky' function is assumed to be part of the 'googlesearch' module.
@@ -162,14 +495,43 @@ def find_recruiters(search_queries) -> list[str]:
     ['https://www.linkedin.com/in/johndoe', 'https://www.linkedin.com/in/janesmith']
 
     """
-    names = []
-    for query in search_queries:
+    job_urls = job_urls or [None] * len(search_queries)
+    recruiters = recruiter_cache()
+
+    def find_recruiter(query: str) -> str:
+        if query in recruiters:
+            return recruiters.get(query)
         result = lucky(
             query,
         )
-        names.append(result)
-
-    return names
+        if result != NO_RECRUITER:
+            recruiters.update({query: result})
+        return result
+
+    def record(job_url: str, search: Future[str]) -> None:
+        if search.exception() is None:
+            journal.record(job_url, RECRUITER, recruiter=search.result())
+
+    found: list[str | Future[str]] = []
+    searches: dict[str, Future[str]] = {}
+    # Searches mostly wait on the network and the shared rate limiter, so threads overlap them.
+    with ThreadPoolExecutor(
+        max_workers=CONFIG.recruiter_threads, thread_name_prefix="recruiter"
+    ) as executor:
+        for query, job_url in zip(search_queries, job_urls):
+            entry = journal.get(job_url, RECRUITER) if journal else None
+            if entry is not None:
+                found.append(entry["recruiter"])
+                continue
+            if query not in searches:
+                searches[query] = executor.submit(find_recruiter, query)
+            if journal is not None and job_url is not None:
+                searches[query].add_done_callback(partial(record, job_url))
+            found.append(searches[query])
+        return [
+            result.result() if isinstance(result, Future) else result
+            for result in found
+        ]
 
 
 def compile_jobs(jobs: pd.DataFrame) -> list[JobListing]:
@@ -182,7 +544,7 @@ def compile_jobs(jobs: pd.DataFrame) -> list[JobListing]:
     Returns:
     - List[JobListing]: A list of JobListing instances created from the DataFrame rows.
 
-    This function iterates over the rows of the provided DataFrame, cleans up column names,
+    This function cleans up column names, iterates over the rows of the provided DataFrame as records,
     and creates JobListing instances for each row using the specified fields in the JobListing dataclass.
     The resulting list contains instances populated with data from the DataFrame.
 
@@ -197,19 +559,10 @@ def compile_jobs(jobs: pd.DataFrame) -> list[JobListing]:
      JobListing(title='Data Analyst', company='Data Corp')]
 
     """
-    job_listings = []
     job_fields = [field.name for field in fields(JobListing)]
-    for _, row in jobs.iterrows():
-        # Clean up column names
-        cleaned_row = {str(col).strip(): value for col, value in row.items()}
-
-        # Create a dictionary of keyword arguments for JobListing
-        job_kwargs: dict[str, Any] = {
-            field: cleaned_row.get(field, None) for field in job_fields
-        }
-
-        # Create JobListing instance
-        job_listing = JobListing(**job_kwargs)
-
-        job_listings.append(job_listing)
-    return job_listings
+    # Clean up column names
+    jobs = jobs.rename(columns=lambda col: str(col).strip())
+    return [
+        JobListing(**{field: row.get(field, None) for field in job_fields})
+        for row in jobs.to_dict("records")
+    ]
@@ -0,0 +1,131 @@
+r"An append-only journal of completed stages, so interrupted runs can resume."
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from src.configs import UTF
+from src.log import logger
+
+# The stages a listing passes through, in order.
+SCRAPED = "scraped"
+RECRUITER = "recruiter"
+RENDERED = "rendered"
+# The first entry of every run, recording what the run was for.
+STARTED = "started"
+
+
+def read_entries(path: Path) -> Iterator[dict[str, Any]]:
+    """The entries of the journal at `path`, in order, skipping a line torn by a crash
+    mid-write. Raises FileNotFoundError if there is no journal."""
+    with open(path, mode="r", encoding=UTF) as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class RunJournal:
+    """
+    An append-only JSONL journal recording each completed stage per listing.
+
+    Every entry is flushed as soon as it is recorded, so an interrupted run loses
+    at most the stage in flight. Resuming reads the journal once; checking whether
+    a stage is done is then a dictionary lookup, so a resumed run only pays for
+    the work that remains.
+    """
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = path
+        self.run: dict[str, Any] = {}
+        self.entries: dict[str, dict[str, dict[str, Any]]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self._load()
+        self._file = open(self.path, mode="a" if resume else "w", encoding=UTF)
+        if resume and self._ends_mid_line():
+            self._file.write("\n")
+
+    def _load(self) -> None:
+        try:
+            for entry in read_entries(self.path):
+                if entry["stage"] == STARTED:
+                    self.run = entry
+                else:
+                    self.entries[entry["job_url"]][entry["stage"]] = entry
+        except FileNotFoundError:
+            logger.warning("No journal at %s; starting from scratch.", self.path)
+            return
+        logger.info(
+            "Resuming from journal with %d listings in progress.", len(self.entries)
+        )
+
+    def _ends_mid_line(self) -> bool:
+        with open(self.path, mode="rb") as file:
+            file.seek(0, 2)
+            if file.tell() == 0:
+                return False
+            file.seek(-1, 2)
+            return file.read(1) != b"\n"
+
+    @property
+    def search_term(self) -> str | None:
+        """The search term of the run being journaled, if it has started."""
+        return self.run.get("search_term")
+
+    def start(self, search_term: str) -> None:
+        """Record the start of a run, unless resuming one that already started."""
+        if self.search_term is None:
+            self.run = self._write({"stage": STARTED, "search_term": search_term})
+
+    def record(self, job_url: str, stage: str, **data: Any) -> None:
+        """Record that `stage` has completed for the listing at `job_url`."""
+        entry = self._write({"job_url": job_url, "stage": stage, **data})
+        self.entries[job_url][stage] = entry
+
+    def record_many(self, job_urls: list[str], stage: str) -> None:
+        """Record that `stage` has completed for every listing in `job_urls` at once."""
+        pending = [
+            {"job_url": url, "stage": stage}
+            for url in job_urls
+            if not self.completed(url, stage)
+        ]
+        self._write_many(pending)
+        for entry in pending:
+            self.entries[entry["job_url"]][stage] = entry
+
+    def completed(self, job_url: str, stage: str) -> bool:
+        """Whether `stage` has already completed for the listing at `job_url`."""
+        return stage in self.entries.get(job_url, {})
+
+    def get(self, job_url: str, stage: str) -> dict[str, Any] | None:
+        """The journal entry of `stage` for the listing at `job_url`, if any."""
+        return self.entries.get(job_url, {}).get(stage)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _write(self, entry: dict[str, Any]) -> dict[str, Any]:
+        self._write_many([entry])
+        return entry
+
+    def _write_many(self, entries: list[dict[str, Any]]) -> None:
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        for entry in entries:
+            entry["time"] = timestamp
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def __enter__(self) -> RunJournal:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,186 @@
+r"Extracts the key phrases of job descriptions, for letters to mention."
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import AbstractSet
+
+import pandas as pd
+
+from src.diskcache import JsonLinesCache, text_hash
+from src.filters import column
+from src.log import logger
+from src.ranking import english_stopwords, stemmer
+
+# Words, or the punctuation that ends a phrase.
+PHRASE_TOKENS = re.compile(
+    r"[A-Za-z][A-Za-z0-9+#'’]*(?:[./-][A-Za-z0-9+#]+)*|[^\w\s]"
+)
+MAX_PHRASE_WORDS = 3
+# Words in nearly every listing, which say nothing about the job.
+JOB_AD_STOPWORDS = frozenset(
+    """ability able applicants apply benefits build building candidate candidates
+    company competitive create creating date employer environment equal excellent
+    experience help hiring include includes including job join joining looking must new
+    offer offers opportunity
+    position preferred qualifications related required requirements responsibilities
+    role salary skills strong team using well work working years""".split()
+)
+
+
+def candidate_phrases(
+    text: str, excluded: AbstractSet[str] = frozenset()
+) -> list[list[str]]:
+    """
+    Split `text` into candidate phrases, as in RAKE: runs of words broken by stopwords,
+    punctuation and the lower-case words in `excluded`. Runs longer than
+    `MAX_PHRASE_WORDS` are cut into pieces that long.
+    """
+    ignored = english_stopwords() | JOB_AD_STOPWORDS | excluded
+    phrases: list[list[str]] = []
+    run: list[str] = []
+    for token in PHRASE_TOKENS.findall(text):
+        if not token[0].isalpha() or token.lower() in ignored:
+            phrases.extend(
+                run[start : start + MAX_PHRASE_WORDS]
+                for start in range(0, len(run), MAX_PHRASE_WORDS)
+            )
+            run = []
+        else:
+            run.append(token)
+    phrases.extend(
+        run[start : start + MAX_PHRASE_WORDS]
+        for start in range(0, len(run), MAX_PHRASE_WORDS)
+    )
+    return phrases
+
+
+def extract_key_phrases(
+    texts: list[str], count: int, titles: list[str] | None = None
+) -> list[list[str]]:
+    """
+    Extract up to `count` key phrases from each of `texts`, as a batch.
+
+    Parameters:
+    - texts (list[str]): The job descriptions.
+    - count (int): How many phrases to keep per description.
+    - titles (list[str] | None): The job title of each text. The letter names the
+      job already, so phrases never include words of its title.
+
+    Returns:
+    - list[list[str]]: The key phrases of each text, best first, as they appear in it.
+
+    Each word is weighted by TF-IDF across the batch, so phrases every listing shares
+    weigh little, and a phrase scores the sum of its words' weights. Phrases made only
+    of words in most of a batch's texts are boilerplate, and skipped. So is a phrase
+    sharing a stem with a better one, so that the phrases kept say different things.
+    """
+    stems: dict[str, str] = {}
+
+    def stem(word: str) -> str:
+        lowered = word.lower()
+        if lowered not in stems:
+            stems[lowered] = stemmer().stem(lowered)
+        return stems[lowered]
+
+    documents = []
+    for text, title in zip(texts, titles or [""] * len(texts)):
+        excluded = {word.lower() for word in PHRASE_TOKENS.findall(title)}
+        phrases = [
+            (phrase, [stem(word) for word in phrase])
+            for phrase in candidate_phrases(text, excluded)
+        ]
+        frequencies = Counter(word for _, words in phrases for word in words)
+        documents.append((phrases, frequencies))
+    document_frequency = Counter(
+        word for _, frequencies in documents for word in frequencies
+    )
+    idf = {
+        word: math.log((1 + len(texts)) / (1 + frequency)) + 1
+        for word, frequency in document_frequency.items()
+    }
+    common = len(texts) / 2 if len(texts) > 2 else len(texts)
+    boilerplate = {
+        word for word, frequency in document_frequency.items() if frequency > common
+    }
+
+    key_phrases = []
+    for phrases, frequencies in documents:
+        weights = {
+            word: (1 + math.log(frequency)) * idf[word]
+            for word, frequency in frequencies.items()
+        }
+        scored = sorted(
+            phrases,
+            key=lambda phrase: sum(weights[word] for word in set(phrase[1])),
+            reverse=True,
+        )
+        chosen: list[str] = []
+        used: set[str] = set()
+        seen: set[tuple[str, ...]] = set()
+        for phrase, words in scored:
+            if len(chosen) == count:
+                break
+            if (
+                tuple(words) in seen
+                or used.intersection(words)
+                or boilerplate.issuperset(words)
+            ):
+                continue
+            seen.add(tuple(words))
+            used.update(words)
+            chosen.append(" ".join(phrase))
+        key_phrases.append(chosen)
+    return key_phrases
+
+
+class KeyPhraseCache(JsonLinesCache):
+    """
+    Key phrases by the hash of the title, description and number of phrases wanted,
+    kept in a JSON lines file across runs.
+
+    A description seen in an earlier run, such as a listing reposted the next day,
+    keeps the phrases it was given then, without being processed again. Changing
+    `key_phrases` extracts them afresh, rather than serving lists of the old length.
+    """
+
+
+def add_key_phrases(
+    jobs: pd.DataFrame, cache: KeyPhraseCache, count: int
+) -> pd.DataFrame:
+    """
+    Add a `key_phrases` column to `jobs`, extracting them from every description not
+    already in `cache` as one batch, and adding those to the cache.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings with `title` and `description` columns.
+    - cache (KeyPhraseCache): The key phrases of descriptions seen before.
+    - count (int): How many phrases to keep per description.
+
+    Returns:
+    - pd.DataFrame: `jobs`, with the key phrases of each listing as a list.
+    """
+    descriptions = column(jobs, "description").fillna("").astype(str)
+    titles = column(jobs, "title").fillna("").astype(str)
+    keys = [
+        str(text_hash(f"{count}\n{title}\n{description}"))
+        for title, description in zip(titles, descriptions)
+    ]
+    missing = {
+        key: (title, description)
+        for key, title, description in zip(keys, titles, descriptions)
+        if cache.get(key) is None
+    }
+    if missing:
+        missing_titles, missing_descriptions = zip(*missing.values())
+        extracted = extract_key_phrases(
+            list(missing_descriptions), count, list(missing_titles)
+        )
+        cache.update(dict(zip(missing, extracted)))
+    logger.debug(
+        "Key phrases for %d listings, %d from the cache.",
+        len(keys),
+        len(keys) - len(missing),
+    )
+    return jobs.assign(key_phrases=[cache.get(key) for key in keys])
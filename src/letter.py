@@ -0,0 +1,225 @@
+r"Compiles the copy of a cover letter, and renders it as text or, through coverletterwriter, as PDF."
+import re
+from dataclasses import dataclass
+from functools import cache
+from hashlib import blake2b
+from json import load as json_load
+from pathlib import Path
+from string import Formatter
+from time import perf_counter
+
+from src.configs import (
+    BOTH,
+    CONFIG,
+    DATE,
+    OUTPUT_FORMATS,
+    PDF,
+    TXT,
+    JobScrapeConfig,
+    persona,
+)
+from src.jobspicker import JobListing
+from src.striptags import strip_tags
+
+# Nothing in this module imports ReportLab, so text-only runs never load it.
+
+LETTER_FORMAT_PATH = Path(CONFIG.letter_format_path).resolve()
+EOL = "<br />"
+# The template fields that change from one listing to the next. A paragraph using none
+# of them reads the same in every letter of a run.
+LISTING_FIELDS = frozenset(
+    {"recruiter", "company", "job", "job_url", "listing_site", "key_phrases"}
+)
+# What {key_phrases} reads when none were found in the listing.
+KEY_PHRASES_FALLBACK = "this kind of work"
+# Letters are spread over 16**SHARD_DIGITS subdirectories by the hash of their job_url.
+SHARD_DIGITS = 2
+# Characters file systems reject or treat as separators, and control characters.
+UNSAFE_FILENAME = re.compile(r'[\x00-\x1f/\\:*?"<>|]')
+MAX_NAME_LENGTH = 100
+
+
+@cache
+def letter_template() -> dict[str, str]:
+    """The letter template, read once per process."""
+    with open(LETTER_FORMAT_PATH) as letter_format:
+        return json_load(letter_format)
+
+
+@cache
+def static_sections() -> frozenset[str]:
+    """The sections of the template that use no per-listing fields."""
+    return frozenset(
+        section
+        for section, copy in letter_template().items()
+        if not LISTING_FIELDS.intersection(
+            field for _, field, _, _ in Formatter().parse(copy) if field
+        )
+    )
+
+
+def listing_key(job_url: str) -> str:
+    """A short hash of `job_url`, which tells apart letters to the same company."""
+    return blake2b(str(job_url).encode(), digest_size=6).hexdigest()
+
+
+def safe_filename(name: str) -> str:
+    """`name` with the characters a filename can't hold replaced, cut to a safe length."""
+    return UNSAFE_FILENAME.sub("_", name)[:MAX_NAME_LENGTH]
+
+
+def letter_as_txt(whole_letter: str) -> str:
+    """This converts the compiled letter's markup to plain text."""
+    stripped_letter = strip_tags(whole_letter)
+    return (
+        stripped_letter.replace(" " * 28, "\n")
+        .replace(" " * 12, "\n\n")
+        .replace(" " * 4, "\n")
+    )
+
+
+@dataclass
+class CoverLetterContents:
+    """Generates a cover letter."""
+
+    listing: JobListing
+    config: JobScrapeConfig
+
+    @property
+    def link_color(self) -> str:
+        return "color='blue'"
+
+    @property
+    def letter_title(self) -> str:
+        return f"{DATE}_{self.listing.company}_{persona.name}.pdf"
+
+    @property
+    def subject(self) -> str:
+        return f"{persona.name}'s Cover Letter for {self.listing.company}"
+
+    def file_name(self, name: str, suffix: str) -> str:
+        """A collision-free path for one of the letter's files: `name`, made safe and
+        followed by the listing's key, in the shard directory the key starts with."""
+        key = listing_key(self.listing.job_url)
+        return f"{key[:SHARD_DIGITS]}/{safe_filename(name)}_{key}{suffix}"
+
+    @property
+    def pdf_name(self) -> str:
+        return self.file_name(f"{DATE}_{self.listing.company}_{persona.name}", ".pdf")
+
+    @property
+    def txt_name(self) -> str:
+        return self.file_name(f"{DATE}_{self.subject}", "_CoverLetter.txt")
+
+    @property
+    def key_phrases(self) -> str:
+        """The key phrases of the listing's description, as a list in prose."""
+        phrases = self.listing.key_phrases or []
+        if len(phrases) < 2:
+            return phrases[0] if phrases else KEY_PHRASES_FALLBACK
+        return f"{', '.join(phrases[:-1])} and {phrases[-1]}"
+
+    @property
+    def portfolio(self) -> str:
+        return (
+            f"My portfolio is at <a href={persona.portfolio} {self.link_color}>{persona.portfolio}</a>."
+            if persona.portfolio != ""
+            else "My portfolio is available upon request."
+        )
+
+    def __call__(self) -> None:
+        """The collection of strings and variables that make up the copy of the cover letter,
+        compiled both per template section into `paragraphs` and as a whole into `whole_letter`.
+        """
+        fields = dict(
+            name=persona.name,
+            date=DATE,
+            recruiter=self.listing.recruiter,
+            company=self.listing.company,
+            job=self.listing.title,
+            job_url=self.listing.job_url,
+            listing_site=self.listing.site,
+            calendly=persona.calendly,
+            link_color=self.link_color,
+            email=persona.email,
+            phone=persona.phone,
+            portfolio=self.portfolio,
+            key_phrases=self.key_phrases,
+        )
+        self.paragraphs: dict[str, str] = {
+            section: copy.format(**fields) for section, copy in letter_template().items()
+        }
+        self.whole_letter = EOL.join(
+            f"{paragraph}{EOL}" for paragraph in self.paragraphs.values()
+        )
+
+
+@dataclass
+class RenderedLetter:
+    """A rendered cover letter, as .pdf and/or .txt, ready to be exported."""
+
+    # Paths relative to the export directory, which may include a shard subdirectory.
+    pdf_name: str
+    txt_name: str
+    pdf: bytes | None
+    txt: str | None
+    elapsed: float = 0.0
+
+    def export(self, output_directory: Path) -> None:
+        """This writes the cover letter's .pdf and .txt files to `output_directory`."""
+        (output_directory / self.txt_name).parent.mkdir(parents=True, exist_ok=True)
+        if self.pdf is not None:
+            (output_directory / self.pdf_name).write_bytes(self.pdf)
+        if self.txt is not None:
+            with open(output_directory / self.txt_name, "w") as txt_file:
+                txt_file.write(self.txt)
+
+    def exported_paths(self, output_directory: Path) -> dict[str, str | float | None]:
+        """Where `export` writes each file, None for formats not rendered, and the render time."""
+        return {
+            "pdf": str(output_directory / self.pdf_name) if self.pdf is not None else None,
+            "txt": str(output_directory / self.txt_name) if self.txt is not None else None,
+            "elapsed": self.elapsed,
+        }
+
+
+def export_directory(config: JobScrapeConfig) -> Path:
+    """The directory today's cover letters are exported to."""
+    return Path(config.export_directory) / f"{DATE}_exports"
+
+
+def render_text(listing: JobListing) -> RenderedLetter:
+    """Renders only the .txt of the cover letter for `listing`, straight from the template."""
+    start = perf_counter()
+    cover_letter = CoverLetterContents(listing, CONFIG)
+    cover_letter()
+    return RenderedLetter(
+        pdf_name=cover_letter.pdf_name,
+        txt_name=cover_letter.txt_name,
+        pdf=None,
+        txt=letter_as_txt(cover_letter.whole_letter),
+        elapsed=perf_counter() - start,
+    )
+
+
+def render_letter(listing: JobListing, output_format: str = BOTH) -> RenderedLetter:
+    """Renders the cover letter for `listing` in `output_format`. Being a module-level
+    function, it can be sent to the render worker processes.
+    """
+    if output_format == TXT:
+        return render_text(listing)
+    # ReportLab is only imported once a PDF is actually wanted.
+    from src.coverletterwriter import render_pdf
+
+    return render_pdf(listing, with_txt=output_format == BOTH)
+
+
+def warm_up(config: JobScrapeConfig) -> None:
+    """Load everything a render in `config.output_format` needs up front, so the first
+    letter costs no more than the rest. Pass it as the initializer of render workers.
+    """
+    letter_template()
+    if config.output_format != TXT:
+        from src.coverletterwriter import warm_up_pdf
+
+        warm_up_pdf(config)
@@ -1,13 +1,112 @@
+from __future__ import annotations
+
+import atexit
+import json
 import logging
 import logging.config
-import json
+import multiprocessing
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+
 from src.configs import CONFIG
 
 
 logger = logging.getLogger("jobscraper")
 
-logging_configs = Path(CONFIG.logging_file_path).resolve()
-with open(logging_configs) as f_in:
-    log_config = json.load(f_in)
-logging.config.dictConfig(log_config)
+# Records from every thread, and those forwarded from render workers, go through this
+# queue, and are written to the console and file by a single background listener.
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener: QueueListener | None = None
+# Render workers' records cross processes on this queue, made when a pool first needs it.
+_worker_queue: multiprocessing.Queue | None = None
+_worker_listener: QueueListener | None = None
+
+
+def load_logging_config(config_path: str | Path = CONFIG.logging_file_path) -> dict:
+    """load_logging_config reads a .json file in `logging.config.dictConfig` format."""
+    with open(Path(config_path).resolve()) as f_in:
+        return json.load(f_in)
+
+
+def setup_logging(log_config: dict | None = None) -> None:
+    """setup_logging configures the handlers in `log_config` behind a queue.
+
+    The configured handlers are moved off the root logger onto a QueueListener
+    running on a background thread, and the root logger gets a single
+    QueueHandler in their place, so logging calls never wait on console or file I/O.
+    Calling it again is a no-op, so handlers are never attached twice.
+
+    Args:
+        log_config (dict | None): a `logging.config.dictConfig` configuration.
+            Defaults to the file at `CONFIG.logging_file_path`.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_config = log_config or load_logging_config()
+    for handler in log_config.get("handlers", {}).values():
+        if "filename" in handler:
+            Path(handler["filename"]).parent.mkdir(parents=True, exist_ok=True)
+    logging.config.dictConfig(log_config)
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """stop_logging flushes the queued records and stops the background listeners."""
+    global _listener, _worker_queue, _worker_listener
+    if _worker_listener is not None:
+        _worker_listener.stop()
+        _worker_listener = None
+        _worker_queue = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def worker_log_queue() -> multiprocessing.Queue:
+    """worker_log_queue returns the queue worker processes log to, making it at first use.
+
+    A background listener forwards the records on it to `log_queue`, so they are
+    written by the same handlers as this process's. Only processes that start render
+    workers pay for the pipe and threads a `multiprocessing.Queue` takes.
+
+    Returns:
+        multiprocessing.Queue: the queue to hand to `init_worker_logging`.
+    """
+    global _worker_queue, _worker_listener
+    if _worker_queue is None:
+        _worker_queue = multiprocessing.Queue(-1)
+        _worker_listener = QueueListener(_worker_queue, QueueHandler(log_queue))
+        _worker_listener.start()
+    return _worker_queue
+
+
+def init_worker_logging(queue: multiprocessing.Queue, level: int) -> None:
+    """init_worker_logging routes a worker process's records to the parent's queue.
+
+    Pass it as the `initializer` of a process pool. Whether the worker was forked
+    with the parent's handlers or spawned with none, it ends up with exactly one
+    QueueHandler, so records from every worker are written once, by the parent.
+
+    Args:
+        queue (multiprocessing.Queue): the parent's `worker_log_queue()`.
+        level (int): the parent's root logging level.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(queue))
+    root.setLevel(level)
+
+
+if multiprocessing.parent_process() is None:
+    setup_logging()
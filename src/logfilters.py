@@ -0,0 +1,17 @@
+r"Filters referenced by logging_config.json."
+import logging
+
+
+class MaxLevelFilter(logging.Filter):
+    """MaxLevelFilter lets through only the records below `level`.
+
+    Used on the stdout handler, so that warnings and errors are only
+    written once, by the stderr handler.
+    """
+
+    def __init__(self, level: str | int) -> None:
+        super().__init__()
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno < self.level
@@ -0,0 +1,208 @@
+r"Estimates what a run will cost from the listing store and caches, without running it."
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+import pandas as pd
+
+from src.configs import JobScrapeConfig
+from src.filters import column
+from src.jobspicker import (
+    compile_jobs,
+    get_recruiter_queries,
+    listings_path,
+    recruiter_cache,
+    select_listings,
+)
+from src.journal import RECRUITER, RENDERED, read_entries
+from src.letter import TXT, render_letter, warm_up
+from src.ratelimit import AdaptiveRateLimiter
+from src.scrapedriver import ScrapeCheckpoint, checkpoint_directory, has_pending_scrape
+
+# No request latencies are recorded, so a search or page is assumed to take this long.
+ASSUMED_LATENCY = 0.5
+
+
+@dataclass
+class RunPlan:
+    """What a run for `search_term` is expected to cost."""
+
+    search_term: str
+    listings: int
+    selected: int
+    unscraped: int
+    scrape_requests: int
+    companies: int
+    cached_recruiters: int
+    searches: int
+    letters: int
+    seconds_per_letter: float
+    timings: str
+    network_seconds: float
+    render_seconds: float
+    total_seconds: float
+
+    def __str__(self) -> str:
+        return "\n".join(
+            [
+                f"Plan for {self.search_term!r}:",
+                f"  listings:   {self.listings} in the store, {self.selected} selected, "
+                f"up to {self.unscraped} still to scrape",
+                f"  requests:   {self.scrape_requests} job board pages, "
+                f"{self.searches} recruiter searches",
+                f"  recruiters: {self.companies} companies to look up, "
+                f"{self.cached_recruiters} in the recruiter cache",
+                f"  letters:    {self.letters} at {self.seconds_per_letter * 1000:.1f} ms "
+                f"each, from {self.timings}",
+                f"  time:       {self.network_seconds:.0f} s waiting on the network, "
+                f"{self.render_seconds:.0f} s rendering, "
+                f"about {self.total_seconds:.0f} s in all",
+            ]
+        )
+
+
+def paced_seconds(requests: int, limiter: AdaptiveRateLimiter) -> float:
+    """
+    How long `limiter` takes to let `requests` through, if none is throttled: the first
+    goes at once, and the rate rises by `limiter.increase` after each one, up to
+    `limiter.max_rate`. `limiter` itself is left as it is.
+    """
+    rate, seconds = limiter.rate, 0.0
+    for _ in range(requests - 1):
+        seconds += 1 / rate
+        rate = min(limiter.max_rate, rate + limiter.increase)
+    return seconds
+
+
+def network_seconds(requests: int, threads: int, config: JobScrapeConfig) -> float:
+    """The wall time of `requests` made on `threads` threads through one rate limiter:
+    whichever is slower of the limiter's pacing and the requests' latency."""
+    limiter = AdaptiveRateLimiter(
+        rate=config.requests_per_second, max_rate=config.max_requests_per_second
+    )
+    return max(
+        paced_seconds(requests, limiter),
+        math.ceil(requests / max(1, threads)) * ASSUMED_LATENCY,
+    )
+
+
+def unscraped_listings(output_path: Path, config: JobScrapeConfig) -> dict[str, int]:
+    """How many listings each job board is still to be scraped for, at most, going by
+    its checkpoint. Empty if the listing store is complete."""
+    if output_path.exists() and not has_pending_scrape(output_path):
+        return {}
+    directory = checkpoint_directory(output_path)
+    remaining = {}
+    for board in config.job_boards:
+        checkpoint = ScrapeCheckpoint.load(directory / f"{board}.json", board)
+        if not checkpoint.done:
+            remaining[board] = max(0, config.number_results_wanted - checkpoint.offset)
+    return remaining
+
+
+def journal_entries(config: JobScrapeConfig) -> list[dict]:
+    """The entries of the last run's journal, if there is one."""
+    try:
+        return list(read_entries(Path(config.journal_path)))
+    except FileNotFoundError:
+        return []
+
+
+def seconds_per_letter(
+    jobs: pd.DataFrame, entries: list[dict], config: JobScrapeConfig
+) -> tuple[float, str]:
+    """
+    The time to render a letter, and where it was taken from: the median of the letters
+    recorded in the run journal, or else the time to render the first of `jobs` in
+    memory, without writing it.
+    """
+    elapsed = [
+        entry["elapsed"]
+        for entry in entries
+        if entry.get("stage") == RENDERED and "elapsed" in entry
+    ]
+    if elapsed:
+        return median(elapsed), f"{len(elapsed)} letters in the run journal"
+    if jobs.empty:
+        return 0.0, "no letters"
+    warm_up(config)
+    (listing,) = compile_jobs(jobs.head(1))
+    start = perf_counter()
+    render_letter(listing, config.output_format)
+    return perf_counter() - start, "a sample render"
+
+
+def plan_run(search_term: str, config: JobScrapeConfig, resume: bool = False) -> RunPlan:
+    """
+    Estimate the requests, cache hits and time a run for `search_term` would take.
+
+    Parameters:
+    - search_term (str): The search term the run is for.
+    - config (JobScrapeConfig): The rate limits and concurrency the run would use.
+    - resume (bool): Whether the run would resume the one in the run journal, leaving
+      out the recruiters and letters it already has.
+
+    Returns:
+    - RunPlan: The estimate.
+
+    Only today's listing store, the checkpoints of an unfinished scrape, the recruiter
+    cache and the run journal are read. Listings are selected as a run would select
+    them. Listings still to be scraped are counted at their most: each a new company
+    with a letter to render. Render timings come from the letters of the last run.
+    """
+    output_path = listings_path(search_term)
+    try:
+        jobs = pd.read_csv(output_path)
+    except FileNotFoundError:
+        jobs = pd.DataFrame()
+    unscraped = unscraped_listings(output_path, config)
+    pages = [math.ceil(count / config.results_per_page) for count in unscraped.values()]
+    selected = select_listings(jobs, search_term) if not jobs.empty else jobs
+
+    entries = journal_entries(config)
+    completed: dict[str, set[str]] = {RECRUITER: set(), RENDERED: set()}
+    if resume:
+        for entry in entries:
+            completed.get(entry["stage"], set()).add(entry.get("job_url"))
+    urls = column(selected, "job_url")
+    missing = column(selected, "recruiter").isna() & ~urls.isin(completed[RECRUITER])
+    companies = sorted(set(column(selected, "company")[missing].dropna()))
+    queries = get_recruiter_queries(companies, search_term)
+    cache = recruiter_cache()
+    cached = sum(query in cache for query in queries)
+    searches = len(queries) - cached + sum(unscraped.values())
+
+    letters = (~urls.isin(completed[RENDERED])).sum() + sum(unscraped.values())
+    per_letter, timings = seconds_per_letter(selected, entries, config)
+    workers = (
+        config.export_threads if config.output_format == TXT else config.render_processes
+    )
+    render = letters * per_letter / max(1, workers)
+
+    # Boards are scraped at once, each through its own limiter, one page at a time.
+    scraping = max((network_seconds(count, 1, config) for count in pages), default=0.0)
+    searching = network_seconds(searches, config.recruiter_threads, config)
+    # In chunks, searches for the next chunk overlap rendering the current one.
+    total = scraping + (
+        max(searching, render) if config.chunk_size else searching + render
+    )
+    return RunPlan(
+        search_term=search_term,
+        listings=len(jobs),
+        selected=len(selected),
+        unscraped=sum(unscraped.values()),
+        scrape_requests=sum(pages),
+        companies=len(companies),
+        cached_recruiters=cached,
+        searches=searches,
+        letters=int(letters),
+        seconds_per_letter=per_letter,
+        timings=timings,
+        network_seconds=scraping + searching,
+        render_seconds=render,
+        total_seconds=total,
+    )
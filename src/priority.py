@@ -0,0 +1,106 @@
+r"Orders job listings by how much applying to them soon is worth."
+from __future__ import annotations
+
+import heapq
+from itertools import count
+
+import numpy as np
+import pandas as pd
+
+from src.configs import NOW, JobScrapeConfig
+from src.filters import annual_salaries, column
+from src.ranking import relevance_scores
+
+# A listing this many days old counts half as fresh as one posted today.
+RECENCY_HALF_LIFE_DAYS = 7
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """The percentile rank of each of `values` among the known ones, in (0, 1];
+    0.5 where unknown, so missing data neither helps nor hurts a listing."""
+    ranks = pd.Series(values).rank(pct=True)
+    return ranks.fillna(0.5).to_numpy(dtype=float)
+
+
+def priority_scores(
+    jobs: pd.DataFrame, profile: str, config: JobScrapeConfig
+) -> np.ndarray:
+    """
+    Score how soon each job listing is worth applying to.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings, as selected for letters.
+    - profile (str): What the applicant is looking for, for relevance.
+    - config (JobScrapeConfig): The weights of recency, salary and relevance.
+
+    Returns:
+    - np.ndarray: One score per listing, higher first: the weighted mean of its
+      recency, salary and relevance, each in [0, 1].
+
+    Recency halves every `RECENCY_HALF_LIFE_DAYS` days since the listing was posted,
+    since early applications are read first. Salary is the percentile rank of the top
+    of the annualized range. Relevance is that of 'rank_listings', reused if it has
+    been computed, and otherwise ranked like salary so neither outweighs the other.
+    """
+    posted = pd.to_datetime(column(jobs, "date_posted"), errors="coerce")
+    age = (pd.Timestamp(NOW) - posted).dt.days.clip(lower=0).to_numpy(dtype=float)
+    recency = np.where(
+        np.isnan(age), 0.5, np.exp2(-np.nan_to_num(age) / RECENCY_HALF_LIFE_DAYS)
+    )
+    _, high = annual_salaries(jobs)
+    salary = percentile_ranks(high)
+    if "relevance" in jobs:
+        relevance = jobs["relevance"].fillna(0).to_numpy(dtype=float)
+    else:
+        texts = (
+            column(jobs, "title").fillna("").astype(str)
+            + " "
+            + column(jobs, "description").fillna("").astype(str)
+        )
+        relevance = percentile_ranks(relevance_scores(texts, profile))
+    weights = np.array(
+        [config.recency_weight, config.salary_weight, config.relevance_weight]
+    )
+    total = weights.sum() or 1.0
+    return (weights @ np.vstack([recency, salary, relevance])) / total
+
+
+class ListingQueue:
+    """
+    A max-heap of job listings by their `priority` column.
+
+    Listings can be pushed from several frames, such as today's listing store and those
+    deferred by an earlier run, and are popped a batch at a time, best first. Listings
+    of equal priority come out in the order they were pushed.
+    """
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[float, int, dict]] = []
+        self.order = count()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, jobs: pd.DataFrame) -> None:
+        """Queue every listing of `jobs`, keeping its index label."""
+        for label, record in zip(jobs.index, jobs.to_dict("records")):
+            record["_label"] = label
+            heapq.heappush(
+                self.heap, (-record["priority"], next(self.order), record)
+            )
+
+    def pop(self, size: int) -> pd.DataFrame:
+        """The `size` listings of highest priority, removed from the queue."""
+        records = [
+            heapq.heappop(self.heap)[2] for _ in range(min(size, len(self.heap)))
+        ]
+        return self.frame(records)
+
+    def drain(self) -> pd.DataFrame:
+        """Every listing left, best first, emptying the queue."""
+        return self.pop(len(self.heap))
+
+    @staticmethod
+    def frame(records: list[dict]) -> pd.DataFrame:
+        labels = [record.pop("_label") for record in records]
+        return pd.DataFrame(records, index=pd.Index(labels))
@@ -0,0 +1,196 @@
+r"Ranks job listings by TF-IDF relevance to the applicant's profile."
+import re
+from functools import cache
+
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+
+from src.filters import column
+from src.log import logger
+
+TOKEN_PATTERN = r"[a-z][a-z0-9+#]*"
+# Joins a block of documents into one string, and is matched as a token of its own,
+# so the whole block is tokenized by a single regex call.
+DOCUMENT_BREAK = "\x1e"  # ASCII record separator
+BLOCK_TOKENS = re.compile(f"{TOKEN_PATTERN}|{DOCUMENT_BREAK}")
+# How many descriptions are tokenized at once; bounds the memory used by tokens.
+BLOCK_SIZE = 500
+# Used when the nltk stopwords corpus has not been downloaded.
+FALLBACK_STOPWORDS = frozenset(
+    """a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during each
+    few for from further had has have having he her here hers herself him himself his how
+    i if in into is it its itself just me more most my myself no nor not now of off on
+    once only or other our ours ourselves out over own same she should so some such than
+    that the their theirs them themselves then there these they this those through to too
+    under until up very was we were what when where which while who whom why will with
+    would you your yours yourself yourselves""".split()
+)
+
+
+@cache
+def english_stopwords() -> frozenset[str]:
+    """The English stopwords, loaded once per process."""
+    try:
+        return frozenset(stopwords.words("english"))
+    except LookupError:
+        return FALLBACK_STOPWORDS
+
+
+@cache
+def stemmer() -> PorterStemmer:
+    """The stemmer, built once per process."""
+    return PorterStemmer()
+
+
+class Vocabulary:
+    """
+    Maps raw tokens to stemmed term ids, stemming each distinct token only once.
+
+    Stopwords map to -1. The mapping is kept across calls, so the stemmer runs once
+    per distinct token in the whole batch, rather than once per occurrence.
+    """
+
+    def __init__(self) -> None:
+        self.term_ids: dict[str, int] = {}
+        self.token_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def lookup(self, tokens: np.ndarray) -> np.ndarray:
+        """The term id of each distinct token in `tokens`, -1 for stopwords."""
+        ignored = english_stopwords()
+        ids = np.empty(len(tokens), dtype=np.int64)
+        for i, token in enumerate(tokens):
+            term_id = self.token_ids.get(token)
+            if term_id is None:
+                if token in ignored:
+                    term_id = -1
+                else:
+                    term = stemmer().stem(token)
+                    term_id = self.term_ids.setdefault(term, len(self.term_ids))
+                self.token_ids[token] = term_id
+            ids[i] = term_id
+        return ids
+
+
+def tokenize(texts: pd.Series) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split a block of `texts` into lower-case word tokens, in order.
+
+    Parameters:
+    - texts (pd.Series): The documents, NaN allowed.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray, np.ndarray]: The position in `texts` of each token's
+      document, the code of each token, and the distinct tokens the codes index into.
+    """
+    texts = texts.fillna("").astype(str).str.replace(DOCUMENT_BREAK, " ", regex=False)
+    text = DOCUMENT_BREAK.join(texts).lower()
+    codes, uniques = pd.factorize(np.array(BLOCK_TOKENS.findall(text), dtype=object))
+    breaks = (uniques == DOCUMENT_BREAK)[codes]
+    document_ids = np.cumsum(breaks)
+    return document_ids[~breaks], codes[~breaks], uniques
+
+
+def term_counts(
+    texts: pd.Series, vocabulary: Vocabulary
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tokenize `texts` into a sparse document-term count matrix, in coordinate form.
+
+    Parameters:
+    - texts (pd.Series): The documents, NaN allowed.
+    - vocabulary (Vocabulary): The vocabulary, extended with any new terms.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray, np.ndarray]: The document index, term id and count
+      of every nonzero entry.
+    """
+    documents, terms, counts = [], [], []
+    for start in range(0, len(texts), BLOCK_SIZE):
+        document_ids, codes, uniques = tokenize(texts.iloc[start : start + BLOCK_SIZE])
+        words = uniques != DOCUMENT_BREAK
+        term_ids = np.full(len(uniques), -1, dtype=np.int64)
+        term_ids[words] = vocabulary.lookup(uniques[words])
+        term_ids = term_ids[codes]
+        kept = term_ids >= 0
+        keys = (start + document_ids[kept]) * (len(vocabulary) + 1) + term_ids[kept]
+        pairs, pair_counts = np.unique(keys, return_counts=True)
+        documents.append(pairs // (len(vocabulary) + 1))
+        terms.append(pairs % (len(vocabulary) + 1))
+        counts.append(pair_counts)
+    if not documents:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(documents), np.concatenate(terms), np.concatenate(counts)
+
+
+def relevance_scores(texts: pd.Series, profile: str) -> np.ndarray:
+    """
+    Score each text by the cosine similarity of its TF-IDF vector to the profile's.
+
+    Parameters:
+    - texts (pd.Series): The documents to score, typically job descriptions.
+    - profile (str): What the applicant is looking for.
+
+    Returns:
+    - np.ndarray: One score in [0, 1] per document; 0 for empty documents.
+
+    Term frequencies are sublinear (1 + log tf) and the idf is smoothed, as is usual.
+    The profile is weighted with the batch's idf, so rare shared terms count the most.
+    """
+    vocabulary = Vocabulary()
+    documents, terms, counts = term_counts(texts, vocabulary)
+    _, profile_terms, profile_counts = term_counts(
+        pd.Series([profile]), vocabulary
+    )
+    size = len(vocabulary)
+    document_frequency = np.bincount(terms, minlength=size)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(counts)) * idf[terms]
+    norms = np.sqrt(np.bincount(documents, weights**2, minlength=len(texts)))
+
+    profile_weights = np.zeros(size)
+    profile_weights[profile_terms] = (1 + np.log(profile_counts)) * idf[profile_terms]
+    profile_norm = np.linalg.norm(profile_weights)
+    if not profile_norm:
+        return np.zeros(len(texts))
+    dots = np.bincount(
+        documents, weights * profile_weights[terms], minlength=len(texts)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = dots / (norms * profile_norm)
+    return np.nan_to_num(scores)
+
+
+def rank_listings(jobs: pd.DataFrame, profile: str, top_n: int) -> pd.DataFrame:
+    """
+    Keep the `top_n` job listings most relevant to `profile`.
+
+    Parameters:
+    - jobs (pd.DataFrame): Job listings with `title` and `description` columns.
+    - profile (str): What the applicant is looking for.
+    - top_n (int): How many listings to keep.
+
+    Returns:
+    - pd.DataFrame: The most relevant listings, best first, with a `relevance` column.
+    """
+    if jobs.empty:
+        return jobs
+    texts = (
+        column(jobs, "title").fillna("").astype(str)
+        + " "
+        + column(jobs, "description").fillna("").astype(str)
+    )
+    scores = relevance_scores(texts, profile)
+    ranked = jobs.assign(relevance=scores).sort_values(
+        "relevance", ascending=False, kind="stable"
+    )
+    logger.info(
+        "Keeping the %d most relevant of %d listings.", min(top_n, len(jobs)), len(jobs)
+    )
+    return ranked.head(top_n)
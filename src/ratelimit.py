@@ -0,0 +1,162 @@
+r"Adaptive rate limiting and retries shared by Google and the job boards."
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Callable, TypeVar
+
+from src.log import logger
+
+T = TypeVar("T")
+
+# Status codes an upstream uses to tell us to slow down.
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class RateLimited(Exception):
+    """Raised when an upstream answers with a throttling response.
+
+    :param float retry_after: Seconds the upstream asked us to wait, if any.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a `Retry-After` header, given either in seconds or as an HTTP date.
+
+    :param str value: The raw header value.
+
+    :rtype: float or None
+    :return: The number of seconds to wait, or None if the header is absent or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class AdaptiveRateLimiter:
+    """
+    An AIMD (additive increase, multiplicative decrease) limiter on the request rate.
+
+    Every successful request nudges the rate up by `increase`; every throttling
+    response cuts it by `decrease`, so the limiter settles just under the highest
+    rate the upstream tolerates. A `Retry-After` hint blocks all callers until it expires.
+    The limiter is thread-safe, so a single instance can be shared across workers.
+    """
+
+    rate: float
+    min_rate: float = 0.05
+    max_rate: float = 2.0
+    increase: float = 0.05
+    decrease: float = 0.5
+    _next_slot: float = field(default=0.0, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def acquire(self) -> None:
+        """Block until the next request slot is available."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """Additively raise the request rate after a successful request."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """Multiplicatively lower the request rate, honoring `retry_after` if given."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            if retry_after is not None:
+                self._next_slot = max(
+                    self._next_slot, time.monotonic() + retry_after
+                )
+        logger.warning(
+            "Upstream is throttling; slowing down to %.3f requests/second.", self.rate
+        )
+
+
+def backoff_delay(
+    attempt: int,
+    base_delay: float,
+    max_delay: float,
+    retry_after: float | None = None,
+) -> float:
+    """
+    Compute a full-jitter exponential backoff delay.
+
+    :param int attempt: The zero-based retry attempt.
+    :param float base_delay: The delay ceiling for the first retry.
+    :param float max_delay: The upper bound of the delay ceiling.
+    :param float retry_after: A lower bound requested by the upstream, if any.
+
+    :rtype: float
+    :return: The number of seconds to sleep before retrying.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def retry_with_backoff(
+    func: Callable[[], T],
+    limiter: AdaptiveRateLimiter,
+    max_retries: int,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    retry_on: tuple[type[Exception], ...] = (RateLimited,),
+) -> T:
+    """
+    Call `func` under `limiter`, retrying throttled calls with jittered exponential backoff.
+
+    :param Callable func: A zero-argument callable that performs one request.
+    :param AdaptiveRateLimiter limiter: The limiter shared by every caller of the same upstream.
+    :param int max_retries: How many times to retry before giving up.
+    :param float base_delay: The delay ceiling for the first retry.
+    :param float max_delay: The upper bound of the delay ceiling.
+    :param tuple retry_on: The exception types that count as throttling.
+
+    :rtype: T
+    :return: Whatever `func` returns.
+    :raises: The last exception raised by `func` once the retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            result = func()
+        except retry_on as exception:
+            retry_after = getattr(exception, "retry_after", None)
+            limiter.on_throttle(retry_after)
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, retry_after)
+            attempt += 1
+            logger.info(
+                "Retrying in %.2f seconds (attempt %d of %d).",
+                delay,
+                attempt,
+                max_retries,
+            )
+            time.sleep(delay)
+        else:
+            limiter.on_success()
+            return result
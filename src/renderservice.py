@@ -0,0 +1,159 @@
+r"Serves cover letter renders from a warm pool of worker processes, over local HTTP."
+from __future__ import annotations
+
+import json
+import multiprocessing
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import httpx
+
+from src.configs import JobScrapeConfig
+from src.exportindex import ExportIndex
+from src.letter import export_directory, render_letter
+from src.jobspicker import JobListing
+from src.log import logger
+from src.scheduler import render_process_pool, unfreeze_after_workers
+
+RENDER_PATH = "/render"
+HEALTH_PATH = "/health"
+# How long the workers have to start, and load everything, before the service gives up.
+WARM_UP_SECONDS = 120
+
+
+def meet(barrier: Any) -> None:
+    """Wait in a render worker until every worker has reached `barrier`."""
+    barrier.wait(WARM_UP_SECONDS)
+
+
+def service_url(config: JobScrapeConfig) -> str:
+    return f"http://{config.render_service_host}:{config.render_service_port}"
+
+
+class RenderService:
+    """
+    Renders and exports letters on a pool of `render_processes` warm worker processes.
+
+    Every worker is started, and has loaded fonts, styles, template and signature,
+    before the service accepts its first request, so a request only pays for layout.
+    Each letter is added to the export index as soon as it is exported.
+    """
+
+    def __init__(self, config: JobScrapeConfig) -> None:
+        self.config = config
+        self.output_directory = export_directory(config)
+        self.index = ExportIndex(config.export_index_path)
+        self.render_pool = render_process_pool(config)
+        # Workers start on demand, and an idle one may take several quick tasks. Tasks
+        # that each wait until every worker holds one make all of them start now.
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(config.render_processes)
+            meetings = [
+                self.render_pool.submit(meet, barrier)
+                for _ in range(config.render_processes)
+            ]
+            for meeting in meetings:
+                meeting.result()
+
+    def render(self, listing: JobListing) -> dict[str, Any]:
+        """Render and export the letter for `listing`, returning where it was written."""
+        letter = self.render_pool.submit(
+            render_letter, listing, self.config.output_format
+        ).result()
+        letter.export(self.output_directory)
+        paths = letter.exported_paths(self.output_directory)
+        self.index.add([(listing, paths)])
+        return paths
+
+    def close(self) -> None:
+        self.render_pool.shutdown()
+        unfreeze_after_workers()
+        self.index.close()
+
+    def server(self) -> ThreadingHTTPServer:
+        """An HTTP server for this service, bound to the configured local address."""
+        service = self
+
+        class RenderRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != HEALTH_PATH:
+                    self.reply(HTTPStatus.NOT_FOUND, {"error": f"No route {self.path}"})
+                    return
+                self.reply(HTTPStatus.OK, {"workers": service.config.render_processes})
+
+            def do_POST(self) -> None:
+                if self.path != RENDER_PATH:
+                    self.reply(HTTPStatus.NOT_FOUND, {"error": f"No route {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    listing = JobListing.from_payload(json.loads(self.rfile.read(length)))
+                except (ValueError, TypeError, AttributeError) as exception:
+                    self.reply(HTTPStatus.BAD_REQUEST, {"error": str(exception)})
+                    return
+                try:
+                    self.reply(HTTPStatus.OK, service.render(listing))
+                except Exception as exception:
+                    logger.exception("Rendering %s failed.", listing.job_url)
+                    self.reply(
+                        HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(exception)}
+                    )
+
+            def reply(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("Render service: " + format, *args)
+
+        return ThreadingHTTPServer(
+            (self.config.render_service_host, self.config.render_service_port),
+            RenderRequestHandler,
+        )
+
+    def __enter__(self) -> RenderService:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def serve(config: JobScrapeConfig) -> None:
+    """Run the render service until interrupted."""
+    with RenderService(config) as service, service.server() as server:
+        logger.info(
+            "Render service ready at %s with %d workers.",
+            service_url(config),
+            config.render_processes,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Render service stopped.")
+
+
+def request_render(
+    listing: JobListing, config: JobScrapeConfig, client: httpx.Client | None = None
+) -> dict[str, Any]:
+    """
+    Ask a running render service for the letter of `listing`.
+
+    Pass a `client` when making several requests, to reuse its connection.
+
+    :return: The paths of the exported .pdf and .txt, and the render time in seconds.
+    :raises httpx.HTTPStatusError: If the service could not render the letter.
+    """
+    post = client.post if client is not None else httpx.post
+    response = post(
+        f"{service_url(config)}{RENDER_PATH}",
+        content=listing.to_json(),
+        headers={"Content-Type": "application/json"},
+        timeout=None,
+    )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,212 @@
+r"Overlaps recruiter lookups, letter rendering and exports across executors."
+from __future__ import annotations
+
+import gc
+import logging
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from queue import Queue
+from typing import Any, Iterable, Iterator, TypeVar
+
+from tqdm import tqdm
+
+from src.configs import JobScrapeConfig
+from src.exportindex import ExportIndex
+from src.jobspicker import JobListing
+from src.journal import RENDERED, RunJournal
+from src.letter import TXT, RenderedLetter, export_directory, render_letter, warm_up
+from src.log import init_worker_logging, logger, worker_log_queue
+
+T = TypeVar("T")
+
+_DONE = object()
+# Whether this process's objects are frozen for preloaded render workers to share.
+_frozen = False
+
+
+def prefetch(batches: Iterable[T], depth: int = 1) -> Iterator[T]:
+    """
+    Produce `batches` on a background thread, up to `depth` batches ahead of the consumer.
+
+    Producing a batch of job listings means recruiter lookups, which mostly wait on the
+    network; prefetching lets the next batch's lookups overlap the current batch's rendering.
+    Exceptions raised by the producer are re-raised in the consumer.
+    """
+    queue: Queue[Any] = Queue(maxsize=depth)
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                queue.put(batch)
+        except BaseException as exception:
+            queue.put(exception)
+        else:
+            queue.put(_DONE)
+
+    threading.Thread(target=produce, name="prefetch", daemon=True).start()
+    while (item := queue.get()) is not _DONE:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def init_render_worker(queue: Any, level: int, config: JobScrapeConfig) -> None:
+    """Set up a render worker process: route its logging to the parent, and load fonts,
+    styles, template and signature before the first letter arrives.
+    """
+    init_worker_logging(queue, level)
+    warm_up(config)
+
+
+def fork_is_safe() -> bool:
+    """Whether render workers can be forked from a preloaded parent: not where fork is
+    missing, nor on macOS, where a child forked once system frameworks have loaded
+    may crash."""
+    return "fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin"
+
+
+def freeze_for_workers() -> None:
+    """Freeze every object allocated so far, once per process. The collector leaves
+    frozen objects alone, so collections in forked workers don't write to, and so copy,
+    the pages they share with this process."""
+    global _frozen
+    if not _frozen:
+        gc.freeze()
+        _frozen = True
+
+
+def unfreeze_after_workers() -> None:
+    """Hand the objects frozen for render workers back to the collector, once the
+    workers are shut down."""
+    global _frozen
+    if _frozen:
+        gc.unfreeze()
+        _frozen = False
+
+
+def render_process_pool(config: JobScrapeConfig) -> ProcessPoolExecutor:
+    """
+    A pool of `render_processes` render workers.
+
+    With `preload_render_workers`, this process imports ReportLab, registers the fonts,
+    builds the styles and reads the signature before forking the workers, which then
+    share those pages with it copy-on-write instead of each loading and holding their
+    own. Forking copies only the calling thread, so preloading is skipped where fork is
+    unsafe, and preloaded workers are all forked before this returns: call it before
+    starting any thread but the log listeners, whose handler locks `logging` resets in
+    the child. Otherwise workers start the platform's default way, as tasks arrive, and
+    load everything in their initializer. Either way they log through the parent's
+    `worker_log_queue()`, which they are handed as they start.
+    """
+    preload = config.preload_render_workers
+    if preload and not fork_is_safe():
+        logger.warning(
+            "Render workers can't be forked safely here; not preloading them."
+        )
+        preload = False
+    if preload:
+        warm_up(config)
+        freeze_for_workers()
+    pool = ProcessPoolExecutor(
+        max_workers=config.render_processes,
+        mp_context=multiprocessing.get_context("fork" if preload else None),
+        initializer=init_render_worker,
+        initargs=(worker_log_queue(), logging.getLogger().level, config),
+    )
+    if preload:
+        # A forking pool forks all its workers at the first task, not when it's created.
+        pool.submit(int).result()
+    return pool
+
+
+class LetterScheduler:
+    """
+    Runs the letter pipeline on the executors configured in `JobScrapeConfig`.
+
+    Rendering is CPU-bound and runs on a pool of `render_processes` processes, while
+    export writes run on `export_threads` threads. Text-only letters are cheap enough
+    to render on threads, which spares starting the processes and importing ReportLab.
+    Each letter's export is submitted as soon as it is rendered, and batches of listings
+    are prefetched, so network waits, rendering and file writes overlap and wall time
+    approaches that of the slowest stage.
+    Once a batch's letters are all exported, they are added to the export index at once,
+    while the next batch renders.
+    """
+
+    def __init__(self, config: JobScrapeConfig) -> None:
+        self.config = config
+        self.output_directory = export_directory(config)
+        self.index = ExportIndex(config.export_index_path)
+        # Render workers are started first, while no thread of the scheduler's runs.
+        self.render_pool: Executor
+        if config.output_format == TXT:
+            self.render_pool = ThreadPoolExecutor(
+                max_workers=config.export_threads, thread_name_prefix="render"
+            )
+        else:
+            self.render_pool = render_process_pool(config)
+        self.export_pool = ThreadPoolExecutor(
+            max_workers=config.export_threads, thread_name_prefix="export"
+        )
+        self.progress = tqdm(unit="letter")
+
+    def run(self, batches: Iterable[list[JobListing]], journal: RunJournal) -> None:
+        """Render and export a letter for every listing in `batches` not already rendered."""
+        previous: list[Future[tuple[JobListing, dict[str, Any]]]] = []
+        for jobs in prefetch(batches):
+            renders = [
+                (
+                    job,
+                    self.render_pool.submit(
+                        render_letter, job, self.config.output_format
+                    ),
+                )
+                for job in jobs
+                if not journal.completed(job.job_url, RENDERED)
+            ]
+            self.progress.total = (self.progress.total or 0) + len(renders)
+            exports = [
+                self.export_pool.submit(self.export, job, render, journal)
+                for job, render in renders
+            ]
+            self.index_exports(previous)
+            previous = exports
+        self.index_exports(previous)
+
+    def export(
+        self, job: JobListing, render: Future[RenderedLetter], journal: RunJournal
+    ) -> tuple[JobListing, dict[str, Any]]:
+        letter = render.result()
+        letter.export(self.output_directory)
+        journal.record(job.job_url, RENDERED, elapsed=letter.elapsed)
+        self.progress.update()
+        logger.debug("Exported %s.", letter.txt_name if letter.pdf is None else letter.pdf_name)
+        return job, letter.exported_paths(self.output_directory)
+
+    def index_exports(
+        self, exports: list[Future[tuple[JobListing, dict[str, Any]]]]
+    ) -> None:
+        """Wait for a batch's `exports`, then add all its letters to the index at once."""
+        wait(exports)
+        self.index.add(export.result() for export in exports)
+
+    def close(self) -> None:
+        self.render_pool.shutdown()
+        unfreeze_after_workers()
+        self.export_pool.shutdown()
+        self.index.close()
+        self.progress.close()
+
+    def __enter__(self) -> LetterScheduler:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,208 @@
+r"Scrapes job boards page by page, checkpointing progress so runs can resume."
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import pandas as pd
+from jobspy import scrape_jobs
+from jobspy.scrapers.exceptions import (
+    IndeedException,
+    LinkedInException,
+    ZipRecruiterException,
+)
+from src.cassette import jobspy_cassette, shared_transport
+from src.configs import CONFIG, UTF
+from src.log import logger
+from src.ratelimit import AdaptiveRateLimiter, retry_with_backoff
+
+# jobspy wraps every upstream failure, 429s included, in these exceptions.
+JOB_BOARD_ERRORS = (IndeedException, LinkedInException, ZipRecruiterException)
+
+# Each board is a separate upstream, so each gets its own limiter.
+board_limiters: dict[str, AdaptiveRateLimiter] = {}
+
+
+def limiter_for(board: str) -> AdaptiveRateLimiter:
+    """The rate limiter shared by every request to `board`."""
+    if board not in board_limiters:
+        board_limiters[board] = AdaptiveRateLimiter(
+            rate=CONFIG.requests_per_second,
+            max_rate=CONFIG.max_requests_per_second,
+        )
+    return board_limiters[board]
+
+
+@dataclass
+class ScrapeCheckpoint:
+    """The progress of one board's scrape, saved after every page."""
+
+    board: str
+    offset: int = 0
+    seen_job_urls: list[str] = field(default_factory=list)
+    done: bool = False
+
+    @classmethod
+    def load(cls, path: Path, board: str) -> ScrapeCheckpoint:
+        try:
+            with open(path, mode="r", encoding=UTF) as file:
+                return cls(**json.load(file))
+        except FileNotFoundError:
+            return cls(board=board)
+
+    def save(self, path: Path) -> None:
+        """Write the checkpoint atomically, so a crash never leaves it half-written."""
+        temporary_path = path.with_suffix(".tmp")
+        with open(temporary_path, mode="w", encoding=UTF) as file:
+            json.dump(asdict(self), file)
+        os.replace(temporary_path, path)
+
+
+def checkpoint_directory(output_path: Path) -> Path:
+    """The directory holding the checkpoints and pages for the listings at `output_path`."""
+    return output_path.parent / ".checkpoints" / output_path.stem
+
+
+def has_pending_scrape(output_path: Path) -> bool:
+    """Whether a previous scrape for `output_path` stopped before finishing."""
+    return checkpoint_directory(output_path).exists()
+
+
+def clear_checkpoints(output_path: Path) -> None:
+    """Remove the checkpoints and pages once the listings are safely saved."""
+    shutil.rmtree(checkpoint_directory(output_path), ignore_errors=True)
+
+
+def scrape_board(
+    board: str,
+    search_term: str,
+    results_wanted: int,
+    page_size: int,
+    directory: Path,
+) -> pd.DataFrame:
+    """
+    Scrape one board page by page, resuming from its checkpoint if there is one.
+
+    Parameters:
+    - board (str): The job board to scrape, e.g. "indeed".
+    - search_term (str): The search term passed to the job board.
+    - results_wanted (int): How many listings to gather from this board.
+    - page_size (int): How many listings to request per page.
+    - directory (Path): Where the checkpoint and the fetched pages are kept.
+
+    Returns:
+    - pd.DataFrame: Every listing fetched from this board, including earlier runs.
+
+    Each page is appended to the board's page file and the checkpoint is saved
+    right after, so a crash or a 429 loses at most the page in flight.
+    """
+    checkpoint_path = directory / f"{board}.json"
+    pages_path = directory / f"{board}.csv"
+    checkpoint = ScrapeCheckpoint.load(checkpoint_path, board)
+    seen = set(checkpoint.seen_job_urls)
+    if checkpoint.offset:
+        logger.info("Resuming %s at offset %d.", board, checkpoint.offset)
+
+    while not checkpoint.done and checkpoint.offset < results_wanted:
+        offset = checkpoint.offset
+        requested = min(page_size, results_wanted - offset)
+        page: pd.DataFrame = retry_with_backoff(
+            lambda: scrape_jobs(
+                site_name=[board],
+                search_term=search_term,
+                location="New York, NY",  # only needed for indeed / glassdoor
+                results_wanted=requested,
+                offset=offset,
+            ),
+            limiter_for(board),
+            max_retries=CONFIG.max_retries,
+            retry_on=JOB_BOARD_ERRORS,
+        )
+        new_listings = (
+            page[~page["job_url"].isin(seen)] if "job_url" in page else page
+        )
+        if not new_listings.empty:
+            new_listings.to_csv(
+                pages_path, mode="a", header=not pages_path.exists(), index=False
+            )
+            seen.update(new_listings["job_url"])
+        checkpoint.offset = offset + requested
+        checkpoint.seen_job_urls = sorted(seen)
+        # A short or entirely repeated page means the board has run out of listings.
+        checkpoint.done = len(page) < requested or new_listings.empty
+        checkpoint.save(checkpoint_path)
+        logger.debug(
+            "%s: %d new listings at offset %d.", board, len(new_listings), offset
+        )
+
+    return read_pages(directory, board)
+
+
+def read_pages(directory: Path, board: str) -> pd.DataFrame:
+    """Read every page fetched from `board` so far."""
+    try:
+        return pd.read_csv(directory / f"{board}.csv")
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+
+def scrape_all_boards(
+    search_term: str, output_path: Path
+) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Scrape every board in `CONFIG.job_boards` concurrently, one thread per board.
+
+    Parameters:
+    - search_term (str): The search term passed to the job boards.
+    - output_path (Path): The listings file the scrape is for; its checkpoints live beside it.
+
+    Returns:
+    - pd.DataFrame: The listings of every board, deduplicated by job_url.
+    - list[str]: The boards that failed and should be resumed on the next run.
+
+    A board that keeps failing is logged, and the pages it fetched before failing are
+    returned along with the other boards' results. Checkpoints are left in place for the caller to clear.
+    """
+    directory = checkpoint_directory(output_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    results: list[pd.DataFrame] = []
+    failed_boards: list[str] = []
+    with (
+        jobspy_cassette(shared_transport()),
+        ThreadPoolExecutor(max_workers=max(1, len(CONFIG.job_boards))) as executor,
+    ):
+        futures = {
+            executor.submit(
+                scrape_board,
+                board,
+                search_term,
+                CONFIG.number_results_wanted,
+                CONFIG.results_per_page,
+                directory,
+            ): board
+            for board in CONFIG.job_boards
+        }
+        for future in as_completed(futures):
+            board = futures[future]
+            try:
+                results.append(future.result())
+            except JOB_BOARD_ERRORS as exception:
+                logger.error("Scraping %s failed: %r", board, exception)
+                failed_boards.append(board)
+                results.append(read_pages(directory, board))
+
+    if failed_boards:
+        logger.warning(
+            "Incomplete scrape of %s; rerun to resume from the checkpoint.",
+            ", ".join(failed_boards),
+        )
+
+    results = [result for result in results if not result.empty]
+    if not results:
+        return pd.DataFrame(), failed_boards
+    jobs = pd.concat(results, ignore_index=True)
+    return jobs.drop_duplicates(subset="job_url", ignore_index=True), failed_boards
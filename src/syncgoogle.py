@@ -1,11 +1,20 @@
-import time
+import warnings
 from typing import Any, Generator
 from selectolax.parser import HTMLParser
 import datetime
 import httpx
 
 from urllib.parse import quote_plus, urlparse, parse_qs
+from src.cassette import shared_transport
+from src.configs import CONFIG
 from src.log import logger
+from src.ratelimit import (
+    THROTTLE_STATUS_CODES,
+    AdaptiveRateLimiter,
+    RateLimited,
+    parse_retry_after,
+    retry_with_backoff,
+)
 
 # URL templates to make Google searches.
 
@@ -31,6 +40,17 @@ url_next_page_num = (
     "safe=%(safe)s&cr=%(country)s"
 )
 url_parameters = ("hl", "q", "num", "btnG", "start", "tbs", "safe", "cr")
+# What a search that found no one, or gave up, returns in place of a name.
+NO_RECRUITER = "Recruiter"
+
+# A single client and limiter are shared by every search,
+# so connections are pooled and the request rate adapts across queries.
+# The transport records or replays a cassette if `CONFIG.http_cassette_mode` says so.
+client = httpx.Client(transport=shared_transport())
+limiter = AdaptiveRateLimiter(
+    rate=CONFIG.requests_per_second,
+    max_rate=CONFIG.max_requests_per_second,
+)
 
 
 def get_tbs(
@@ -55,15 +75,26 @@ def get_page(url: str) -> bytes:
     """
     Requests the given URL and return the response page.
 
+    Requests are paced by the shared adaptive rate limiter, and 429/503 responses
+    are retried with jittered exponential backoff, honoring `Retry-After`.
+
     :param str url: The requested url.
 
     :rtype: bytes
     :return: The response content.
+    :raises RateLimited: If the upstream is still throttling after every retry.
     """
-    with httpx.Client() as client:
+
+    def fetch() -> bytes:
         response = client.get(url)
-        html = response.read()
-    return html
+        if response.status_code in THROTTLE_STATUS_CODES:
+            raise RateLimited(
+                f"{response.status_code} from {response.url.host}",
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        return response.read()
+
+    return retry_with_backoff(fetch, limiter, max_retries=CONFIG.max_retries)
 
 
 def parse_google_links(link: str) -> str | None:
@@ -124,7 +155,7 @@ def search(
     num=10,
     start=0,
     stop=2,
-    pause=2.0,
+    pause=None,
     country="",
     extra_params=None,
     user_agent=None,
@@ -142,9 +173,8 @@ def search(
     :param int num: Number of results per page.
     :param int start: First result to retrieve.
     :param int stop: Last result to retrieve. Use None to keep searching forever.
-    :param float pause: Lapse to wait between HTTP requests.
-        A lapse too long will make the search slow, but a lapse too short may
-        cause Google to block your IP. Your mileage may vary!
+    :param float pause: Deprecated and ignored. Requests are paced by the shared
+        rate limiter, as `requests_per_second` in config.json sets it.
     :param str country: Country or region to focus the search on. Similar to
         changing the TLD, but does not yield exactly the same results.
         Only Google knows why...
@@ -161,8 +191,15 @@ def search(
     :return: Generator (iterator) that yields found URLs.
         If the stop parameter is None, then the iterator will loop forever.
     """
-    global search_params
-    search_params = vars()
+    # The URL parameters of this search alone; searches may run on several threads.
+    params: dict[str, Any] = dict(vars())
+
+    if pause is not None:
+        warnings.warn(
+            "search(pause=...) is ignored; requests are paced by the rate limiter.",
+            DeprecationWarning,
+            stacklevel=2,
+        )
 
     count: int = 0
 
@@ -177,12 +214,13 @@ def search(
     overlapping_param_check(extra_params)
 
     url: str = (
-        proceed_to_next_page_check(num, url_next_page, url_next_page_num)
+        proceed_to_next_page_check(num, url_next_page, url_next_page_num, params)
         if start
         else proceed_to_next_page_check(
             num,
             url_search,
             url_search_num,
+            params,
         )
     )
 
@@ -192,11 +230,8 @@ def search(
 
         url = append_extra_get_params(extra_params, url)
 
-        # Sleep between requests.
-        # Keeps Google from banning you due to making too many requests.
-        time.sleep(pause)
-
         # Request the Google Search results page.
+        # Pacing between requests is handled by the shared rate limiter.
         html = get_page(url)
 
         # Turning it into a set removes duplicates
@@ -212,10 +247,12 @@ def search(
 
         # Prepare the URL for the next request.
         start += num
+        params["start"] = start
         url = proceed_to_next_page_check(
             num,
             url_next_page,
             url_next_page_num,
+            params,
         )
 
 
@@ -243,6 +280,7 @@ def proceed_to_next_page_check(
     num: int,
     template_if: str,
     template_else: str,
+    params: dict[str, Any],
     __pagination_count: int = 10,
 ) -> str:
     """
@@ -251,12 +289,13 @@ def proceed_to_next_page_check(
     :param int num: The number of the query.
     :param str template_if: The template of the url if the condition of `num == __pagination_count` is True.
     :param str template_else: The template of the url if the condition of `num == __pagination_count` is False.
+    :param dict params: The parameters of the search the URL is for.
     :param int __pagination_count: The condition against which `num` is evaluated. Represents the maximum results per a Google page. Defaults to 10.
     :rtype: str
     :return: A str with the formatted url.
     """
     url_template = template_if if num == __pagination_count else template_else
-    return url_template % search_params
+    return url_template % params
 
 
 def fetch_anchored_urls(html: bytes) -> list[str]:
@@ -302,5 +341,8 @@ def lucky(*args, **kwargs) -> str:
     try:
         name = next(search(*args, **kwargs))
     except StopIteration:
-        name = "Recruiter"
+        name = NO_RECRUITER
+    except RateLimited as exception:
+        logger.error("Giving up on search after repeated throttling: %s", exception)
+        name = NO_RECRUITER
     return name
@@ -0,0 +1,312 @@
+r"Fans letter renders out to workers on any number of hosts through a leased work queue."
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from src.configs import JobScrapeConfig
+from src.exportindex import ExportIndex
+from src.letter import export_directory, render_letter, warm_up
+from src.jobspicker import JobListing
+from src.journal import RENDERED, RunJournal
+from src.log import logger
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+# How many letters a worker exports before adding them to the export index together.
+INDEX_BATCH_SIZE = 100
+
+
+@dataclass
+class Task:
+    """A render task claimed by a worker, held until `lease_expires`."""
+
+    task_id: str
+    listing: JobListing
+    attempts: int
+    lease_expires: float
+
+
+class WorkQueue(ABC):
+    """
+    A queue of render tasks that workers claim with time-limited leases.
+
+    A task whose lease expires before its worker reports back is handed to the next
+    worker that asks, so tasks held by a crashed worker are retried. A task is retried
+    up to `max_attempts` times before it is marked failed. Publishing a failed task
+    again queues it afresh, with all its attempts; publishing one that is pending,
+    leased or done does nothing, so publishing the same listings twice is safe.
+    A broker such as Redis can back the queue by implementing these methods.
+    """
+
+    @abstractmethod
+    def publish(self, listings: Iterable[JobListing]) -> int:
+        """
+        Queue a render task per listing, keyed by job_url, and requeue those that failed.
+        Returns how many were new or requeued.
+        """
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> Task | None:
+        """Lease the next pending or expired task to `worker`, or None if there is none."""
+
+    @abstractmethod
+    def complete(self, task_id: str, worker: str, result: dict[str, Any]) -> bool:
+        """Mark a task done with its result. False if `worker` no longer held the lease."""
+
+    @abstractmethod
+    def fail(self, task_id: str, worker: str, error: str) -> None:
+        """Release a task after an error, to be retried while attempts remain."""
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """How many tasks are in each state."""
+
+    @abstractmethod
+    def results(self) -> dict[str, dict[str, Any]]:
+        """The result of every completed task, by task id."""
+
+    def unfinished(self) -> int:
+        counts = self.counts()
+        return counts.get(PENDING, 0) + counts.get(LEASED, 0)
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A WorkQueue in a SQLite database, shared by worker processes through the file.
+
+    Claims run in an immediate transaction, so two workers never lease the same task.
+    SQLite locking needs a local file system; workers on other hosts need a queue
+    backed by a network broker instead.
+    """
+
+    def __init__(self, path: str | Path, max_attempts: int = 3) -> None:
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT
+            )"""
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, lease_expires)"
+        )
+
+    def publish(self, listings: Iterable[JobListing]) -> int:
+        rows = [(listing.job_url, listing.to_json()) for listing in listings]
+        with self.transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                """INSERT INTO tasks (task_id, payload) VALUES (?, ?)
+                ON CONFLICT (task_id) DO UPDATE SET payload = excluded.payload,
+                state = 'pending', attempts = 0, worker = NULL, error = NULL
+                WHERE state = 'failed'""",
+                rows,
+            )
+            return connection.total_changes - before
+
+    def claim(self, worker: str, lease_seconds: float) -> Task | None:
+        now = time.time()
+        with self.transaction() as connection:
+            connection.execute(
+                """UPDATE tasks SET state = 'failed', error = 'lease expired'
+                WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, self.max_attempts),
+            )
+            row = connection.execute(
+                """SELECT task_id, payload, attempts FROM tasks
+                WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)
+                ORDER BY rowid LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, payload, attempts = row
+            if attempts:
+                logger.info("Retrying %s, attempt %d.", task_id, attempts + 1)
+            lease_expires = now + lease_seconds
+            connection.execute(
+                """UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?,
+                attempts = attempts + 1 WHERE task_id = ?""",
+                (worker, lease_expires, task_id),
+            )
+        return Task(
+            task_id,
+            JobListing.from_payload(json.loads(payload)),
+            attempts + 1,
+            lease_expires,
+        )
+
+    def complete(self, task_id: str, worker: str, result: dict[str, Any]) -> bool:
+        with self.transaction() as connection:
+            updated = connection.execute(
+                """UPDATE tasks SET state = 'done', result = ?, lease_expires = NULL
+                WHERE task_id = ? AND worker = ? AND state = 'leased'""",
+                (json.dumps(result), task_id, worker),
+            ).rowcount
+        return bool(updated)
+
+    def fail(self, task_id: str, worker: str, error: str) -> None:
+        with self.transaction() as connection:
+            connection.execute(
+                """UPDATE tasks SET
+                state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = ?, lease_expires = NULL
+                WHERE task_id = ? AND worker = ? AND state = 'leased'""",
+                (self.max_attempts, error, task_id, worker),
+            )
+
+    def counts(self) -> dict[str, int]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT state, COUNT(*) FROM tasks GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def results(self) -> dict[str, dict[str, Any]]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT task_id, result FROM tasks WHERE state = 'done'"
+            ).fetchall()
+        return {task_id: json.loads(result) for task_id, result in rows}
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction, taking the database lock up front."""
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> SQLiteWorkQueue:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def journal_results(queue: WorkQueue, journal: RunJournal) -> int:
+    """Record in `journal` every letter the queue's workers have rendered that it
+    doesn't hold yet, so `--resume` and `--plan` see them. Returns how many it recorded."""
+    recorded = 0
+    for task_id, result in queue.results().items():
+        if not journal.completed(task_id, RENDERED):
+            journal.record(task_id, RENDERED, elapsed=result.get("elapsed"))
+            recorded += 1
+    return recorded
+
+
+def publish_batches(
+    queue: WorkQueue, batches: Iterable[list[JobListing]], journal: RunJournal
+) -> int:
+    """
+    Publish a render task for every listing in `batches` not already rendered.
+    Returns how many tasks were new to the queue, or requeued after failing.
+
+    Before each batch, and once all are published, the letters workers have rendered so
+    far are recorded in `journal`. Letters rendered after the publisher exits are
+    recorded by the next run on the same queue, such as one with `--resume`.
+    """
+    published = 0
+    for jobs in batches:
+        journal_results(queue, journal)
+        published += queue.publish(
+            job for job in jobs if not journal.completed(job.job_url, RENDERED)
+        )
+    journal_results(queue, journal)
+    logger.info("Published %d render tasks; queue holds %s.", published, queue.counts())
+    return published
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(
+    queue: WorkQueue,
+    config: JobScrapeConfig,
+    poll_seconds: float = 1.0,
+) -> int:
+    """
+    Claim and render tasks until the queue has none left unfinished.
+
+    Parameters:
+    - queue (WorkQueue): The queue to work on.
+    - config (JobScrapeConfig): Where to export and index letters, and how long leases
+      last.
+    - poll_seconds (float): How long to wait before asking again, while other
+      workers still hold leases that may expire.
+
+    Returns:
+    - int: How many letters this worker rendered and completed while it held the
+      lease; letters whose lease expired first are left for the worker now holding it.
+
+    The letters rendered are added to the export index in batches of up to
+    `INDEX_BATCH_SIZE`, and whenever the queue has no task left to claim.
+    """
+    worker = worker_name()
+    output_directory = export_directory(config)
+    warm_up(config)
+    rendered = 0
+    exported: list[tuple[JobListing, dict[str, Any]]] = []
+    with ExportIndex(config.export_index_path) as index:
+        while True:
+            task = queue.claim(worker, config.lease_seconds)
+            if task is None:
+                index.add(exported)
+                exported = []
+                if not queue.unfinished():
+                    break
+                time.sleep(poll_seconds)
+                continue
+            try:
+                letter = render_letter(task.listing, config.output_format)
+                letter.export(output_directory)
+            except Exception as exception:
+                logger.exception("Rendering %s failed.", task.task_id)
+                queue.fail(task.task_id, worker, repr(exception))
+                continue
+            result = letter.exported_paths(output_directory)
+            exported.append((task.listing, result))
+            if queue.complete(task.task_id, worker, result):
+                rendered += 1
+            else:
+                logger.warning(
+                    "Lease on %s expired before it was rendered.", task.task_id
+                )
+            if len(exported) >= INDEX_BATCH_SIZE:
+                index.add(exported)
+                exported = []
+    logger.info("Worker %s rendered %d letters.", worker, rendered)
+    return rendered
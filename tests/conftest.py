@@ -1,5 +1,37 @@
 import pytest
 
+from src import jobspicker
+
+
+@pytest.fixture(autouse=True)
+def key_phrase_cache(tmp_path, monkeypatch):
+    """Keep the key phrases of test listings out of the real cache."""
+    monkeypatch.setattr(
+        jobspicker.CONFIG, "key_phrase_cache_path", str(tmp_path / "key_phrases.jsonl")
+    )
+    jobspicker.key_phrase_cache.cache_clear()
+    yield
+    jobspicker.key_phrase_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def recruiter_cache(tmp_path, monkeypatch):
+    """Keep the recruiters of test listings out of the real cache."""
+    monkeypatch.setattr(
+        jobspicker.CONFIG, "recruiter_cache_path", str(tmp_path / "recruiters.jsonl")
+    )
+    jobspicker.recruiter_cache.cache_clear()
+    yield
+    jobspicker.recruiter_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def export_index(tmp_path, monkeypatch):
+    """Keep the letters exported by tests out of the real export index."""
+    monkeypatch.setattr(
+        jobspicker.CONFIG, "export_index_path", str(tmp_path / "index.sqlite")
+    )
+
 
 @pytest.fixture()
 def job_data_full():
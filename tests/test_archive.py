@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.archive import (
+    DATE_FORMAT,
+    ListingArchive,
+    compact_listings,
+    compress,
+    decompress,
+    listing_file_key,
+    train_dictionary,
+)
+from src.configs import NOW
+
+BOILERPLATE = (
+    "We are an equal opportunity employer and value diversity at our company. "
+    "Benefits include health insurance, a 401k match and paid time off."
+)
+
+
+def store(directory, term: str, day: date, companies: list[str]):
+    path = directory / f"{term}_{day.strftime(DATE_FORMAT)}_joblistings.csv"
+    pd.DataFrame(
+        {
+            "job_url": [f"https://example.com/{term}/{name}" for name in companies],
+            "company": companies,
+            "title": [f"{term} at {company}" for company in companies],
+            "min_amount": [50000.0] * len(companies),
+            "recruiter": [None] * len(companies),
+            "description": [f"Join {term} team. {BOILERPLATE}" for _ in companies],
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+def test_listing_file_key():
+    term, day = listing_file_key(
+        Path("Graphic_Designer_February 18, 2024_joblistings.csv")
+    )
+    assert (term, day) == ("Graphic_Designer", date(2024, 2, 18))
+    with pytest.raises(ValueError):
+        listing_file_key(Path("journal.jsonl"))
+
+
+def test_dictionary_holds_recurring_sentences():
+    dictionary = train_dictionary([f"Role {i}. {BOILERPLATE}" for i in range(5)])
+    assert b"equal opportunity employer" in dictionary
+    text = f"Something new. {BOILERPLATE}"
+    compressed = compress(text, dictionary)
+    assert decompress(compressed, dictionary) == text
+    assert len(compressed) < len(compress(text, b""))
+
+
+def test_compaction_merges_past_stores(tmp_path):
+    today = NOW.date()
+    yesterday, last_week = today - timedelta(days=1), today - timedelta(days=7)
+    old = store(tmp_path, "Python", last_week, ["Acme", "Globex"])
+    recent = store(tmp_path, "Designer", yesterday, ["Acme", "Initech"])
+    current = store(tmp_path, "Python", today, ["Hooli"])
+
+    with ListingArchive(tmp_path / "archive.sqlite") as archive:
+        assert compact_listings(tmp_path, archive) == [recent, old]
+        assert not old.exists() and not recent.exists() and current.exists()
+
+        everything = archive.query()
+        assert len(everything) == 4
+        (count,) = archive.connection.execute(
+            "SELECT COUNT(DISTINCT description_hash) FROM listings"
+        ).fetchone()
+        assert count == 2
+
+        acme = archive.query(company="Acme")
+        assert sorted(acme["term"]) == ["Designer", "Python"]
+        assert acme["description"].str.endswith(BOILERPLATE).all()
+        assert (acme["min_amount"] == 50000.0).all() and acme["recruiter"].isna().all()
+
+        python = archive.query(term="Python", descriptions=False)
+        assert list(python["company"]) == ["Acme", "Globex"]
+        assert "description" not in python
+
+        assert len(archive.query(since=yesterday)) == 2
+        assert len(archive.query(until=last_week)) == 2
+
+    # Reopening keeps the dictionary, and archiving a store again replaces its listings.
+    store(tmp_path, "Python", last_week, ["Acme"])
+    with ListingArchive(tmp_path / "archive.sqlite") as archive:
+        compact_listings(tmp_path, archive)
+        assert len(archive.query()) == 3
+        assert archive.query(company="Globex").empty
+        assert archive.query(company="Acme")["description"].notna().all()
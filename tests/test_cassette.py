@@ -0,0 +1,89 @@
+import time
+
+import httpx
+import pytest
+import requests
+
+from src import ratelimit, syncgoogle
+from src.cassette import (
+    RECORD,
+    REPLAY,
+    Cassette,
+    CassetteMiss,
+    CassetteSession,
+    CassetteTransport,
+    jobspy_cassette,
+)
+from src.ratelimit import AdaptiveRateLimiter
+
+SERP = b"<html><body><h3>Jane Smith - Recruiter - Example Company</h3></body></html>"
+URL = "https://www.google.com/search?hl=en&q=test"
+
+
+@pytest.fixture()
+def recorded(tmp_path):
+    """A cassette holding one recorded search, and how often the live stub was hit."""
+    path = tmp_path / "cassette.jsonl.gz"
+    calls = []
+
+    def live(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, content=SERP, headers={"X-Served-By": "stub"})
+
+    transport = CassetteTransport(
+        Cassette(path), mode=RECORD, transport=httpx.MockTransport(live)
+    )
+    with httpx.Client(transport=transport) as client:
+        assert client.get(URL).content == SERP
+    return path, calls
+
+
+def test_replay_matches_recording(recorded):
+    path, calls = recorded
+    transport = CassetteTransport(Cassette(path), mode=REPLAY)
+    with httpx.Client(transport=transport) as client:
+        # Query parameter order does not matter.
+        response = client.get("https://www.google.com/search?q=test&hl=en")
+        assert response.content == SERP
+        assert response.headers["X-Served-By"] == "stub"
+        assert client.get(URL).content == SERP
+        with pytest.raises(CassetteMiss):
+            client.get("https://www.google.com/search?q=other")
+    assert len(calls) == 1
+
+
+def test_replay_latency(recorded):
+    path, _ = recorded
+    transport = CassetteTransport(Cassette(path), mode=REPLAY, latency=0.05)
+    with httpx.Client(transport=transport) as client:
+        start = time.perf_counter()
+        client.get(URL)
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_get_page_retries_through_injected_429s(recorded, monkeypatch):
+    path, _ = recorded
+    limiter = AdaptiveRateLimiter(rate=1000.0, min_rate=100.0, max_rate=2000.0)
+    monkeypatch.setattr(syncgoogle, "limiter", limiter)
+    monkeypatch.setattr(ratelimit, "backoff_delay", lambda *args: 0.0)
+    transport = CassetteTransport(Cassette(path), mode=REPLAY, throttle_rate=0.5, seed=1)
+    monkeypatch.setattr(syncgoogle, "client", httpx.Client(transport=transport))
+    for _ in range(10):
+        assert syncgoogle.get_page(URL) == SERP
+    assert limiter.rate < 1000.0
+
+
+def test_jobspy_cassette_swaps_sessions_and_restores(recorded):
+    from jobspy.scrapers import indeed, linkedin
+
+    path, _ = recorded
+    original = indeed.create_session
+    transport = CassetteTransport(Cassette(path), mode=REPLAY, throttle_rate=1.0)
+    with jobspy_cassette(transport):
+        assert isinstance(indeed.create_session(None), CassetteSession)
+        response = linkedin.requests.get(URL, timeout=10)
+        assert response.status_code == 429
+        with pytest.raises(requests.HTTPError):
+            response.raise_for_status()
+    assert indeed.create_session is original
+    assert linkedin.requests is requests
@@ -0,0 +1,62 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import jobspicker
+from src.jobspicker import JobListing, chunk_size_for, find_jobs_chunked
+
+ROWS = 100_000
+PEAK_MEMORY_MB = 16
+
+
+@pytest.fixture()
+def large_listing_store(tmp_path, monkeypatch):
+    """A synthetic 100k-row listing store with realistic description lengths."""
+    output_path = tmp_path / "Python_joblistings.csv"
+    rng = np.random.default_rng(0)
+    words = np.array(["design", "python", "team", "product", "user", "growth"])
+    descriptions = [" ".join(rng.choice(words, 60)) for _ in range(1000)]
+    pd.DataFrame(
+        {
+            "job_url": [f"www.example.com/{i}" for i in range(ROWS)],
+            "title": "Example Job",
+            "company": [f"Example Company {i % 5000}" for i in range(ROWS)],
+            "description": [descriptions[i % 1000] for i in range(ROWS)],
+        }
+    ).to_csv(output_path, index=False)
+    monkeypatch.setattr(jobspicker, "listings_path", lambda search_term: output_path)
+    monkeypatch.setattr(jobspicker, "lucky", lambda query: "Jane Smith")
+    monkeypatch.setattr(jobspicker.CONFIG, "chunk_size", 5000)
+    monkeypatch.setattr(jobspicker.CONFIG, "peak_memory_mb", PEAK_MEMORY_MB)
+    # Descriptions repeat to keep the fixture cheap; they are not meant as duplicates.
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0)
+    return output_path
+
+
+def test_chunked_processing_stays_within_peak_memory(large_listing_store):
+    rows = 0
+    tracemalloc.start()
+    try:
+        for jobs in find_jobs_chunked("Python"):
+            assert isinstance(jobs[0], JobListing)
+            rows += len(jobs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert rows == ROWS
+    assert peak < PEAK_MEMORY_MB * 2**20
+    # The partial file with recruiters replaced the listing store.
+    saved = pd.read_csv(large_listing_store, usecols=["recruiter"])
+    assert len(saved) == ROWS
+    assert (saved["recruiter"] == "Jane Smith").all()
+
+
+def test_chunk_size_respects_memory_target(monkeypatch):
+    monkeypatch.setattr(jobspicker.CONFIG, "chunk_size", 10_000)
+    chunk = pd.DataFrame({"description": ["x" * 1000] * 100})
+    rows = chunk_size_for(chunk, peak_memory_mb=1)
+    assert 1 <= rows < 10_000
+    assert chunk_size_for(chunk, peak_memory_mb=1000) == 10_000
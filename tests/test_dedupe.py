@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from src import jobspicker
+from src.dedupe import drop_near_duplicates, near_duplicate_clusters
+
+DESCRIPTION = (
+    "We are hiring a senior graphic designer to lead brand work across print and "
+    "digital. You will partner with marketing and product teams, own our visual "
+    "identity, and mentor junior designers."
+)
+
+
+def test_near_duplicate_clusters():
+    texts = pd.Series(
+        [
+            DESCRIPTION,
+            "Python engineer building backend services in Django for our payments team.",
+            DESCRIPTION.replace("senior", "Senior").replace("mentor", "coach"),
+            "",
+            None,
+            "Python engineer building backend services in Django for our payments team!",
+            "Barista wanted for our downtown coffee shop.",
+        ]
+    )
+    clusters = near_duplicate_clusters(texts, threshold=0.7)
+    assert clusters.tolist() == [0, 1, 0, 3, 4, 1, 6]
+
+
+def test_near_duplicate_clusters_scale():
+    rng = np.random.default_rng(0)
+    words = np.array([f"word{i}" for i in range(2000)])
+    texts = [" ".join(rng.choice(words, 100)) for _ in range(2000)]
+    clusters = near_duplicate_clusters(pd.Series(texts + texts), threshold=0.8)
+    assert (clusters[2000:] == np.arange(2000)).all()
+    assert len(np.unique(clusters)) == 2000
+
+
+def test_drop_near_duplicates_prefers_known_recruiters():
+    jobs = pd.DataFrame(
+        {
+            "job_url": [f"www.example{i}.com" for i in range(4)],
+            "title": ["Graphic Designer", "Barista", "Graphic Designer", "Designer"],
+            "company": ["Data Corp", "Cafe", "Data Corp", "Tech Co."],
+            "description": [DESCRIPTION, "coffee", DESCRIPTION, "figma"],
+            "recruiter": [None, None, "Jane Smith", None],
+        },
+        index=[10, 11, 12, 13],
+    )
+    kept = drop_near_duplicates(jobs, threshold=0.8)
+    assert kept.index.to_list() == [11, 12, 13]
+
+
+def test_select_listings_drops_cross_posts(monkeypatch):
+    jobs = pd.DataFrame(
+        {
+            "title": ["Graphic Designer"] * 3,
+            "company": ["Data Corp", "Data Corp", "Tech Co."],
+            "description": [DESCRIPTION, DESCRIPTION + " Apply now.", "figma"],
+        }
+    )
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0.8)
+    assert jobspicker.select_listings(jobs, "Designer").index.to_list() == [0, 2]
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0)
+    assert len(jobspicker.select_listings(jobs, "Designer")) == 3
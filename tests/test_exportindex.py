@@ -0,0 +1,40 @@
+from src.exportindex import ExportIndex
+from src.jobspicker import JobListing
+
+
+def listing(i: int, company: str, recruiter: str) -> JobListing:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    fields.update(job_url=f"www.example{i}.com", company=company, recruiter=recruiter)
+    return JobListing(**fields)
+
+
+def paths(i: int) -> dict:
+    return {"pdf": f"exports/{i}.pdf", "txt": None, "elapsed": 0.1}
+
+
+def test_index_finds_letters_by_listing_company_and_recruiter(tmp_path):
+    with ExportIndex(tmp_path / "index.sqlite") as index:
+        assert index.add([]) == 0
+        assert index.add(
+            [
+                (listing(0, "Acme", "Jane"), paths(0)),
+                (listing(1, "Acme", "Sam"), paths(1)),
+                (listing(2, "Globex", "Jane"), paths(2)),
+            ]
+        ) == 3
+        assert [letter["pdf"] for letter in index.find(company="Acme")] == [
+            "exports/1.pdf",
+            "exports/0.pdf",
+        ]
+        assert len(index.find(company="Acme", recruiter="Jane")) == 1
+        assert {letter["job_url"] for letter in index.lookup("Jane")} == {
+            "www.example0.com",
+            "www.example2.com",
+        }
+
+    # Exporting a listing again replaces its paths.
+    with ExportIndex(tmp_path / "index.sqlite") as index:
+        index.add([(listing(0, "Acme", "Jane"), {"pdf": None, "txt": "0.txt"})])
+        (letter,) = index.lookup("www.example0.com")
+        assert letter["pdf"] is None and letter["txt"] == "0.txt"
+        assert len(index.find()) == 3
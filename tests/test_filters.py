@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import jobspicker
+from src.configs import NOW, ListingFilters
+from src.filters import annual_salaries, filter_listings
+
+
+@pytest.fixture()
+def listings():
+    today = pd.Timestamp(NOW).normalize()
+    return pd.DataFrame(
+        {
+            "job_url": [f"www.example{i}.com" for i in range(5)],
+            "title": [
+                "Senior Python Engineer",
+                "Graphic Designer",
+                "Python Intern",
+                "UX Designer",
+                "Data Engineer",
+            ],
+            "company": ["Tech Co.", "Data Corp", "Tech Co.", "Spam Inc ", None],
+            "location": ["New York, NY", "Remote", "Chicago, IL", None, "Brooklyn, NY"],
+            "date_posted": [
+                today - pd.Timedelta(days=2),
+                today - pd.Timedelta(days=40),
+                None,
+                today,
+                today - pd.Timedelta(days=1),
+            ],
+            "interval": ["yearly", "hourly", "monthly", None, "weekly"],
+            "min_amount": [120000, 40, 2000, None, np.nan],
+            "max_amount": [150000, 60, 3000, None, 1000],
+            "is_remote": [False, True, None, True, False],
+        }
+    )
+
+
+def test_annual_salaries(listings):
+    low, high = annual_salaries(listings)
+    np.testing.assert_allclose(low, [120000, 83200, 24000, np.nan, 52000])
+    np.testing.assert_allclose(high, [150000, 124800, 36000, np.nan, 52000])
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        (ListingFilters(), [0, 1, 2, 3, 4]),
+        (ListingFilters(min_salary=60000), [0, 1, 3]),
+        (ListingFilters(min_salary=60000, max_salary=100000), [1, 3]),
+        (ListingFilters(is_remote=True), [1, 2, 3]),
+        (ListingFilters(locations=["new york", "brooklyn"]), [0, 4]),
+        (ListingFilters(max_age_days=7), [0, 2, 3, 4]),
+        (ListingFilters(company_blocklist=["spam inc", "Data Corp"]), [0, 2, 4]),
+        (ListingFilters(title_patterns=["python", r"design(er)?"]), [0, 1, 2, 3]),
+        (ListingFilters(title_exclude_patterns=["intern", "senior"]), [1, 3, 4]),
+        (ListingFilters(min_salary=60000, is_remote=False), [0]),
+    ],
+)
+def test_filter_listings(listings, filters, expected):
+    assert filter_listings(listings, filters).index.to_list() == expected
+
+
+def test_filter_listings_missing_columns():
+    jobs = pd.DataFrame({"job_url": ["www.example.com"], "title": ["Designer"]})
+    filters = ListingFilters(min_salary=50000, is_remote=True, max_age_days=1)
+    assert len(filter_listings(jobs, filters)) == 1
+
+
+def test_find_jobs_searches_only_selected_listings(listings, tmp_path, monkeypatch):
+    output_path = tmp_path / "Python_joblistings.csv"
+    listings.to_csv(output_path, index=False)
+    searched = []
+    monkeypatch.setattr(jobspicker, "listings_path", lambda search_term: output_path)
+    monkeypatch.setattr(
+        jobspicker, "lucky", lambda query: searched.append(query) or "Jane Smith"
+    )
+    monkeypatch.setattr(
+        jobspicker.CONFIG, "filters", ListingFilters(title_patterns=["python"])
+    )
+
+    jobs = jobspicker.find_jobs("Python")
+    assert [job.job_url for job in jobs] == ["www.example0.com", "www.example2.com"]
+    # Both selected listings are at Tech Co., whose recruiter is searched once.
+    assert len(searched) == 1
+    saved = pd.read_csv(output_path)
+    assert len(saved) == 5
+    assert saved["recruiter"].notna().to_list() == [True, False, True, False, False]
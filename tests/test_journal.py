@@ -0,0 +1,61 @@
+from src import jobspicker
+from src.jobspicker import find_recruiters
+from src.journal import RECRUITER, RENDERED, SCRAPED, RunJournal
+
+
+def test_journal_resumes_recorded_stages(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.start("Python")
+        journal.record_many(["www.example1.com", "www.example2.com"], SCRAPED)
+        journal.record("www.example1.com", RECRUITER, recruiter="John Doe")
+        journal.record("www.example1.com", RENDERED, elapsed=0.5)
+
+    with RunJournal(path, resume=True) as journal:
+        assert journal.search_term == "Python"
+        assert journal.completed("www.example1.com", RENDERED)
+        assert journal.completed("www.example2.com", SCRAPED)
+        assert not journal.completed("www.example2.com", RECRUITER)
+        assert journal.get("www.example1.com", RECRUITER)["recruiter"] == "John Doe"
+
+
+def test_journal_starts_fresh_without_resume(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.start("Python")
+        journal.record("www.example1.com", RENDERED)
+
+    with RunJournal(path) as journal:
+        assert journal.search_term is None
+        assert not journal.completed("www.example1.com", RENDERED)
+
+
+def test_journal_survives_a_torn_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.record("www.example1.com", RENDERED)
+    with open(path, "a") as file:
+        file.write('{"job_url": "www.exam')
+
+    with RunJournal(path, resume=True) as journal:
+        journal.record("www.example2.com", RENDERED)
+    with RunJournal(path, resume=True) as journal:
+        assert journal.completed("www.example1.com", RENDERED)
+        assert journal.completed("www.example2.com", RENDERED)
+
+
+def test_find_recruiters_only_searches_remaining_listings(tmp_path, monkeypatch):
+    searched = []
+    monkeypatch.setattr(
+        jobspicker, "lucky", lambda query: searched.append(query) or "Jane Smith"
+    )
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.record("www.example1.com", RECRUITER, recruiter="John Doe")
+
+    with RunJournal(path, resume=True) as journal:
+        names = find_recruiters(
+            ["query 1", "query 2"], ["www.example1.com", "www.example2.com"], journal
+        )
+    assert names == ["John Doe", "Jane Smith"]
+    assert searched == ["query 2"]
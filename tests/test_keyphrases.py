@@ -0,0 +1,62 @@
+import pandas as pd
+
+from src import keyphrases
+from src.configs import CONFIG
+from src.jobspicker import JobListing
+from src.keyphrases import KeyPhraseCache, add_key_phrases, extract_key_phrases
+from src.letter import KEY_PHRASES_FALLBACK, CoverLetterContents
+
+BOILERPLATE = "We are an equal opportunity employer. Benefits include health insurance."
+JOBS = pd.DataFrame(
+    {
+        "title": ["Senior Product Designer", "Graphic Designer", "Python Developer"],
+        "description": [
+            "Own end-to-end design for our mobile app, from user research to "
+            f"prototypes in Figma. {BOILERPLATE}",
+            "Create brand campaigns and social media assets in Adobe Illustrator. "
+            f"{BOILERPLATE}",
+            f"Maintain ETL pipelines with Airflow, and REST APIs on AWS. {BOILERPLATE}",
+        ],
+    }
+)
+
+
+def test_key_phrases_skip_titles_and_boilerplate():
+    phrases = extract_key_phrases(
+        JOBS["description"].to_list(), 3, JOBS["title"].to_list()
+    )
+    assert phrases[0][:2] == ["end-to-end design", "mobile app"]
+    assert "Adobe Illustrator" in phrases[1]
+    assert all(len(listing) == 3 for listing in phrases)
+    flat = " ".join(phrase for listing in phrases for phrase in listing).lower()
+    assert "insurance" not in flat and "opportunity" not in flat
+    assert "designer" not in flat and "developer" not in flat
+
+
+def test_key_phrases_are_memoized_on_disk(tmp_path, monkeypatch):
+    path = tmp_path / "key_phrases.jsonl"
+    first = add_key_phrases(JOBS, KeyPhraseCache(path), 2)
+    assert all(len(phrases) == 2 for phrases in first["key_phrases"])
+
+    def fail(*args):
+        raise AssertionError("cached descriptions were extracted again")
+
+    monkeypatch.setattr(keyphrases, "extract_key_phrases", fail)
+    again = add_key_phrases(JOBS, KeyPhraseCache(path), 2)
+    assert again["key_phrases"].to_list() == first["key_phrases"].to_list()
+
+    monkeypatch.setattr(keyphrases, "extract_key_phrases", extract_key_phrases)
+    more = add_key_phrases(JOBS, KeyPhraseCache(path), 3)
+    assert all(len(phrases) == 3 for phrases in more["key_phrases"])
+
+
+def test_letters_list_the_key_phrases():
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    letter = CoverLetterContents(JobListing(**fields), CONFIG)
+    assert letter.key_phrases == KEY_PHRASES_FALLBACK
+    letter.listing.key_phrases = ["brand campaigns"]
+    assert letter.key_phrases == "brand campaigns"
+    letter.listing.key_phrases = ["brand campaigns", "motion design", "Figma"]
+    assert letter.key_phrases == "brand campaigns, motion design and Figma"
+    letter()
+    assert "focus on brand campaigns, motion design and Figma" in letter.whole_letter
@@ -0,0 +1,175 @@
+import io
+import subprocess
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from src.configs import CONFIG, DATE, persona
+from src.jobspicker import JobListing
+from src.letter import (
+    BOTH,
+    PDF,
+    SHARD_DIGITS,
+    TXT,
+    CoverLetterContents,
+    render_letter,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def listing() -> JobListing:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    fields.update(
+        job_url="www.example.com",
+        site="indeed",
+        title="Graphic Designer",
+        company="Tech Co.",
+        recruiter="Jane Smith",
+    )
+    return JobListing(**fields)
+
+
+def test_text_only_rendering_never_imports_reportlab():
+    script = (
+        "import sys, main\n"
+        "from src.letter import TXT, render_letter\n"
+        "from tests.test_letter import listing\n"
+        "letter = render_letter(listing(), TXT)\n"
+        "assert letter.pdf is None and 'Dear Jane Smith' in letter.txt\n"
+        "print(sorted(name for name in sys.modules if name.startswith('reportlab')))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_formats_agree(monkeypatch, tmp_path):
+    monkeypatch.setattr(persona, "signature_path", "signature.example.png")
+    text = render_letter(listing(), TXT)
+    both = render_letter(listing(), BOTH)
+    pdf = render_letter(listing(), PDF)
+    assert text.txt == both.txt
+    assert both.pdf.startswith(b"%PDF") and pdf.pdf.startswith(b"%PDF")
+    assert pdf.txt is None
+
+    text.export(tmp_path)
+    exported = [path for path in tmp_path.rglob("*") if path.is_file()]
+    assert [path.relative_to(tmp_path).as_posix() for path in exported] == [text.txt_name]
+    assert text.exported_paths(tmp_path)["pdf"] is None
+
+
+def test_letters_to_one_company_never_share_a_file():
+    first, second = listing(), listing()
+    second.job_url = "www.example.com/2"
+    first.company = second.company = "A/B: Tech?"
+    names = [CoverLetterContents(job, CONFIG).pdf_name for job in (first, second)]
+    assert names[0] != names[1]
+    for name in names:
+        shard, filename = name.split("/")
+        assert len(shard) == SHARD_DIGITS and filename.startswith(DATE)
+        assert "A_B_ Tech_" in filename
+
+
+def test_static_paragraphs_are_laid_out_once(monkeypatch):
+    import reportlab.rl_config
+
+    from src.coverletterwriter import CoverLetterPrinter, StaticParagraph
+    from src.letter import static_sections
+
+    monkeypatch.setattr(persona, "signature_path", "signature.example.png")
+    monkeypatch.setattr(reportlab.rl_config, "invariant", 1)
+    assert static_sections() == {"invite"}
+
+    other = listing()
+    other.company, other.recruiter = "Other Co.", "Sam Lee"
+    flowables = []
+    for job in (listing(), other):
+        printer = CoverLetterPrinter(CONFIG, CoverLetterContents(job, CONFIG))
+        printer.add_styles()
+        printer.cover_letter()
+        flowables.append(printer.format_letter())
+    static = [
+        (first, second)
+        for first, second in zip(*flowables)
+        if isinstance(first, StaticParagraph)
+    ]
+    assert len(static) == 1
+    assert static[0][0] is static[0][1]
+
+    assert render_letter(listing(), PDF).pdf == render_letter(listing(), PDF).pdf
+    assert len(static[0][0].layouts) == 1
+
+
+def test_compact_profile_shrinks_letters(monkeypatch):
+    import reportlab.rl_config
+    from PIL import Image
+
+    from src.coverletterwriter import (
+        CoverLetterPrinter,
+        compact_image,
+        signature_data,
+        whole_fonts,
+    )
+
+    monkeypatch.setattr(persona, "signature_path", "signature.example.png")
+
+    def pdf(profile: str) -> bytes:
+        config = replace(CONFIG, pdf_profile=profile)
+        printer = CoverLetterPrinter(config, CoverLetterContents(listing(), config))
+        return printer.render().pdf
+
+    default, compact = pdf("default"), pdf("compact")
+    # The compact profile leaves ReportLab's settings as it found them.
+    assert reportlab.rl_config.useA85 == 1
+    assert len(compact) < 0.9 * len(default)
+    assert b"ASCII85Decode" in default and b"ASCII85Decode" not in compact
+    assert b"/Helvetica" in default and b"/Helvetica" not in compact
+    assert b"/Producer" in default and b"/Producer" not in compact
+    assert b"/Title" in compact and b"/Keywords" not in compact
+    assert whole_fonts(compact) == []
+    # The profile is read afresh for every letter.
+    assert len(pdf("default")) == len(default)
+
+    signature = Image.open(io.BytesIO(signature_data(150)))
+    assert signature.mode == "L" and signature.size == (167, 83)
+    small = Image.new("RGBA", (10, 10), (255, 0, 0, 128))
+    buffer = io.BytesIO()
+    small.save(buffer, format="PNG")
+    assert Image.open(io.BytesIO(compact_image(buffer.getvalue(), 80, 40, 150))).mode == "RGBA"
+
+    with pytest.raises(ValueError, match="pdf_profile 'tiny'"):
+        replace(CONFIG, pdf_profile="tiny")
+
+
+def test_unknown_output_format_is_rejected():
+    with pytest.raises(ValueError, match="output_format 'Both'"):
+        replace(CONFIG, output_format="Both")
+
+
+def test_signature_is_encoded_once_per_process(monkeypatch):
+    from src.coverletterwriter import encoded_signature
+
+    monkeypatch.setattr(persona, "signature_path", "signature.example.png")
+    encoded_signature.cache_clear()
+    first, second = render_letter(listing(), PDF).pdf, render_letter(listing(), PDF).pdf
+    assert encoded_signature.cache_info().misses == 1
+    assert first.count(b"/Subtype /Image") == second.count(b"/Subtype /Image") == 2
+
+
+def test_signature_is_drawn_the_usual_way_if_it_cannot_be_filed(monkeypatch):
+    from src import coverletterwriter
+
+    monkeypatch.setattr(persona, "signature_path", "signature.example.png")
+    # An encoded image without the attributes filing it relies on.
+    monkeypatch.setattr(
+        coverletterwriter, "encoded_signature", lambda dpi, ascii85: ("key", object())
+    )
+    coverletterwriter.warn_unfiled_signature.cache_clear()
+    first, second = render_letter(listing(), PDF).pdf, render_letter(listing(), PDF).pdf
+    assert first.count(b"/Subtype /Image") == second.count(b"/Subtype /Image") == 2
+    assert coverletterwriter.warn_unfiled_signature.cache_info().misses == 1
@@ -0,0 +1,48 @@
+import logging
+import multiprocessing
+import queue
+from logging.handlers import QueueHandler
+
+from src import log
+from src.log import init_worker_logging, setup_logging
+
+
+def log_from_worker(queue, level):
+    init_worker_logging(queue, level)
+    logging.getLogger("jobscraper").info("rendered in worker")
+
+
+def test_setup_logging_never_attaches_handlers_twice():
+    setup_logging()
+    setup_logging()
+    queue_handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, QueueHandler)
+    ]
+    assert len(queue_handlers) == 1
+
+
+def test_worker_records_reach_the_parent_queue():
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=log_from_worker, args=(queue, logging.INFO))
+    worker.start()
+    worker.join()
+    record = queue.get(timeout=10)
+    assert record.getMessage() == "rendered in worker"
+    assert record.name == "jobscraper"
+
+
+def test_worker_log_queue_forwards_to_the_parents_handlers(monkeypatch):
+    handled: queue.SimpleQueue = queue.SimpleQueue()
+    monkeypatch.setattr(log._listener, "handlers", (QueueHandler(handled),))
+    assert log.worker_log_queue() is log.worker_log_queue()
+    worker = multiprocessing.Process(
+        target=log_from_worker, args=(log.worker_log_queue(), logging.INFO)
+    )
+    worker.start()
+    worker.join()
+    while (record := handled.get(timeout=10)).getMessage() != "rendered in worker":
+        pass
+    assert record.name == "jobscraper"
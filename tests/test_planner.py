@@ -0,0 +1,90 @@
+import json
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from src import jobspicker, planner, scrapedriver
+from src.configs import CONFIG
+from src.jobspicker import get_recruiter_queries, recruiter_cache
+from src.planner import paced_seconds, plan_run
+from src.ratelimit import AdaptiveRateLimiter
+
+
+def offline(*args, **kwargs):
+    raise AssertionError("Planning must not touch the network.")
+
+
+def test_paced_seconds_follows_the_rate_increase():
+    limiter = AdaptiveRateLimiter(rate=1.0, max_rate=2.0, increase=0.5)
+    assert paced_seconds(1, limiter) == 0
+    assert paced_seconds(4, limiter) == 1 + 1 / 1.5 + 1 / 2
+    assert limiter.rate == 1.0
+
+
+def test_plan_counts_searches_cache_hits_and_render_time(tmp_path, monkeypatch):
+    output_path = tmp_path / "Python_joblistings.csv"
+    pd.DataFrame(
+        {
+            "job_url": [f"www.example{i}.com" for i in range(5)],
+            "title": ["Python Engineer"] * 5,
+            "company": ["Acme", "Acme", "Globex", "Initech", "Hooli"],
+            "recruiter": [None, None, None, None, "Jane Smith"],
+        }
+    ).to_csv(output_path, index=False)
+    monkeypatch.setattr(planner, "listings_path", lambda search_term: output_path)
+    monkeypatch.setattr(jobspicker, "lucky", offline)
+    monkeypatch.setattr(scrapedriver, "scrape_jobs", offline)
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0)
+    recruiter_cache().update({get_recruiter_queries(["Globex"], "Python")[0]: "Sam"})
+    journal_path = tmp_path / "journal.jsonl"
+    journal_path.write_text(
+        "".join(
+            json.dumps(entry) + "\n"
+            for entry in [
+                {"stage": "started", "search_term": "Python"},
+                {"job_url": "www.example0.com", "stage": "recruiter", "recruiter": "Al"},
+                {"job_url": "www.example0.com", "stage": "rendered", "elapsed": 0.2},
+                {"job_url": "www.example9.com", "stage": "rendered", "elapsed": 0.4},
+            ]
+        )
+    )
+    config = replace(
+        CONFIG,
+        journal_path=str(journal_path),
+        requests_per_second=1.0,
+        max_requests_per_second=1.0,
+        render_processes=2,
+        output_format="both",
+        chunk_size=0,
+    )
+
+    plan = plan_run("Python", config)
+    assert (plan.listings, plan.selected, plan.unscraped) == (5, 5, 0)
+    assert (plan.companies, plan.cached_recruiters, plan.searches) == (3, 1, 2)
+    assert plan.letters == 5 and plan.seconds_per_letter == pytest.approx(0.3)
+    assert plan.render_seconds == pytest.approx(5 * 0.3 / 2)
+
+    resumed = plan_run("Python", config, resume=True)
+    # The journal has the first Acme listing's recruiter and letter already.
+    assert (resumed.companies, resumed.searches, resumed.letters) == (3, 2, 4)
+    assert "2 recruiter searches" in str(resumed)
+    assert not any(tmp_path.glob("exports*"))
+
+
+def test_plan_estimates_an_unscraped_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        planner, "listings_path", lambda search_term: tmp_path / "missing.csv"
+    )
+    monkeypatch.setattr(scrapedriver, "scrape_jobs", offline)
+    config = replace(
+        CONFIG,
+        job_boards=["indeed", "linkedin"],
+        number_results_wanted=60,
+        results_per_page=25,
+        journal_path=str(tmp_path / "journal.jsonl"),
+    )
+    plan = plan_run("Python", config)
+    assert (plan.listings, plan.unscraped, plan.scrape_requests) == (0, 120, 6)
+    assert plan.searches == 120 and plan.letters == 120
+    assert plan.timings == "no letters"
@@ -0,0 +1,92 @@
+import pandas as pd
+
+from src import jobspicker
+from src.configs import CONFIG, NOW
+from src.jobspicker import find_jobs_within_budget
+from src.priority import ListingQueue, priority_scores
+
+
+def listings(days_old: list[int], salaries: list[float | None]) -> pd.DataFrame:
+    today = pd.Timestamp(NOW).normalize()
+    return pd.DataFrame(
+        {
+            "job_url": [f"www.example{i}.com" for i in range(len(days_old))],
+            "title": "Python Engineer",
+            "company": [f"Company {i}" for i in range(len(days_old))],
+            "description": "Build python services.",
+            "date_posted": [today - pd.Timedelta(days=days) for days in days_old],
+            "interval": "yearly",
+            "max_amount": salaries,
+        }
+    )
+
+
+def test_fresh_and_well_paid_listings_come_first():
+    jobs = listings([30, 0, 0, 2], [200000, 100000, 150000, None])
+    scores = priority_scores(jobs, "python", CONFIG)
+    assert list(pd.Series(scores).sort_values(ascending=False).index) == [2, 1, 3, 0]
+
+
+def test_queue_pops_best_first_keeping_labels():
+    queue = ListingQueue()
+    queue.push(pd.DataFrame({"priority": [0.2, 0.9]}, index=[10, 11]))
+    queue.push(pd.DataFrame({"priority": [0.5, 0.9]}, index=[12, 13]))
+    assert list(queue.pop(3).index) == [11, 13, 12]
+    assert len(queue) == 1
+    assert list(queue.drain().index) == [10] and not queue
+
+
+def test_budget_defers_the_rest_to_the_next_run(tmp_path, monkeypatch):
+    store = tmp_path / "Python_joblistings.csv"
+    listings([5, 0, 1, 40, 3], [None] * 5).to_csv(store, index=False)
+    searched = []
+    monkeypatch.setattr(jobspicker, "listings_path", lambda search_term: store)
+    monkeypatch.setattr(
+        jobspicker, "deferred_path", lambda search_term: tmp_path / "deferred.csv"
+    )
+    monkeypatch.setattr(
+        jobspicker, "lucky", lambda query: searched.append(query) or "Jane Smith"
+    )
+    monkeypatch.setattr(jobspicker, "PRIORITY_BATCH_SIZE", 2)
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0)
+
+    assert list(find_jobs_within_budget("Python", None, budget_seconds=0)) == []
+    assert not searched
+    deferred = pd.read_csv(tmp_path / "deferred.csv")
+    assert list(deferred["job_url"]) == [f"www.example{i}.com" for i in (1, 2, 4, 0, 3)]
+
+    # A new day's store; yesterday's deferred listings compete with it by priority.
+    listings([0], [None]).assign(job_url="www.new.com").to_csv(store, index=False)
+    batches = find_jobs_within_budget("Python", None, budget_seconds=60)
+    first = next(batches)
+    assert [job.job_url for job in first] == ["www.new.com", "www.example1.com"]
+    assert all(job.recruiter == "Jane Smith" for job in first)
+    assert sum(len(batch) for batch in batches) == 4
+    assert not (tmp_path / "deferred.csv").exists()
+    # Recruiters are saved to the store for its own listings only.
+    saved = pd.read_csv(store)
+    assert list(saved["job_url"]) == ["www.new.com"]
+    assert list(saved["recruiter"]) == ["Jane Smith"]
+
+
+def test_scraping_does_not_use_up_the_budget(tmp_path, monkeypatch):
+    store = tmp_path / "Python_joblistings.csv"
+    listings([0, 1], [None] * 2).to_csv(store, index=False)
+    clock = [0.0]
+    pick_jobs = jobspicker.pick_jobs
+
+    def slow_scrape(search_term, output_path):
+        clock[0] += 600
+        return pick_jobs(search_term, output_path)
+
+    monkeypatch.setattr(jobspicker, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(jobspicker, "pick_jobs", slow_scrape)
+    monkeypatch.setattr(jobspicker, "listings_path", lambda search_term: store)
+    monkeypatch.setattr(
+        jobspicker, "deferred_path", lambda search_term: tmp_path / "deferred.csv"
+    )
+    monkeypatch.setattr(jobspicker, "lucky", lambda query: "Jane Smith")
+    monkeypatch.setattr(jobspicker.CONFIG, "duplicate_threshold", 0)
+
+    batches = list(find_jobs_within_budget("Python", None, budget_seconds=60))
+    assert sum(len(batch) for batch in batches) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from src import jobspicker
+from src.ranking import Vocabulary, rank_listings, relevance_scores, term_counts
+
+
+def test_term_counts_stems_and_drops_stopwords():
+    vocabulary = Vocabulary()
+    documents, terms, counts = term_counts(
+        pd.Series(["Designing the designs", None, "", "C++ and C#"]), vocabulary
+    )
+    assert vocabulary.term_ids == {"design": 0, "c++": 1, "c#": 2}
+    assert documents.tolist() == [0, 3, 3]
+    assert terms.tolist() == [0, 1, 2]
+    assert counts.tolist() == [2, 1, 1]
+
+
+def test_relevance_scores():
+    texts = pd.Series(
+        ["graphic design in figma", "python backend services", None, "graphic novel"]
+    )
+    scores = relevance_scores(texts, "Graphic Designer")
+    assert scores[0] > scores[3] > 0
+    assert scores[1] == scores[2] == 0
+    assert np.all((scores >= 0) & (scores <= 1 + 1e-9))
+
+
+def test_relevance_scores_unknown_profile():
+    assert relevance_scores(pd.Series(["python"]), "the and").tolist() == [0]
+
+
+def test_rank_listings():
+    jobs = pd.DataFrame(
+        {
+            "title": ["Python Engineer", "Graphic Designer", "Barista", None],
+            "description": ["build services", "brand work in figma", "coffee", None],
+        }
+    )
+    ranked = rank_listings(jobs, "Designer figma", top_n=2)
+    assert ranked.index.to_list() == [1, 0]
+    assert ranked["relevance"].iloc[0] > 0
+
+
+def test_select_listings_keeps_top_n(monkeypatch):
+    jobs = pd.DataFrame(
+        {
+            "title": ["Barista", "Graphic Designer", "Python Engineer"],
+            "description": ["coffee", "posters", "python services"],
+        }
+    )
+    monkeypatch.setattr(jobspicker.CONFIG, "top_n_listings", 1)
+    monkeypatch.setattr(jobspicker.persona, "desired_role", None)
+    assert jobspicker.select_listings(jobs, "Python").index.to_list() == [2]
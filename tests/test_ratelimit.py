@@ -0,0 +1,101 @@
+import time
+import httpx
+import pytest
+
+from src import ratelimit, syncgoogle
+from src.ratelimit import AdaptiveRateLimiter, RateLimited, parse_retry_after
+
+SERP = b"<html><body><h3>Jane Smith - Recruiter - Example Company</h3></body></html>"
+
+
+def throttling_stub(failures: int, retry_after: str = "0"):
+    """A local stub that answers the first `failures` requests with a 429."""
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            return httpx.Response(429, headers={"Retry-After": retry_after})
+        return httpx.Response(200, content=SERP)
+
+    return handler, calls
+
+
+@pytest.fixture()
+def fast_limiter(monkeypatch):
+    limiter = AdaptiveRateLimiter(rate=1000.0, max_rate=2000.0, increase=10.0)
+    monkeypatch.setattr(syncgoogle, "limiter", limiter)
+    monkeypatch.setattr(ratelimit, "backoff_delay", lambda *args: 0.0)
+    return limiter
+
+
+def test_get_page_retries_through_429s(monkeypatch, fast_limiter):
+    handler, calls = throttling_stub(failures=2)
+    monkeypatch.setattr(
+        syncgoogle, "client", httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    assert syncgoogle.get_page("https://www.google.com/search?q=test") == SERP
+    assert calls["count"] == 3
+    # Two halvings, then one additive increase.
+    assert fast_limiter.rate == pytest.approx(1000.0 * 0.25 + 10.0)
+
+
+def test_get_page_gives_up_after_max_retries(monkeypatch, fast_limiter):
+    handler, calls = throttling_stub(failures=100)
+    monkeypatch.setattr(
+        syncgoogle, "client", httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    with pytest.raises(RateLimited):
+        syncgoogle.get_page("https://www.google.com/search?q=test")
+    assert calls["count"] == syncgoogle.CONFIG.max_retries + 1
+
+
+def test_lucky_falls_back_when_throttled(monkeypatch, fast_limiter):
+    handler, _ = throttling_stub(failures=100)
+    monkeypatch.setattr(
+        syncgoogle, "client", httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    assert syncgoogle.lucky("Recruiter for Example Company") == "Recruiter"
+
+
+def test_rate_stays_within_bounds():
+    limiter = AdaptiveRateLimiter(rate=1.0, min_rate=0.5, max_rate=1.2, increase=0.5)
+    limiter.on_success()
+    assert limiter.rate == 1.2
+    for _ in range(5):
+        limiter.on_throttle()
+    assert limiter.rate == 0.5
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [(None, None), ("", None), ("7", 7.0), ("not a date", None)],
+)
+def test_parse_retry_after(header, expected):
+    assert parse_retry_after(header) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_search_pause_is_deprecated(monkeypatch):
+    monkeypatch.setattr(syncgoogle, "get_page", lambda url: b"<html></html>")
+    with pytest.warns(DeprecationWarning, match="pause"):
+        assert list(syncgoogle.search("Recruiter for Example Company", pause=2.0)) == []
+
+
+def test_concurrent_searches_keep_their_own_queries(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import parse_qs, urlparse
+
+    def get_page(url: str) -> bytes:
+        (query,) = parse_qs(urlparse(url).query)["q"]
+        time.sleep(0.001)
+        return f"<html><h3>Recruiter of {query} - Recruiter</h3></html>".encode()
+
+    monkeypatch.setattr(syncgoogle, "get_page", get_page)
+    queries = [f"Company {i}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        names = list(pool.map(syncgoogle.lucky, queries))
+    assert names == [f"Recruiter of {query}" for query in queries]
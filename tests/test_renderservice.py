@@ -0,0 +1,61 @@
+import dataclasses
+import threading
+
+import httpx
+import pytest
+
+from src import renderservice
+from src.configs import CONFIG
+from src.letter import BOTH, RenderedLetter
+from src.jobspicker import JobListing
+from src.renderservice import RenderService, request_render
+
+
+def fake_render(job: JobListing, output_format: str = BOTH) -> RenderedLetter:
+    return RenderedLetter(
+        pdf_name=f"{job.company}.pdf",
+        txt_name=f"{job.company}.txt",
+        pdf=b"%PDF-1.4",
+        txt=f"Dear {job.recruiter},",
+        elapsed=0.01,
+    )
+
+
+@pytest.fixture()
+def running_service(tmp_path, monkeypatch):
+    """A render service on an ephemeral port, and the config pointing at it."""
+    monkeypatch.setattr(renderservice, "render_letter", fake_render)
+    monkeypatch.setattr(renderservice, "export_directory", lambda config: tmp_path)
+    config = dataclasses.replace(CONFIG, render_service_port=0, render_processes=2)
+    with RenderService(config) as service, service.server() as server:
+        # Every worker is up before the first request.
+        assert len(service.render_pool._processes) == 2
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield dataclasses.replace(config, render_service_port=server.server_address[1])
+        server.shutdown()
+
+
+def test_render_service_renders_and_exports(running_service, tmp_path):
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    with httpx.Client() as client:
+        for i in range(3):
+            fields.update(job_url=f"www.example{i}.com", company=f"Company {i}")
+            fields.update(recruiter="Jane")
+            result = request_render(JobListing(**fields), running_service, client)
+            assert result["pdf"] == str(tmp_path / f"Company {i}.pdf")
+        health = client.get(f"{renderservice.service_url(running_service)}/health")
+    assert health.json() == {"workers": 2}
+    assert (tmp_path / "Company 2.txt").read_text() == "Dear Jane,"
+
+
+def test_render_service_rejects_bad_payloads(running_service):
+    url = f"{renderservice.service_url(running_service)}/render"
+    assert httpx.post(url, content=b"not json").status_code == 400
+    assert httpx.post(url, json={"salary": 1}).status_code == 400
+    assert httpx.get(f"{renderservice.service_url(running_service)}/nope").status_code == 404
+
+
+def test_listing_from_payload_fills_missing_fields():
+    listing = JobListing.from_payload({"company": "Tech Co."})
+    assert listing.company == "Tech Co." and listing.recruiter is None
@@ -0,0 +1,99 @@
+import gc
+import multiprocessing
+from dataclasses import replace
+
+import pytest
+
+from src import scheduler
+from src.configs import CONFIG
+from src.exportindex import ExportIndex
+from src.letter import BOTH, RenderedLetter
+from src.jobspicker import JobListing
+from src.journal import RENDERED, RunJournal
+from src.scheduler import LetterScheduler, prefetch
+
+
+def fake_render(job: JobListing, output_format: str = BOTH) -> RenderedLetter:
+    return RenderedLetter(
+        pdf_name=f"{job.company}.pdf",
+        txt_name=f"{job.company}.txt",
+        pdf=b"%PDF-1.4",
+        txt=f"Dear {job.recruiter},",
+        elapsed=0.01,
+    )
+
+
+def font_families_registered() -> int:
+    from src.coverletterwriter import register_font_family
+
+    return register_font_family.cache_info().currsize
+
+
+def listing(i: int) -> JobListing:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    fields.update(job_url=f"www.example{i}.com", company=f"Company {i}", recruiter="Jane")
+    return JobListing(**fields)
+
+
+def test_scheduler_exports_every_unrendered_listing(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, "render_letter", fake_render)
+    monkeypatch.setattr(scheduler, "export_directory", lambda config: tmp_path)
+    batches = [[listing(0), listing(1)], [listing(2), listing(3)]]
+
+    with RunJournal(tmp_path / "journal.jsonl") as journal:
+        journal.record("www.example1.com", RENDERED)
+        with LetterScheduler(CONFIG) as letter_scheduler:
+            letter_scheduler.run(batches, journal)
+        assert all(journal.completed(f"www.example{i}.com", RENDERED) for i in range(4))
+
+    assert sorted(path.name for path in tmp_path.glob("*.pdf")) == [
+        "Company 0.pdf",
+        "Company 2.pdf",
+        "Company 3.pdf",
+    ]
+    assert (tmp_path / "Company 2.txt").read_text() == "Dear Jane,"
+    with ExportIndex(CONFIG.export_index_path) as index:
+        assert index.find(company="Company 2")[0]["pdf"] == str(tmp_path / "Company 2.pdf")
+        assert not index.find(company="Company 1")
+
+
+def test_prefetch_reraises_producer_errors():
+    def batches():
+        yield [1]
+        raise ConnectionError("network down")
+
+    consumed = prefetch(batches())
+    assert next(consumed) == [1]
+    with pytest.raises(ConnectionError):
+        next(consumed)
+
+
+@pytest.mark.parametrize("preload", [True, False])
+def test_preloaded_workers_inherit_the_parents_fonts(monkeypatch, preload):
+    from src.coverletterwriter import register_font_family
+
+    monkeypatch.setattr(scheduler, "init_render_worker", lambda *args: None)
+    register_font_family.cache_clear()
+    config = replace(CONFIG, render_processes=1, preload_render_workers=preload)
+    with scheduler.render_process_pool(config) as pool:
+        assert pool.submit(font_families_registered).result() == int(preload)
+    # The parent freezes its objects once, however many pools it forks.
+    frozen = gc.get_freeze_count()
+    assert (frozen > 0) == preload
+    if preload:
+        scheduler.render_process_pool(config).shutdown()
+        assert gc.get_freeze_count() == frozen
+    scheduler.unfreeze_after_workers()
+    assert gc.get_freeze_count() == 0
+
+
+def test_preloaded_workers_are_forked_before_the_pool_is_returned(monkeypatch):
+    monkeypatch.setattr(scheduler, "init_render_worker", lambda *args: None)
+    config = replace(CONFIG, render_processes=2, preload_render_workers=True)
+    before = set(multiprocessing.active_children())
+    pool = scheduler.render_process_pool(config)
+    try:
+        assert len(set(multiprocessing.active_children()) - before) == 2
+    finally:
+        pool.shutdown()
+        scheduler.unfreeze_after_workers()
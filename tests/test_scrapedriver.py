@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+from jobspy.scrapers.exceptions import IndeedException
+
+from src import scrapedriver
+from src.jobspicker import pick_jobs
+from src.scrapedriver import ScrapeCheckpoint, checkpoint_directory, scrape_board
+
+
+class FakeBoard:
+    """Serves `total` listings per board in pages, optionally failing at one offset."""
+
+    def __init__(self, total: int, fail_at: int | None = None):
+        self.total = total
+        self.fail_at = fail_at
+        self.requests: list[tuple[str, int]] = []
+
+    def __call__(self, site_name, search_term, location, results_wanted, offset):
+        board = site_name[0]
+        self.requests.append((board, offset))
+        if offset == self.fail_at:
+            raise IndeedException("429")
+        stop = min(self.total, offset + results_wanted)
+        return pd.DataFrame(
+            {
+                "job_url": [f"www.{board}.com/{i}" for i in range(offset, stop)],
+                "company": [f"Company {i}" for i in range(offset, stop)],
+            }
+        )
+
+
+@pytest.fixture()
+def fake_board(monkeypatch):
+    monkeypatch.setattr(scrapedriver.CONFIG, "max_retries", 0)
+    monkeypatch.setattr(scrapedriver.CONFIG, "requests_per_second", 1000.0)
+    monkeypatch.setattr(scrapedriver.CONFIG, "max_requests_per_second", 1000.0)
+    monkeypatch.setattr(scrapedriver, "board_limiters", {})
+
+    def install(board: FakeBoard) -> FakeBoard:
+        monkeypatch.setattr(scrapedriver, "scrape_jobs", board)
+        return board
+
+    return install
+
+
+def test_scrape_board_pages_and_checkpoints(tmp_path, fake_board):
+    board = fake_board(FakeBoard(total=23))
+    jobs = scrape_board("indeed", "Python", 100, 10, tmp_path)
+    assert len(jobs) == 23
+    assert board.requests == [("indeed", 0), ("indeed", 10), ("indeed", 20)]
+    checkpoint = ScrapeCheckpoint.load(tmp_path / "indeed.json", "indeed")
+    assert checkpoint.done
+    assert len(checkpoint.seen_job_urls) == 23
+
+
+def test_scrape_board_resumes_without_refetching(tmp_path, fake_board):
+    fake_board(FakeBoard(total=50, fail_at=20))
+    with pytest.raises(IndeedException):
+        scrape_board("indeed", "Python", 40, 10, tmp_path)
+
+    board = fake_board(FakeBoard(total=50))
+    jobs = scrape_board("indeed", "Python", 40, 10, tmp_path)
+    assert board.requests == [("indeed", 20), ("indeed", 30)]
+    assert len(jobs) == 40
+    assert jobs["job_url"].is_unique
+
+
+def test_pick_jobs_keeps_other_boards_when_one_fails(tmp_path, monkeypatch, fake_board):
+    monkeypatch.setattr(scrapedriver.CONFIG, "job_boards", ["indeed", "linkedin"])
+    monkeypatch.setattr(scrapedriver.CONFIG, "number_results_wanted", 20)
+    monkeypatch.setattr(scrapedriver.CONFIG, "results_per_page", 10)
+    output_path = tmp_path / "Python_joblistings.csv"
+
+    fake_board(FakeBoard(total=50, fail_at=10))
+    jobs = pick_jobs("Python", output_path)
+    # Each board got its first page before the failure at offset 10.
+    assert len(jobs) == 20
+    assert checkpoint_directory(output_path).exists()
+
+    board = fake_board(FakeBoard(total=50))
+    jobs = pick_jobs("Python", output_path)
+    assert sorted(board.requests) == [("indeed", 10), ("linkedin", 10)]
+    assert len(jobs) == 40
+    assert not checkpoint_directory(output_path).exists()
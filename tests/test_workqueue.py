@@ -0,0 +1,125 @@
+import dataclasses
+import multiprocessing
+import time
+
+from src import workqueue
+from src.configs import CONFIG
+from src.exportindex import ExportIndex
+from src.letter import BOTH, RenderedLetter
+from src.jobspicker import JobListing
+from src.journal import RENDERED, RunJournal
+from src.workqueue import (
+    DONE,
+    FAILED,
+    PENDING,
+    SQLiteWorkQueue,
+    publish_batches,
+    run_worker,
+)
+
+
+def fake_render(job: JobListing, output_format: str = BOTH) -> RenderedLetter:
+    return RenderedLetter(
+        pdf_name=f"{job.company}.pdf",
+        txt_name=f"{job.company}.txt",
+        pdf=b"%PDF-1.4",
+        txt=f"Dear {job.recruiter},",
+        elapsed=0.01,
+    )
+
+
+def listing(i: int) -> JobListing:
+    fields = dict.fromkeys(JobListing.__dataclass_fields__)
+    fields.update(job_url=f"www.example{i}.com", company=f"Company {i}", recruiter="Jane")
+    return JobListing(**fields)
+
+
+def work(queue_path, config) -> None:
+    with SQLiteWorkQueue(queue_path) as queue:
+        run_worker(queue, config, poll_seconds=0.05)
+
+
+def test_publish_is_idempotent(tmp_path):
+    with SQLiteWorkQueue(tmp_path / "queue.db") as queue:
+        assert queue.publish([listing(0), listing(1)]) == 2
+        assert queue.publish([listing(1), listing(2)]) == 1
+        assert queue.counts() == {"pending": 3}
+
+
+def test_publish_batches_skips_rendered_listings(tmp_path):
+    with SQLiteWorkQueue(tmp_path / "queue.db") as queue, RunJournal(
+        tmp_path / "journal.jsonl"
+    ) as journal:
+        journal.record("www.example1.com", RENDERED)
+        assert publish_batches(queue, [[listing(0), listing(1)], [listing(2)]], journal) == 2
+        # Letters workers render are journaled by the next publish on the queue.
+        task = queue.claim("worker", lease_seconds=60)
+        queue.complete(task.task_id, "worker", {"elapsed": 0.5})
+        assert publish_batches(queue, [[listing(0), listing(2)]], journal) == 0
+        assert journal.get("www.example0.com", RENDERED)["elapsed"] == 0.5
+
+
+def test_expired_leases_are_retried_then_failed(tmp_path):
+    with SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=2) as queue:
+        queue.publish([listing(0)])
+        first = queue.claim("crashed", lease_seconds=0.01)
+        assert queue.claim("other", lease_seconds=60) is None
+        time.sleep(0.02)
+        second = queue.claim("other", lease_seconds=0.01)
+        assert first.task_id == second.task_id and first.attempts == 1
+        assert second.attempts == 2
+        # The crashed worker's late report no longer counts.
+        assert not queue.complete(first.task_id, "crashed", {})
+        assert queue.results() == {}
+        time.sleep(0.02)
+        assert queue.claim("third", lease_seconds=60) is None
+        assert queue.counts() == {FAILED: 1}
+
+
+def test_failed_renders_are_retried(tmp_path):
+    with SQLiteWorkQueue(tmp_path / "queue.db") as queue:
+        queue.publish([listing(0)])
+        task = queue.claim("worker", lease_seconds=60)
+        queue.fail(task.task_id, "worker", "ValueError()")
+        assert queue.claim("worker", lease_seconds=60).attempts == 2
+
+
+def test_republished_failed_tasks_are_requeued(tmp_path):
+    with SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=1) as queue:
+        queue.publish([listing(0), listing(1)])
+        failed = queue.claim("worker", lease_seconds=60)
+        queue.fail(failed.task_id, "worker", "ValueError()")
+        done = queue.claim("worker", lease_seconds=60)
+        queue.complete(done.task_id, "worker", {})
+        assert queue.counts() == {FAILED: 1, DONE: 1}
+        assert queue.publish([listing(0), listing(1)]) == 1
+        assert queue.counts() == {PENDING: 1, DONE: 1}
+        assert queue.claim("worker", lease_seconds=60).attempts == 1
+
+
+def test_worker_processes_drain_the_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(workqueue, "render_letter", fake_render)
+    monkeypatch.setattr(workqueue, "warm_up", lambda config: None)
+    monkeypatch.setattr(workqueue, "export_directory", lambda config: tmp_path / "out")
+    queue_path = tmp_path / "queue.db"
+    config = dataclasses.replace(CONFIG, lease_seconds=0.5)
+    with SQLiteWorkQueue(queue_path) as queue:
+        queue.publish(listing(i) for i in range(40))
+        # A worker that claimed a task and died; its lease must expire and be retried.
+        abandoned = queue.claim("crashed", lease_seconds=0.5)
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=work, args=(queue_path, config)) for _ in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    with SQLiteWorkQueue(queue_path) as queue:
+        assert queue.counts() == {DONE: 40}
+        results = queue.results()
+    assert results[abandoned.task_id]["pdf"] == str(tmp_path / "out" / "Company 0.pdf")
+    assert len(list((tmp_path / "out").glob("*.pdf"))) == 40
+    with ExportIndex(config.export_index_path) as index:
+        assert len(index.find()) == 40